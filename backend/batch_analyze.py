@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Batch Video Analysis
+Offline detection over image directories and long video files, faster than real time
+
+    python batch_analyze.py footage/ --output analysis/ --format parquet --batch-size 16 --annotate
+
+Frames flow through ``YOLODetector.stream``: they are decoded on background
+threads into a bounded queue while the model runs batched inference, and
+``--workers`` analyzes several sources in parallel processes. Detections use the same class mapping as the API server. Progress
+is checkpointed after every batch, so running the same command again resumes
+each source where it stopped.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Before NumPy/OpenCV: sets the BLAS thread limits they read when loaded
+from resource_governor import configure_threads
+
+import cv2
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet output is optional; CSV and JSONL work without it
+    pyarrow = None
+
+from class_subsets import parse_subset, subset_from_args
+from detector import YOLODetector
+from frame_stream import capture_frames, probe_video
+from model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.m4v', '.webm')
+OUTPUT_FORMATS = ('csv', 'jsonl', 'parquet')
+COLUMNS = ['source', 'frame', 'timestamp', 'type', 'original_class', 'confidence', 'x', 'y', 'width', 'height']
+PROGRESS_INTERVAL = 5.0         # Seconds between progress lines
+
+
+def discover_sources(paths: List[str], exclude: Optional[str] = None) -> List[Dict]:
+    """Each video file is one source; the images of each directory form another
+
+    ``exclude`` (the output directory) is skipped so annotated frames are not
+    picked up again when it lives inside an input directory.
+    """
+    exclude = os.path.abspath(exclude) if exclude else None
+    sources = []
+    for path in paths:
+        if os.path.isfile(path):
+            kind = 'video' if path.lower().endswith(VIDEO_EXTENSIONS) else 'images'
+            sources.append({'key': path, 'kind': kind, 'files': [path]})
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if os.path.abspath(os.path.join(root, d)) != exclude)
+            images = [os.path.join(root, f) for f in sorted(files) if f.lower().endswith(IMAGE_EXTENSIONS)]
+            if images:
+                sources.append({'key': root, 'kind': 'images', 'files': images})
+            for f in sorted(files):
+                if f.lower().endswith(VIDEO_EXTENSIONS):
+                    video = os.path.join(root, f)
+                    sources.append({'key': video, 'kind': 'video', 'files': [video]})
+    return sources
+
+
+def output_name(source: Dict) -> str:
+    """Flat file name for a source's outputs, unique across input directories"""
+    name = os.path.normpath(source['key']).strip(os.sep).replace(os.sep, '__')
+    return name.replace('..', '_') or 'input'
+
+
+def source_items(source: Dict, start: int, stride: int) -> Iterator[Tuple]:
+    """``(index, path, timestamp, payload)`` items for ``YOLODetector.stream``
+
+    Video payloads are decoded frames; image payloads are paths decoded by the
+    stream's decoder threads.
+    """
+    if source['kind'] == 'video':
+        path = source['files'][0]
+        for index, timestamp, frame in capture_frames(path, start=start, stride=stride):
+            yield index, path, timestamp, frame
+    else:
+        for index in range(start, len(source['files'])):
+            if index % stride == 0:
+                yield index, source['files'][index], None, source['files'][index]
+
+
+class DetectionWriter:
+    """Appends detection rows to a CSV, JSONL or Parquet file
+
+    CSV and JSONL are truncated to the last checkpointed byte offset on resume,
+    so rows written after the last checkpoint are not duplicated. Parquet files
+    cannot be appended to, so a Parquet source always restarts from scratch.
+    """
+
+    def __init__(self, path: str, fmt: str, offset: Optional[int] = None):
+        self.path = path
+        self.fmt = fmt
+        self._rows: List[Dict] = []
+        if fmt == 'parquet':
+            if pyarrow is None:
+                raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+            self._schema = pyarrow.schema([
+                ('source', pyarrow.string()), ('frame', pyarrow.int64()), ('timestamp', pyarrow.float64()),
+                ('type', pyarrow.string()), ('original_class', pyarrow.string()),
+                ('confidence', pyarrow.float64()), ('x', pyarrow.int64()), ('y', pyarrow.int64()),
+                ('width', pyarrow.int64()), ('height', pyarrow.int64())
+            ])
+            self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+            return
+
+        new_file = not offset or not os.path.exists(path)
+        self._file = open(path, 'w' if new_file else 'r+', newline='')
+        if not new_file:
+            self._file.truncate(offset)
+            self._file.seek(offset)
+        if fmt == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=COLUMNS)
+            if new_file:
+                self._csv.writeheader()
+
+    def write(self, rows: List[Dict]):
+        self._rows.extend(rows)
+
+    def flush(self) -> Optional[int]:
+        """Write buffered rows; returns the file offset to checkpoint (None for Parquet)"""
+        rows, self._rows = self._rows, []
+        if self.fmt == 'parquet':
+            if rows:
+                self._writer.write_table(pyarrow.Table.from_pylist(rows, schema=self._schema))
+            return None
+        if self.fmt == 'csv':
+            self._csv.writerows(rows)
+        else:
+            self._file.writelines(json.dumps(row) + '\n' for row in rows)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self.flush()
+        if self.fmt == 'parquet':
+            self._writer.close()
+        else:
+            self._file.close()
+
+
+class Checkpoint:
+    """Per-source progress file, written atomically after every batch"""
+
+    def __init__(self, path: str, settings: Dict):
+        self.path = path
+        self.settings = settings
+        self.state = {'settings': settings, 'next_frame': 0, 'offset': None, 'complete': False, 'counts': {}}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    saved = json.load(f)
+                if saved.get('settings') == settings:
+                    self.state = saved
+                else:
+                    logger.warning(f"Settings changed since the last run, restarting {path}")
+            except Exception as e:
+                logger.warning(f"Could not read checkpoint {path}: {e}")
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def detection_rows(path: str, index: int, timestamp: Optional[float], detections: List[Dict]) -> List[Dict]:
+    return [{
+        'source': path, 'frame': index, 'timestamp': round(timestamp, 3) if timestamp is not None else None,
+        'type': d['type'], 'original_class': d['original_class'], 'confidence': round(d['confidence'], 4),
+        'x': d['bbox']['x'], 'y': d['bbox']['y'], 'width': d['bbox']['width'], 'height': d['bbox']['height']
+    } for d in detections]
+
+
+def analyze_source(detector: YOLODetector, source: Dict, options: Dict) -> Dict:
+    """Run detection over one source, resuming from its checkpoint; returns a summary"""
+    name = output_name(source)
+    settings = {key: options[key] for key in ('format', 'confidence', 'stride', 'model', 'annotate', 'classes')}
+    checkpoint = Checkpoint(os.path.join(options['output'], f"{name}.progress.json"), settings)
+    state = checkpoint.state
+    if state['complete']:
+        logger.info(f"⏭️  {source['key']} already analyzed")
+        return {'source': source['key'], **state}
+
+    # Parquet and annotated videos cannot be appended to, so those restart the source
+    if state['next_frame'] and (options['format'] == 'parquet' or options['annotate']):
+        state.update(next_frame=0, offset=None, counts={})
+    if state['next_frame']:
+        logger.info(f"↩️  Resuming {source['key']} at frame {state['next_frame']}")
+
+    writer = DetectionWriter(os.path.join(options['output'], f"{name}.{options['format']}"),
+                             options['format'], state['offset'])
+    start = state['next_frame']
+    if source['kind'] == 'video':
+        info = {**probe_video(source['files'][0]), 'start': start, 'stride': options['stride']}
+        stream = detector.stream(source_items(source, start, options['stride']), options['confidence'],
+                                 batch_size=options['batch_size'], prefetch=options['prefetch'],
+                                 classes=options['classes'])
+    else:
+        info = {'fps': 0.0, 'frames': len(source['files']), 'start': start, 'stride': options['stride']}
+        stream = detector.stream(source_items(source, start, options['stride']), options['confidence'],
+                                 batch_size=options['batch_size'], prefetch=options['prefetch'],
+                                 decode=cv2.imread, decoders=options['decoders'], classes=options['classes'])
+    annotated_writer = None
+    annotated_dir = os.path.join(options['output'], 'annotated', name)
+    if options['annotate'] and source['kind'] == 'images':
+        os.makedirs(annotated_dir, exist_ok=True)
+
+    started = time.time()
+    last_report = started
+    frames = 0
+    pending = 0
+    counts = state['counts']
+
+    def save_checkpoint(next_frame: int):
+        state['offset'] = writer.flush()
+        state['next_frame'] = next_frame
+        checkpoint.save()
+
+    try:
+        for (index, path, timestamp), frame, detections in stream:
+            writer.write(detection_rows(path, index, timestamp, detections))
+            for detection in detections:
+                counts[detection['type']] = counts.get(detection['type'], 0) + 1
+            if options['annotate']:
+                annotated = detector.draw_detections(frame, detections)
+                if source['kind'] == 'images':
+                    cv2.imwrite(os.path.join(annotated_dir, os.path.basename(path)), annotated)
+                else:
+                    if annotated_writer is None:
+                        os.makedirs(os.path.dirname(annotated_dir), exist_ok=True)
+                        height, width = annotated.shape[:2]
+                        annotated_writer = cv2.VideoWriter(
+                            f"{annotated_dir}.mp4", cv2.VideoWriter_fourcc(*'mp4v'),
+                            (info['fps'] or 10.0) / options['stride'], (width, height))
+                    annotated_writer.write(annotated)
+
+            # Checkpoint once per batch: everything up to this frame is on disk
+            frames += 1
+            pending += 1
+            if pending >= options['batch_size']:
+                pending = 0
+                save_checkpoint(index + 1)
+            now = time.time()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                log_progress(source, info, state['next_frame'], frames, now - started)
+        if pending:
+            save_checkpoint(index + 1)
+        state['complete'] = True
+        checkpoint.save()
+    finally:
+        stream.close()
+        writer.close()
+        if annotated_writer is not None:
+            annotated_writer.release()
+
+    elapsed = time.time() - started
+    log_progress(source, info, state['next_frame'], frames, elapsed)
+    logger.info(f"✅ {source['key']}: {frames} frames in {elapsed:.1f}s, detections {counts}")
+    return {'source': source['key'], 'frames': frames, 'seconds': round(elapsed, 2), **state}
+
+
+def log_progress(source: Dict, info: Dict, position: int, frames: int, elapsed: float):
+    """Position, analysis rate and (for video) speed relative to real time"""
+    rate = frames / elapsed if elapsed > 0 else 0.0
+    total = info['frames']
+    line = f"📼 {source['key']}: frame {position}"
+    if total:
+        line += f"/{total} ({100.0 * min(position, total) / total:.1f}%)"
+    line += f", {rate:.1f} frames/s"
+    if info['fps'] and elapsed > 0:
+        line += f", {(position - info['start']) / info['fps'] / elapsed:.1f}x real time"
+        if rate > 0 and total > position:
+            remaining = (total - position) / info['stride'] / rate
+            line += f", ETA {remaining / 60:.1f} min"
+    logger.info(line)
+
+
+# Each worker process loads its own model once
+_worker_detector: Optional[YOLODetector] = None
+
+
+def _init_worker(model_path: str, processes: int):
+    global _worker_detector
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(processName)s] %(message)s')
+    configure_threads(processes)
+    _worker_detector = YOLODetector(model_path)
+
+
+def _analyze_in_worker(args: Tuple[Dict, Dict]) -> Dict:
+    source, options = args
+    try:
+        return analyze_source(_worker_detector, source, options)
+    except Exception as e:
+        logger.error(f"❌ {source['key']} failed: {e}")
+        return {'source': source['key'], 'error': str(e), 'complete': False}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Offline YOLO analysis of image directories and video files')
+    parser.add_argument('inputs', nargs='+', help='Video files, images or directories (searched recursively)')
+    parser.add_argument('--output', '-o', default='analysis', help='Directory for detections and checkpoints')
+    parser.add_argument('--format', '-f', choices=OUTPUT_FORMATS, default='csv')
+    parser.add_argument('--model', help='Registry name, name:version or weights path (default: YOLO_MODEL or active)')
+    parser.add_argument('--confidence', type=float, default=0.5)
+    parser.add_argument('--batch-size', type=int, default=8, help='Frames per forward pass')
+    parser.add_argument('--stride', type=int, default=1, help='Analyze every Nth frame')
+    parser.add_argument('--prefetch', type=int, default=32, help='Decoded frames buffered ahead of the model')
+    parser.add_argument('--decoders', type=int, default=2, help='Image decoding threads per source')
+    parser.add_argument('--workers', type=int, default=1, help='Processes analyzing sources in parallel')
+    parser.add_argument('--annotate', action='store_true', help='Also write annotated images / videos')
+    parser.add_argument('--classes', nargs='+',
+                        help='Only detect a class subset: a preset such as weapon_watch, or types / class names')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    if args.format == 'parquet' and pyarrow is None:
+        parser.error("--format parquet needs pyarrow (pip install pyarrow)")
+
+    try:
+        classes = parse_subset(subset_from_args(args.classes))
+    except ValueError as e:
+        parser.error(str(e))
+
+    sources = discover_sources(args.inputs, exclude=args.output)
+    if not sources:
+        parser.error("No images or videos found in the given inputs")
+    os.makedirs(args.output, exist_ok=True)
+
+    entry = ModelRegistry().resolve(args.model or os.environ.get('YOLO_MODEL'))
+    options = {
+        'output': args.output, 'format': args.format, 'confidence': args.confidence,
+        'batch_size': max(1, args.batch_size), 'stride': max(1, args.stride), 'prefetch': args.prefetch,
+        'decoders': args.decoders, 'model': entry['path'], 'annotate': args.annotate, 'classes': classes
+    }
+    logger.info(f"🎞️  Analyzing {len(sources)} source(s) with {entry['path']} "
+                f"(batch {options['batch_size']}, stride {options['stride']}, {args.workers} worker(s))")
+
+    started = time.time()
+    if args.workers > 1 and len(sources) > 1:
+        processes = min(args.workers, len(sources))
+        with multiprocessing.Pool(processes, initializer=_init_worker,
+                                  initargs=(entry['path'], processes)) as pool:
+            results = list(pool.imap_unordered(_analyze_in_worker, [(s, options) for s in sources]))
+    else:
+        configure_threads(1)
+        detector = YOLODetector(entry['path'])
+        results = [analyze_source(detector, source, options) for source in sources]
+
+    summary = {'sources': sorted(results, key=lambda r: r['source']), 'seconds': round(time.time() - started, 2)}
+    with open(os.path.join(args.output, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    failed = [r['source'] for r in results if not r.get('complete')]
+    if failed:
+        logger.error(f"❌ {len(failed)} source(s) did not finish: {failed}")
+        return 1
+    logger.info(f"✅ Done in {summary['seconds']}s, results in {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
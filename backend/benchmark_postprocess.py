@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Post-processing Benchmark
+Times the vectorized decode/NMS path for exported models and checks it against Ultralytics
+
+    python benchmark_postprocess.py --model best.onnx --images samples/ --classes-only
+    python benchmark_postprocess.py --frames 50 --objects 30
+
+Raw outputs come from an exported model run on real images, or are
+synthesized with clustered overlapping boxes. Every frame is decoded by
+``postprocess.decode_predictions`` and by ``ultralytics.utils.ops.non_max_suppression``
+(when PyTorch is installed) or else a plain Python reference, and the
+detections must match. Exits non-zero on any mismatch.
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import torch
+    try:
+        from ultralytics.utils.ops import non_max_suppression
+    except ImportError:  # Ultralytics releases before 8.0.136
+        from ultralytics.yolo.utils.ops import non_max_suppression
+except ImportError:  # Without PyTorch the plain Python reference is used instead
+    torch = None
+    non_max_suppression = None
+
+from exported_runtime import ExportedModel
+from frame_buffers import frame_pool
+from postprocess import DEFAULT_IOU_THRESHOLD, DEFAULT_MAX_DETECTIONS, MAX_WH, decode_predictions
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+BOX_TOLERANCE = 1e-2           # Pixels; float32 rounding differs slightly between libraries
+SCORE_TOLERANCE = 1e-5
+
+
+def synthetic_outputs(frames: int, classes: int = 80, anchors: int = 8400, objects: int = 20,
+                      imgsz: int = 640, seed: int = 0) -> List[np.ndarray]:
+    """Raw ``(1, 4 + classes, anchors)`` outputs with low background scores and clusters of duplicates per object"""
+    rng = np.random.default_rng(seed)
+    outputs = []
+    for _ in range(frames):
+        output = np.empty((1, 4 + classes, anchors), dtype=np.float32)
+        output[0, 0:2] = rng.uniform(0, imgsz, (2, anchors))
+        output[0, 2:4] = rng.uniform(4, imgsz / 4, (2, anchors))
+        output[0, 4:] = rng.uniform(0, 0.05, (classes, anchors))
+        for _ in range(objects):
+            cls = rng.integers(classes)
+            cx, cy = rng.uniform(0, imgsz, 2)
+            w, h = rng.uniform(16, imgsz / 3, 2)
+            cluster = rng.choice(anchors, rng.integers(5, 40), replace=False)
+            output[0, 0, cluster] = cx + rng.normal(0, w * 0.05, cluster.size)
+            output[0, 1, cluster] = cy + rng.normal(0, h * 0.05, cluster.size)
+            output[0, 2, cluster] = w * rng.uniform(0.9, 1.1, cluster.size)
+            output[0, 3, cluster] = h * rng.uniform(0.9, 1.1, cluster.size)
+            output[0, 4 + cls, cluster] = rng.uniform(0.2, 0.95, cluster.size)
+        outputs.append(output)
+    return outputs
+
+
+def model_outputs(detector, image_paths: Sequence[str]) -> List[np.ndarray]:
+    """Raw outputs of the detector's exported model for each image, preprocessed as in serving"""
+    outputs = []
+    for path in image_paths:
+        image = cv2.imread(path)
+        if image is None:
+            logger.warning(f"Skipping unreadable image {path}")
+            continue
+        groups, _ = detector.preprocess_batch([image])
+        for _, tensor in groups:
+            outputs.append(np.array(detector.model(tensor)))
+            frame_pool.release(tensor)
+    return outputs
+
+
+def ultralytics_decode(output: np.ndarray, confidence: float, iou: float,
+                       classes: Optional[List[int]], max_det: int) -> np.ndarray:
+    result = non_max_suppression(torch.from_numpy(output), confidence, iou, classes=classes, max_det=max_det)
+    return result[0].numpy()
+
+
+def reference_decode(output: np.ndarray, confidence: float, iou: float,
+                     classes: Optional[List[int]], max_det: int) -> np.ndarray:
+    """Straightforward per-box decode and NMS, written for clarity rather than speed
+
+    Overlaps are measured on float32 boxes shifted by ``class * MAX_WH``, as
+    Ultralytics does, so IoUs right at the threshold round the same way.
+    """
+    candidates = []
+    for column in output[0].T.tolist():
+        scores = column[4:]
+        score = max(scores)
+        cls = scores.index(score)
+        if score <= confidence or (classes is not None and cls not in classes):
+            continue
+        cx, cy, w, h = column[:4]
+        box = [cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]
+        shifted = (np.array(box, dtype=np.float32) + np.float32(cls * MAX_WH)).tolist()
+        candidates.append((score, cls, box, shifted))
+    candidates.sort(key=lambda c: -c[0])
+
+    def overlap(a, b):
+        inter = max(0.0, min(a[2], b[2]) - max(a[0], b[0])) * max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+        union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+        return inter / union if union > 0 else 0.0
+
+    kept = []
+    for score, cls, box, shifted in candidates:
+        if all(k[1] != cls or overlap(k[3], shifted) <= iou for k in kept):
+            kept.append((score, cls, box, shifted))
+    rows = [box + [score, cls] for score, cls, box, _ in kept[:max_det]]
+    return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+
+def timed(decode: Callable, outputs: List[np.ndarray], repeats: int, *args) -> Tuple[List[np.ndarray], float]:
+    """Decoded results for every output and the median milliseconds per frame"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = [decode(output, *args) for output in outputs]
+        timings.append((time.perf_counter() - start) * 1000 / len(outputs))
+    return results, statistics.median(timings)
+
+
+def same_detections(a: np.ndarray, b: np.ndarray) -> bool:
+    """Same boxes in the same order, within float32 rounding"""
+    return a.shape == b.shape and (not a.size or (
+        np.array_equal(a[:, 5], b[:, 5]) and
+        np.allclose(a[:, :4], b[:, :4], rtol=0, atol=BOX_TOLERANCE) and
+        np.allclose(a[:, 4], b[:, 4], rtol=0, atol=SCORE_TOLERANCE)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark vectorized post-processing against Ultralytics')
+    parser.add_argument('--model', help='ONNX or OpenVINO export to take raw outputs from')
+    parser.add_argument('--images', nargs='*', default=[], help='Images or directories to run the model on')
+    parser.add_argument('--frames', type=int, default=20, help='Synthetic frames when no model is given')
+    parser.add_argument('--classes', type=int, default=80, help='Classes in synthetic outputs')
+    parser.add_argument('--objects', type=int, default=20, help='Objects per synthetic frame')
+    parser.add_argument('--confidence', type=float, default=0.25)
+    parser.add_argument('--iou', type=float, default=DEFAULT_IOU_THRESHOLD)
+    parser.add_argument('--max-det', type=int, default=DEFAULT_MAX_DETECTIONS)
+    parser.add_argument('--filter', type=int, nargs='*', help='Keep only these class ids')
+    parser.add_argument('--classes-only', action='store_true',
+                        help='Keep only classes in the detector class_mapping (needs --model)')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    classes = args.filter
+    if args.model:
+        image_paths = []
+        for path in args.images:
+            if os.path.isdir(path):
+                image_paths.extend(sorted(os.path.join(path, f) for f in os.listdir(path)
+                                          if f.lower().endswith(IMAGE_EXTENSIONS)))
+            else:
+                image_paths.append(path)
+        if not image_paths:
+            parser.error("--model needs --images to run on")
+        from detector import YOLODetector  # Loads the export through the same path as the server
+        detector = YOLODetector(args.model)
+        if not isinstance(detector.model, ExportedModel):
+            parser.error(f"{args.model} is not an export that can run directly (is its runtime installed?)")
+        outputs = model_outputs(detector, image_paths)
+        if args.classes_only:
+            classes = detector.class_ids(detector.class_mapping.values())
+    else:
+        if args.classes_only:
+            parser.error("--classes-only needs --model")
+        outputs = synthetic_outputs(args.frames, args.classes, objects=args.objects)
+    if not outputs:
+        parser.error("No outputs to benchmark")
+
+    params = (args.confidence, args.iou, classes, args.max_det)
+    vectorized, vectorized_ms = timed(
+        lambda output, conf, iou, cls, max_det: decode_predictions(output, conf, iou, cls, max_det)[0],
+        outputs, args.repeats, *params)
+    if non_max_suppression is not None:
+        baseline_name, baseline = 'ultralytics', ultralytics_decode
+    else:
+        baseline_name, baseline = 'python reference', reference_decode
+        logger.info("PyTorch/Ultralytics not installed; comparing against the plain Python reference")
+    expected, baseline_ms = timed(baseline, outputs, 1 if baseline is reference_decode else args.repeats, *params)
+
+    mismatched = [i for i, (a, b) in enumerate(zip(vectorized, expected)) if not same_detections(a, b)]
+    boxes = sum(len(r) for r in vectorized)
+    logger.info(f"{len(outputs)} frame(s), {outputs[0].shape[1] - 4} classes, {outputs[0].shape[2]} anchors, "
+                f"{boxes} detections")
+    logger.info(f"  vectorized        {vectorized_ms:8.3f} ms/frame")
+    logger.info(f"  {baseline_name:<17} {baseline_ms:8.3f} ms/frame ({baseline_ms / max(vectorized_ms, 1e-9):.1f}x)")
+    if mismatched:
+        logger.error(f"❌ {len(mismatched)} frame(s) differ from {baseline_name}: {mismatched[:10]}")
+        return 1
+    logger.info(f"✅ Identical detections to {baseline_name} on every frame")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,732 @@
+#!/usr/bin/env python3
+"""
+Camera Affinity Router
+Spreads cameras over several detection nodes by consistent hashing and aggregates their health
+
+    RAKSHAK_NODES=http://127.0.0.1:5001,http://127.0.0.1:5002 \\
+    RAKSHAK_MESSAGE_QUEUE=redis://localhost:6379/0 python camera_router.py
+
+Every frame of a camera goes to the same node, so per-camera state (tracks,
+deltas, clip pre-roll, scheduler queues) stays on one node. When a node fails
+its health checks only the cameras it owned move to the next node on the
+ring.
+
+State that is not about one camera is kept the same on every node: admin
+writes are applied on all of them (and replayed on a node that comes back),
+soldier position changes made on the primary node are mirrored to the others,
+and every dashboard connected here is registered on every node so SOS
+delivery, compact payloads and viewport pushes can address it. Event, clip
+and threat queries are merged across nodes.
+"""
+
+# Imported first: patches the standard library when serving with eventlet/gevent
+import serving
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+from flask_socketio import SocketIO, emit, join_room, leave_room
+
+from location_service import parse_bbox
+from serving import run_server
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NODES = [n.strip().rstrip('/') for n in os.environ.get('RAKSHAK_NODES', 'http://127.0.0.1:5001').split(',') if n.strip()]
+VIRTUAL_NODES = 100
+HEALTH_INTERVAL = float(os.environ.get('RAKSHAK_HEALTH_INTERVAL', '2.0'))
+FAILURE_THRESHOLD = 2          # Consecutive failed checks before a node is taken off the ring
+REQUEST_TIMEOUT = 30.0
+
+ADMIN_TOKEN = os.environ.get('RAKSHAK_ADMIN_TOKEN')
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1', 'localhost')
+SUMMARY_INTERVAL = float(os.environ.get('RAKSHAK_SUMMARY_INTERVAL', '1.0'))
+
+# Socket.IO rooms and replica header; same names as in yolo_detection
+JSON_ROOM = 'format:json'
+COMPACT_ROOM = 'format:compact'
+DELTA_ROOM = 'mode:delta'
+REPLICA_HEADER = 'X-Rakshak-Replica'
+
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes; lookups skip nodes marked down"""
+
+    def __init__(self, nodes: List[str], virtual_nodes: int = VIRTUAL_NODES):
+        self.nodes = list(nodes)
+        self._points: List[Tuple[int, str]] = sorted(
+            (ring_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(virtual_nodes)
+        )
+        self._keys = [point for point, _ in self._points]
+
+    def lookup(self, key: str, healthy: Optional[set] = None) -> Optional[str]:
+        if not self._points:
+            return None
+        start = bisect.bisect(self._keys, ring_hash(key))
+        for offset in range(len(self._points)):
+            node = self._points[(start + offset) % len(self._points)][1]
+            if healthy is None or node in healthy:
+                return node
+        return None
+
+
+class NodeMonitor:
+    """Polls each node's /health and tracks which nodes are on the ring"""
+
+    def __init__(self, nodes: List[str], on_change=None, on_recover=None):
+        self.ring = HashRing(nodes)
+        self.on_change = on_change
+        self.on_recover = on_recover
+        self.status: Dict[str, Dict] = {
+            node: {'healthy': True, 'failures': 0, 'last_check': None, 'health': None} for node in nodes
+        }
+        self.assignments: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def healthy_nodes(self) -> set:
+        return {node for node, status in self.status.items() if status['healthy']}
+
+    def node_for(self, camera_id: str) -> Optional[str]:
+        node = self.ring.lookup(camera_id, self.healthy_nodes())
+        if node is not None:
+            with self._lock:
+                self.assignments[camera_id] = node
+        return node
+
+    def primary(self) -> Optional[str]:
+        """First healthy node in configured order; owns state not tied to a camera"""
+        return next((node for node in self.ring.nodes if self.status[node]['healthy']), None)
+
+    def mark(self, node: str, ok: bool, health: Optional[Dict] = None, immediate: bool = False):
+        """Record a health check; ``immediate`` takes a failing node down without waiting"""
+        with self._lock:
+            status = self.status[node]
+            status['last_check'] = time.time()
+            was_healthy = status['healthy']
+            if ok:
+                status['failures'] = 0
+                status['healthy'] = True
+                status['health'] = health
+            else:
+                status['failures'] += 1
+                if immediate or status['failures'] >= FAILURE_THRESHOLD:
+                    status['healthy'] = False
+            changed = was_healthy != status['healthy']
+        if changed:
+            logger.warning(f"{'✅' if status['healthy'] else '❌'} Node {node} is "
+                           f"{'back' if status['healthy'] else 'down'}, rebalancing cameras")
+            self.rebalance()
+            if status['healthy'] and self.on_recover is not None:
+                self.on_recover(node)
+
+    def rebalance(self) -> Dict[str, str]:
+        """Reassign known cameras after the set of healthy nodes changed"""
+        healthy = self.healthy_nodes()
+        with self._lock:
+            moved = {}
+            for camera_id, node in self.assignments.items():
+                new_node = self.ring.lookup(camera_id, healthy)
+                if new_node is not None and new_node != node:
+                    moved[camera_id] = new_node
+            self.assignments.update(moved)
+        if moved and self.on_change is not None:
+            self.on_change(moved)
+        return moved
+
+    def check_all(self):
+        for node in self.ring.nodes:
+            try:
+                with urllib.request.urlopen(f"{node}/health", timeout=HEALTH_INTERVAL) as response:
+                    self.mark(node, True, json.loads(response.read()))
+            except (urllib.error.URLError, OSError, ValueError):
+                self.mark(node, False)
+
+    def run(self):
+        while True:
+            self.check_all()
+            socketio.sleep(HEALTH_INTERVAL)
+
+
+app = Flask(__name__)
+CORS(app)
+socketio = SocketIO(app, cors_allowed_origins="*", **serving.socketio_options())
+
+# Dashboards connected to this router: sid -> {'format', 'viewport'}, registered on every node
+clients: Dict[str, Dict] = {}
+
+# Last accepted write to each admin endpoint, replayed on a node that was down when it was made
+admin_writes: 'OrderedDict[str, Tuple[str, bytes, Dict]]' = OrderedDict()
+summary_task_started = threading.Event()
+
+
+def fetch_json(node: str, path: str) -> Optional[Dict]:
+    headers = {'X-Admin-Token': request.headers['X-Admin-Token']} if 'X-Admin-Token' in request.headers else {}
+    try:
+        with urllib.request.urlopen(urllib.request.Request(f"{node}{path}", headers=headers),
+                                    timeout=REQUEST_TIMEOUT) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        logger.warning(f"Could not fetch {path} from {node}: {e}")
+        return None
+
+
+def call_node(node: str, path: str, method: str = 'GET', payload=None,
+              replica: bool = False) -> Tuple[Optional[int], Optional[Dict]]:
+    """Router-initiated JSON request, authenticated with the router's own admin token
+
+    Returns ``(status, body)``; both are None when the node could not be reached.
+    """
+    headers = {'Content-Type': 'application/json'}
+    if ADMIN_TOKEN:
+        headers['X-Admin-Token'] = ADMIN_TOKEN
+    if replica:
+        headers[REPLICA_HEADER] = '1'
+    data = json.dumps(payload).encode() if payload is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(f"{node}{path}", data=data, headers=headers, method=method),
+                                    timeout=REQUEST_TIMEOUT) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            return e.code, json.loads(e.read())
+        except ValueError:
+            return e.code, None
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        logger.warning(f"{method} {path} on {node} failed: {e}")
+        return None, None
+
+
+def relay(node: str, method: str, path: str, body: Optional[bytes] = None,
+          headers: Optional[Dict] = None) -> Response:
+    """Send a request to a node and relay its response; connection errors are raised"""
+    upstream = urllib.request.Request(f"{node}{path}", data=body or None, headers=headers or {}, method=method)
+    try:
+        with urllib.request.urlopen(upstream, timeout=REQUEST_TIMEOUT) as response:
+            body, status, content_type = response.read(), response.status, response.headers.get('Content-Type')
+    except urllib.error.HTTPError as e:
+        body, status, content_type = e.read(), e.code, e.headers.get('Content-Type')
+    return Response(body, status=status, content_type=content_type, headers={'X-Rakshak-Node': node})
+
+
+def forward(node: str) -> Response:
+    """Replay the current request against a node and relay its response"""
+    headers = {k: v for k, v in request.headers.items() if k.lower() in ('content-type', 'x-admin-token', 'accept')}
+    return relay(node, request.method, request.full_path if request.query_string else request.path,
+                 request.get_data(), headers)
+
+
+def no_nodes() -> Response:
+    response = jsonify({'error': 'No healthy detection nodes available'})
+    response.status_code = 503
+    return response
+
+
+def forward_with_failover(pick) -> Response:
+    """Forward to ``pick()``; on a connection error take that node down and retry once"""
+    for _ in range(2):
+        node = pick()
+        if node is None:
+            break
+        try:
+            return forward(node)
+        except (urllib.error.URLError, OSError) as e:
+            logger.error(f"Node {node} unreachable: {e}")
+            monitor.mark(node, False, immediate=True)
+    return no_nodes()
+
+
+def fan_out() -> Response:
+    """Apply an admin write on every healthy node, primary first
+
+    The primary's response is relayed when every node answered alike;
+    otherwise a 502 lists each node's status so the write can be retried.
+    """
+    primary = monitor.primary()
+    statuses, response = {}, None
+    for node in ([primary] if primary else []) + sorted(monitor.healthy_nodes() - {primary}):
+        try:
+            node_response = forward(node)
+        except (urllib.error.URLError, OSError) as e:
+            logger.error(f"Node {node} unreachable: {e}")
+            monitor.mark(node, False, immediate=True)
+            continue
+        statuses[node] = node_response.status_code
+        if response is None:
+            response = node_response
+    if response is None:
+        return no_nodes()
+
+    if response.status_code < 400:
+        headers = {k: v for k, v in request.headers.items() if k.lower() in ('content-type', 'x-admin-token')}
+        admin_writes[request.path] = (request.method, request.get_data(), headers)
+        admin_writes.move_to_end(request.path)
+    if len(set(statuses.values())) > 1:
+        return jsonify({'error': 'Nodes disagreed on the change', 'nodes': statuses}), 502
+    return response
+
+
+def gather():
+    """Run the current GET on every healthy node; returns ``(bodies, error_response)``"""
+    results = []
+    for node in sorted(monitor.healthy_nodes()):
+        try:
+            response = forward(node)
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning(f"Could not fetch {request.path} from {node}: {e}")
+            continue
+        if response.status_code >= 400:
+            return results, response
+        results.append(response.get_json())
+    return results, None
+
+
+def mirror_soldier_updates(updates: List[Dict], source: Optional[str]):
+    """Copy soldier changes already applied on ``source`` to every other node"""
+    for node in sorted(monitor.healthy_nodes() - {source}):
+        call_node(node, '/api/soldiers/locations', 'POST', {'soldiers': updates}, replica=True)
+
+
+def mirror_sos_status(alert: Dict, source: Optional[str]):
+    if alert.get('position') is not None:
+        mirror_soldier_updates([{'id': alert['soldier_id'], 'position': alert['position'], 'status': 'sos'}], source)
+
+
+def sync_client(sid: str, nodes: Optional[List[str]] = None):
+    """Register (or, once disconnected, remove) a dashboard on the nodes"""
+    path = f"/cluster/clients/{urllib.parse.quote(sid, safe='')}"
+    for node in nodes or sorted(monitor.healthy_nodes()):
+        if sid in clients:
+            call_node(node, path, 'PUT', clients[sid])
+        else:
+            call_node(node, path, 'DELETE')
+
+
+def resync_node(node: str):
+    """Bring a node that was down back in line: admin settings, soldier positions, dashboards"""
+    for path, (method, body, headers) in list(admin_writes.items()):
+        try:
+            response = relay(node, method, path, body, headers)
+        except (urllib.error.URLError, OSError) as e:
+            logger.error(f"Could not replay {method} {path} on {node}: {e}")
+            return
+        if response.status_code >= 400:
+            logger.warning(f"Replaying {method} {path} on {node} returned {response.status_code}")
+
+    source = next((n for n in sorted(monitor.healthy_nodes()) if n != node), None)
+    if source is not None:
+        _, result = call_node(source, '/api/soldiers/locations')
+        soldiers = [{**s, 'timestamp': s['lastUpdate'] / 1000} for s in (result or {}).get('soldiers', [])]
+        if soldiers:
+            call_node(node, '/api/soldiers/locations', 'POST', {'soldiers': soldiers}, replica=True)
+
+    for sid in list(clients):
+        sync_client(sid, [node])
+    logger.info(f"🔄 Resynced node {node}")
+
+
+def summarize_nodes(window: int = 60) -> Dict:
+    """Detection counters summed across nodes"""
+    current, totals, cameras = {}, {}, {}
+    for node in sorted(monitor.healthy_nodes()):
+        _, summary = call_node(node, f'/stats/summary?window={window}')
+        if not summary:
+            continue
+        for key, value in summary.get('current', {}).items():
+            current[key] = current.get(key, 0) + value
+        for key, value in summary.get('window_totals', {}).items():
+            totals[key] = totals.get(key, 0) + value
+        cameras.update(summary.get('cameras', {}))
+        # Nodes clamp the window to what their rings hold
+        window = min(window, summary.get('window_seconds', window))
+    return {'window_seconds': window, 'current': current, 'window_totals': totals, 'cameras': cameras,
+            'timestamp': time.time()}
+
+
+def summary_broadcast_loop():
+    """Push cluster-wide counters; each node alone only knows its own cameras"""
+    while True:
+        socketio.sleep(SUMMARY_INTERVAL)
+        summary = summarize_nodes()
+        if summary['cameras']:
+            socketio.emit('detection_summary', summary)
+
+
+monitor = NodeMonitor(NODES, on_change=lambda moved: socketio.emit(
+    'cluster_rebalanced', {'moved': moved, 'timestamp': time.time()}), on_recover=resync_node)
+
+
+@socketio.on('connect')
+def handle_connect():
+    """Dashboards receive broadcasts from every node through the shared message queue"""
+    join_room(JSON_ROOM)
+    clients[request.sid] = {'format': 'json', 'mode': 'full', 'viewport': None}
+    sync_client(request.sid)
+    if not summary_task_started.is_set():
+        summary_task_started.set()
+        socketio.start_background_task(summary_broadcast_loop)
+    model_loaded = any((monitor.status[n]['health'] or {}).get('model_loaded') for n in monitor.healthy_nodes())
+    emit('status', {'message': 'Connected to YOLO Detection Server', 'model_loaded': model_loaded})
+
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    clients.pop(request.sid, None)
+    sync_client(request.sid)
+
+
+def join_update_rooms(client: Dict):
+    """Put the current dashboard in exactly one detection_update room, delta winning over format"""
+    if client['mode'] == 'delta':
+        wanted = DELTA_ROOM
+    else:
+        wanted = COMPACT_ROOM if client['format'] == 'compact' else JSON_ROOM
+    for room in (JSON_ROOM, COMPACT_ROOM, DELTA_ROOM):
+        if room == wanted:
+            join_room(room)
+        else:
+            leave_room(room)
+
+
+@socketio.on('set_payload_format')
+def handle_set_payload_format(data):
+    """Switch between JSON and compact payloads; the class dictionary comes from the primary node"""
+    payload_format = (data or {}).get('format', 'json')
+    dictionary, primary = None, monitor.primary()
+    if payload_format == 'compact' and primary is not None:
+        _, dictionary = call_node(primary, '/payload/dictionary')
+    if dictionary and dictionary.pop('compact_available', False):
+        emit('class_dictionary', dictionary)
+    else:
+        payload_format = 'json'
+    clients[request.sid]['format'] = payload_format
+    join_update_rooms(clients[request.sid])
+    sync_client(request.sid)
+    emit('payload_format', {'format': payload_format})
+
+
+@socketio.on('set_update_mode')
+def handle_set_update_mode(data):
+    """Switch between full and delta updates; keyframes come from every node"""
+    mode = (data or {}).get('mode', 'full')
+    if mode != 'delta':
+        mode = 'full'
+    clients[request.sid]['mode'] = mode
+    join_update_rooms(clients[request.sid])
+    sync_client(request.sid)
+    if mode == 'delta':
+        for node in sorted(monitor.healthy_nodes()):
+            _, result = call_node(node, '/stream/keyframes')
+            for keyframe in (result or {}).get('keyframes', []):
+                emit('detection_update', keyframe)
+    emit('update_mode', {'mode': mode})
+
+
+@socketio.on('request_keyframe')
+def handle_request_keyframe(data):
+    """Resend one camera's full state from the node that owns it"""
+    camera_id = str((data or {}).get('camera_id', 'unknown'))
+    node = monitor.ring.lookup(camera_id, monitor.healthy_nodes())
+    if node is None:
+        return
+    _, result = call_node(node, f"/stream/keyframes?camera_id={urllib.parse.quote(camera_id, safe='')}")
+    for keyframe in (result or {}).get('keyframes', []):
+        emit('detection_update', keyframe)
+
+
+@socketio.on('location_update')
+def handle_location_update(data):
+    """Bulk position updates, applied on the primary node and mirrored to the others"""
+    updates = data.get('soldiers', [data]) if isinstance(data, dict) else list(data or [])
+    primary = monitor.primary()
+    status, result = call_node(primary, '/api/soldiers/locations', 'POST', {'soldiers': updates}) \
+        if primary else (None, None)
+    if status != 200:
+        return {'updated': 0, 'errors': [(result or {}).get('error', 'No healthy detection nodes available')]}
+    if result['updated']:
+        mirror_soldier_updates(updates, primary)
+    return {'updated': result['updated'], 'errors': result['errors']}
+
+
+@socketio.on('sos')
+def handle_sos(data):
+    """SOS from a field device, dispatched by the primary node; the return value is the ack"""
+    primary = monitor.primary()
+    status, result = call_node(primary, '/api/sos', 'POST', data or {}) if primary else (None, None)
+    if status != 202:
+        return {'success': False, 'error': (result or {}).get('error', 'No healthy detection nodes available')}
+    mirror_sos_status(result['sos'], primary)
+    return {'success': True, 'id': result['sos']['id']}
+
+
+@socketio.on('sos_ack')
+def handle_sos_ack(data):
+    """Dashboard confirmation of an sos_alert, passed to the primary node that sent it"""
+    primary = monitor.primary()
+    if primary is None:
+        return {'acknowledged': False}
+    _, result = call_node(primary, f"/cluster/clients/{urllib.parse.quote(request.sid, safe='')}/sos_ack",
+                          'POST', data or {})
+    return {'acknowledged': bool(result and result.get('acknowledged'))}
+
+
+@socketio.on('subscribe_viewport')
+def handle_subscribe_viewport(data):
+    """Only push soldier updates inside this client's map bounds; the primary node pushes them"""
+    try:
+        bbox = (data or {}).get('bbox')
+        bbox = parse_bbox(bbox) if isinstance(bbox, str) else tuple(float(v) for v in bbox)
+        if len(bbox) != 4:
+            raise ValueError("bbox must be 'south,west,north,east'")
+    except (TypeError, ValueError) as e:
+        emit('error', {'message': f'Invalid viewport: {e}'})
+        return
+    clients[request.sid]['viewport'] = list(bbox)
+    sync_client(request.sid)
+    primary = monitor.primary()
+    _, result = call_node(primary, '/api/soldiers/locations?bbox=' + ','.join(map(str, bbox))) \
+        if primary else (None, None)
+    emit('soldier_locations', {'soldiers': (result or {}).get('soldiers', []), 'partial': False,
+                               'timestamp': time.time()})
+
+
+@app.before_request
+def check_admin_origin():
+    """Nodes see forwarded requests as coming from the router, so without a token it applies their host check"""
+    if request.path.startswith('/admin/') and not ADMIN_TOKEN and request.remote_addr not in LOOPBACK_ADDRESSES:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+
+@app.before_request
+def refuse_node_local():
+    """Node endpoints meant for the node's own host or for the router itself are never forwarded
+
+    Forwarded requests reach a node from the router's address, so passing on
+    ``/local/*`` (shared-memory cameras) or ``/cluster/*`` (router to node
+    calls) would get past the node's loopback check.
+    """
+    if request.path.startswith(('/local/', '/cluster/')):
+        return jsonify({'error': 'Not available through the camera router'}), 403
+
+
+@app.route('/health', methods=['GET'])
+def cluster_health():
+    """Health of every node plus the router's view of the ring"""
+    nodes = {}
+    for node, status in monitor.status.items():
+        health = status['health'] or {}
+        nodes[node] = {
+            'healthy': status['healthy'],
+            'failures': status['failures'],
+            'last_check': status['last_check'],
+            'model_loaded': health.get('model_loaded', False),
+            'cameras': sorted(c for c, n in monitor.assignments.items() if n == node)
+        }
+    healthy = [n for n in nodes.values() if n['healthy']]
+    primary = monitor.primary()
+    primary_health = (monitor.status[primary]['health'] or {}) if primary else {}
+    return jsonify({
+        'status': 'healthy' if healthy else 'unavailable',
+        'model_loaded': any(n['model_loaded'] for n in healthy),
+        'router': True,
+        'primary': primary,
+        'nodes': nodes,
+        'model_info': primary_health.get('model_info'),
+        'api_endpoints': primary_health.get('api_endpoints', []) + ['/cluster'],
+        'timestamp': time.time()
+    }), 200 if healthy else 503
+
+
+@app.route('/cluster', methods=['GET'])
+def cluster_assignments():
+    """Camera to node assignments"""
+    return jsonify({'nodes': NODES, 'healthy': sorted(monitor.healthy_nodes()), 'primary': monitor.primary(),
+                    'assignments': dict(monitor.assignments), 'clients': len(clients), 'timestamp': time.time()})
+
+
+@app.route('/stats/summary', methods=['GET'])
+def cluster_summary():
+    """Detection counters summed across nodes"""
+    try:
+        window = int(request.args.get('window', 60))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(summarize_nodes(window))
+
+
+@app.route('/stats/scheduler', methods=['GET'])
+def cluster_scheduler():
+    """Per-camera scheduler stats from every node, tagged with the node serving them"""
+    workers, busy, cameras = 0, 0, {}
+    for node in sorted(monitor.healthy_nodes()):
+        stats = fetch_json(node, '/stats/scheduler')
+        if not stats:
+            continue
+        workers += stats.get('workers', 0)
+        busy += stats.get('busy', 0)
+        for camera_id, camera in stats.get('cameras', {}).items():
+            if camera.get('served') or camera.get('queued') or camera_id not in cameras:
+                cameras[camera_id] = {**camera, 'node': node}
+    return jsonify({'workers': workers, 'busy': busy, 'cameras': cameras, 'timestamp': time.time()})
+
+
+@app.route('/events/detections', methods=['GET'])
+@app.route('/events/alerts', methods=['GET'])
+def cluster_events():
+    """Stored detections or alerts from every node, newest first"""
+    try:
+        limit = int(request.args.get('limit', 1000))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    results, error = gather()
+    if error is not None:
+        return error
+    key = 'events' if request.path == '/events/detections' else 'alerts'
+    rows = sorted((row for result in results for row in result.get(key, [])),
+                  key=lambda row: row['ts'], reverse=True)[:limit]
+    return jsonify({key: rows, 'count': len(rows), 'timestamp': time.time()})
+
+
+@app.route('/events/counts', methods=['GET'])
+def cluster_event_counts():
+    """Per-interval detection counts summed across nodes"""
+    results, error = gather()
+    if error is not None:
+        return error
+    totals = {}
+    for result in results:
+        for bucket in result.get('buckets', []):
+            key = (bucket['bucket'], bucket['type'])
+            totals[key] = totals.get(key, 0) + bucket['count']
+    buckets = [{'bucket': bucket, 'type': kind, 'count': count} for (bucket, kind), count in sorted(totals.items())]
+    return jsonify({'buckets': buckets, 'timestamp': time.time()})
+
+
+@app.route('/clips', methods=['GET'])
+def cluster_clips():
+    """Recorded threat clips from every node, newest first"""
+    results, error = gather()
+    if error is not None:
+        return error
+    clips = sorted((clip for result in results for clip in result.get('clips', [])),
+                   key=lambda clip: clip['triggered_at'], reverse=True)
+    return jsonify({'clips': clips, 'timestamp': time.time()})
+
+
+@app.route('/clips/<clip_id>', methods=['GET'])
+def route_clip(clip_id):
+    """A clip is stored on the node that recorded it"""
+    for node in sorted(monitor.healthy_nodes()):
+        try:
+            response = forward(node)
+        except (urllib.error.URLError, OSError):
+            continue
+        if response.status_code != 404:
+            return response
+    return jsonify({'error': 'Clip not found or still recording'}), 404
+
+
+def cluster_threats(bbox: Optional[str]) -> List[Dict]:
+    """Active geo-tagged threats from every node; each threat lives on its camera's node"""
+    path = '/api/threats/locations' + (f'?bbox={bbox}' if bbox else '')
+    threats = []
+    for node in sorted(monitor.healthy_nodes()):
+        _, result = call_node(node, path)
+        threats.extend((result or {}).get('threats', []))
+    return threats
+
+
+@app.route('/api/threats/locations', methods=['GET'])
+def threat_locations():
+    """Active geo-tagged threats across the cluster"""
+    bbox = request.args.get('bbox')
+    try:
+        if bbox:
+            parse_bbox(bbox)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    threats = cluster_threats(bbox)
+    return jsonify({'threats': threats, 'count': len(threats), 'timestamp': time.time()})
+
+
+@app.route('/api/soldiers/locations', methods=['GET', 'POST'])
+def soldier_locations():
+    """Soldier positions live on the primary node and are mirrored to the others"""
+    response = forward_with_failover(monitor.primary)
+    if response.status_code != 200:
+        return response
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        updates = data.get('soldiers', [data]) if isinstance(data, dict) else data
+        if response.get_json().get('updated'):
+            mirror_soldier_updates(updates, response.headers.get('X-Rakshak-Node'))
+        return response
+
+    result = response.get_json()
+    result['threats'] = cluster_threats(request.args.get('bbox'))
+    return jsonify(result)
+
+
+@app.route('/api/sos', methods=['POST'])
+def route_sos():
+    """SOS is dispatched by the primary node; the soldier's SOS status is mirrored to the others"""
+    response = forward_with_failover(monitor.primary)
+    if response.status_code == 202:
+        mirror_sos_status(response.get_json()['sos'], response.headers.get('X-Rakshak-Node'))
+    return response
+
+
+@app.route('/api/sos/<sos_id>/resolve', methods=['POST'])
+def route_sos_resolve(sos_id):
+    response = forward_with_failover(monitor.primary)
+    alert = response.get_json()['sos'] if response.status_code == 200 else None
+    if alert and alert['position'] is not None and alert['status'] == 'resolved':
+        mirror_soldier_updates([{'id': alert['soldier_id'], 'status': 'active'}],
+                               response.headers.get('X-Rakshak-Node'))
+    return response
+
+
+@app.route('/admin/<path:path>', methods=['POST', 'PUT', 'DELETE'])
+def route_admin_write(path):
+    """Settings and model changes are applied on every node"""
+    return fan_out()
+
+
+@app.route('/detect', methods=['POST'])
+@app.route('/detect_with_visualization', methods=['POST'])
+def route_camera_request():
+    """Send a frame to the node that owns its camera"""
+    data = request.get_json(silent=True) or {}
+    camera_id = str(data.get('camera_id', 'unknown'))
+    return forward_with_failover(lambda: monitor.node_for(camera_id))
+
+
+@app.route('/', defaults={'path': ''}, methods=['GET', 'POST', 'PUT', 'DELETE'])
+@app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
+def route_primary(path):
+    """Reads of state kept the same on every node are served by the primary node"""
+    return forward_with_failover(monitor.primary)
+
+
+if __name__ == '__main__':
+    logger.info(f"Starting camera router for nodes: {', '.join(NODES)}")
+    monitor.check_all()
+    socketio.start_background_task(monitor.run)
+    run_server(app, socketio)
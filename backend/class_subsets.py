@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Class Subsets
+Per-camera lists of the classes a camera's model should evaluate
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUBSETS_PATH = os.environ.get('RAKSHAK_CLASS_SUBSETS', 'class_subsets.json')
+DEFAULT_SUBSET = os.environ.get('RAKSHAK_DEFAULT_CLASS_SUBSET', 'all')
+
+# Named subsets; entries are application types (see YOLODetector.class_mapping) or raw model class names
+SUBSET_PRESETS: Dict[str, Optional[List[str]]] = {
+    'all': None,
+    'targets': ['person', 'vehicle', 'drone', 'weapon'],
+    'weapon_watch': ['weapon', 'person'],
+    'perimeter': ['person', 'vehicle', 'drone'],
+    'airspace': ['drone']
+}
+
+
+def parse_subset(subset) -> Optional[List[str]]:
+    """Resolve a preset name or a list of names; None means every class"""
+    if subset is None:
+        return None
+    if isinstance(subset, str):
+        if subset not in SUBSET_PRESETS:
+            raise ValueError(f"Unknown class subset '{subset}', expected one of {sorted(SUBSET_PRESETS)} or a list")
+        return SUBSET_PRESETS[subset]
+    if not isinstance(subset, (list, tuple)) or not all(isinstance(name, str) and name for name in subset):
+        raise ValueError("A class subset must be a preset name or a list of class names")
+    return sorted({name.lower() for name in subset})
+
+
+def subset_from_args(values: Optional[List[str]]):
+    """Command-line form of a subset: one preset name, or several class names"""
+    if values and len(values) == 1 and values[0] in SUBSET_PRESETS:
+        return values[0]
+    return values
+
+
+def subset_class_ids(names: Dict[int, str], classes: Iterable[str], class_mapping: Dict[str, str]) -> List[int]:
+    """Model class ids whose name, or the application type it maps to, is in ``classes``"""
+    wanted = {name.lower() for name in classes}
+    return sorted(cls_id for cls_id, name in names.items()
+                  if name.lower() in wanted or class_mapping.get(name.lower()) in wanted)
+
+
+class ClassSubsets:
+    """Ordered ``camera`` glob rules choosing the class subset each camera is inferred with
+
+    The first matching rule wins, like model routes; cameras with no matching
+    rule use ``default``. Subsets are passed to inference and NMS, so classes
+    outside them are never scored into detections.
+    """
+
+    def __init__(self, path: str = DEFAULT_SUBSETS_PATH, default=DEFAULT_SUBSET):
+        self.path = path
+        self.default = default
+        self.rules: List[Dict] = []
+        self._lock = threading.Lock()
+        parse_subset(default)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                self.set_rules(data.get('rules', []), data.get('default', default), persist=False)
+            except Exception as e:
+                logger.warning(f"Could not read class subsets {path}: {e}")
+
+    def set_rules(self, rules: List[Dict], default=None, persist: bool = True):
+        """Replace the rules, e.g. ``[{"camera": "armory-*", "classes": "weapon_watch"}]``"""
+        parsed = []
+        for rule in rules:
+            if 'camera' not in rule or 'classes' not in rule:
+                raise ValueError("Each class subset rule needs a 'camera' pattern and 'classes'")
+            parse_subset(rule['classes'])
+            parsed.append({'camera': str(rule['camera']), 'classes': rule['classes']})
+        default = self.default if default is None else default
+        parse_subset(default)
+
+        with self._lock:
+            self.rules = parsed
+            self.default = default
+        if persist:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.settings(), f, indent=2)
+            os.replace(tmp_path, self.path)
+        logger.info(f"Class subsets updated: {parsed} (default {default})")
+
+    def subset_for(self, camera_id: str) -> Optional[List[str]]:
+        """Class names a camera is inferred with, or None for all classes"""
+        for rule in self.rules:
+            if fnmatch.fnmatch(str(camera_id), rule['camera']):
+                return parse_subset(rule['classes'])
+        return parse_subset(self.default)
+
+    def settings(self) -> Dict:
+        return {'default': self.default, 'rules': list(self.rules)}
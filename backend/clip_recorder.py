@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Event Clip Recorder
+Keeps a per-camera pre-roll ring of encoded frames and writes threat clips in the background
+"""
+
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from serving import run_blocking
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLIP_DIR = os.environ.get('RAKSHAK_CLIP_DIR', 'clips')
+DEFAULT_CLIP_FORMAT = os.environ.get('RAKSHAK_CLIP_FORMAT', 'mp4')  # 'mp4' or 'mjpeg'
+DEFAULT_PRE_ROLL = 10.0                 # Seconds kept before a trigger
+DEFAULT_POST_ROLL = 5.0                 # Seconds recorded after the last trigger
+DEFAULT_MAX_RING_BYTES = 32 * 1024 * 1024  # Per-camera cap on buffered JPEG bytes
+DEFAULT_MAX_CLIP_SECONDS = 120.0        # A longer threat is split into consecutive clips
+DEFAULT_MAX_CLIP_BYTES = 64 * 1024 * 1024  # Per-clip cap on JPEG bytes held until it is written
+DEFAULT_MAX_CLIPS = int(os.environ.get('RAKSHAK_MAX_CLIPS', '1000'))  # Finished clips kept in the index
+DEFAULT_TRIGGER_TYPES = ('weapon', 'drone')
+
+
+class FrameRing:
+    """Recent JPEG frames for one camera, bounded by age and total bytes
+
+    Frames are stored as the bytes objects the client uploaded, so buffering
+    costs a reference per frame rather than a copy or a re-encode.
+    """
+
+    def __init__(self, max_seconds: float, max_bytes: int):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.frames: Deque[Tuple[float, bytes]] = deque()
+        self.total_bytes = 0
+
+    def append(self, timestamp: float, jpeg: bytes):
+        self.frames.append((timestamp, jpeg))
+        self.total_bytes += len(jpeg)
+        while self.frames and (self.total_bytes > self.max_bytes
+                               or timestamp - self.frames[0][0] > self.max_seconds):
+            _, dropped = self.frames.popleft()
+            self.total_bytes -= len(dropped)
+
+    def snapshot(self) -> List[Tuple[float, bytes]]:
+        return list(self.frames)
+
+
+class ClipRecorder:
+    """Turns threat triggers into pre-roll + post-roll clips on disk
+
+    A trigger captures the camera's current ring and keeps collecting frames
+    until ``post_roll`` seconds pass without another trigger; the finished clip
+    is then encoded by a single background writer thread. A clip that reaches
+    ``max_clip_seconds`` or ``max_clip_bytes`` is finished and recording goes
+    on in a new clip (``continues`` links it to the previous one). Only the
+    newest ``max_clips`` finished clips stay listed; older files are left on disk.
+    """
+
+    def __init__(self, clip_dir: str = DEFAULT_CLIP_DIR, clip_format: str = DEFAULT_CLIP_FORMAT,
+                 pre_roll: float = DEFAULT_PRE_ROLL, post_roll: float = DEFAULT_POST_ROLL,
+                 max_ring_bytes: int = DEFAULT_MAX_RING_BYTES,
+                 max_clip_seconds: float = DEFAULT_MAX_CLIP_SECONDS,
+                 max_clip_bytes: int = DEFAULT_MAX_CLIP_BYTES, max_clips: int = DEFAULT_MAX_CLIPS,
+                 trigger_types=DEFAULT_TRIGGER_TYPES,
+                 on_clip_ready: Optional[Callable[[Dict], None]] = None):
+        self.clip_dir = clip_dir
+        self.clip_format = clip_format
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.max_ring_bytes = max_ring_bytes
+        self.max_clip_seconds = max_clip_seconds
+        self.max_clip_bytes = max_clip_bytes
+        self.max_clips = max_clips
+        self.trigger_types = set(trigger_types)
+        self.on_clip_ready = on_clip_ready
+        self._rings: Dict[str, FrameRing] = {}
+        self._active: Dict[str, Dict] = {}
+        self.clips: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        os.makedirs(self.clip_dir, exist_ok=True)
+        self._writer = threading.Thread(target=self._run_writer, name='clip-writer', daemon=True)
+        self._writer.start()
+
+    def add_frame(self, camera_id: str, jpeg: bytes, timestamp: Optional[float] = None):
+        """Buffer an encoded frame and feed any clip being recorded for the camera"""
+        timestamp = timestamp or time.time()
+        finished = None
+        with self._lock:
+            ring = self._rings.get(camera_id)
+            if ring is None:
+                ring = self._rings[camera_id] = FrameRing(self.pre_roll, self.max_ring_bytes)
+            ring.append(timestamp, jpeg)
+
+            clip = self._active.get(camera_id)
+            if clip is not None:
+                clip['frames'].append((timestamp, jpeg))
+                clip['bytes'] += len(jpeg)
+                if timestamp >= clip['record_until']:
+                    finished = self._active.pop(camera_id)
+                elif (clip['bytes'] >= self.max_clip_bytes
+                      or timestamp - clip['frames'][0][0] >= self.max_clip_seconds):
+                    # Still in a threat state: hand this part to the writer and keep recording
+                    finished = clip
+                    self._start_clip(camera_id, clip['reason'], timestamp, [], clip['record_until'],
+                                     continues=clip['id'])
+        if finished is not None:
+            self._queue.put(finished)
+
+    def should_trigger(self, detections: List[Dict]) -> bool:
+        return any(d['type'] in self.trigger_types for d in detections)
+
+    def trigger(self, camera_id: str, reason: str, timestamp: Optional[float] = None) -> Dict:
+        """Start (or extend) a clip for a camera and return its public info"""
+        timestamp = timestamp or time.time()
+        with self._lock:
+            clip = self._active.get(camera_id)
+            if clip is not None:
+                clip['record_until'] = timestamp + self.post_roll
+                return dict(self.clips[clip['id']])
+
+            ring = self._rings.get(camera_id)
+            clip = self._start_clip(camera_id, reason, timestamp, ring.snapshot() if ring else [],
+                                    timestamp + self.post_roll)
+            return dict(self.clips[clip['id']])
+
+    def _start_clip(self, camera_id: str, reason: str, timestamp: float, frames: List[Tuple[float, bytes]],
+                    record_until: float, continues: Optional[str] = None) -> Dict:
+        """Register a new active clip; must be called with ``self._lock`` held"""
+        clip_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(timestamp))}-{uuid.uuid4().hex[:8]}"
+        extension = 'mp4' if self.clip_format == 'mp4' else 'mjpeg'
+        clip = {
+            'id': clip_id,
+            'camera_id': camera_id,
+            'reason': reason,
+            'triggered_at': timestamp,
+            'record_until': record_until,
+            'frames': frames,
+            'bytes': sum(len(jpeg) for _, jpeg in frames),
+            'filename': f"{re.sub(r'[^A-Za-z0-9_-]', '_', str(camera_id))}_{clip_id}.{extension}",
+            'status': 'recording',
+            'continues': continues
+        }
+        self._active[camera_id] = clip
+        self.clips[clip_id] = self._public(clip)
+        self._prune_index()
+        logger.info(f"🎬 Recording clip {clip_id} for camera {camera_id} ({reason})"
+                    + (f", continuing {continues}" if continues else ''))
+        return clip
+
+    def _prune_index(self):
+        """Drop the oldest finished clips beyond ``max_clips``; must be called with ``self._lock`` held"""
+        excess = len(self.clips) - self.max_clips
+        for clip_id in list(self.clips):
+            if excess <= 0:
+                break
+            if self.clips[clip_id]['status'] in ('ready', 'failed'):
+                del self.clips[clip_id]
+                excess -= 1
+
+    def flush_stale(self, now: Optional[float] = None):
+        """Finish clips whose camera stopped sending frames before post-roll ended"""
+        now = now or time.time()
+        with self._lock:
+            stale = [camera for camera, clip in self._active.items() if now >= clip['record_until']]
+            finished = [self._active.pop(camera) for camera in stale]
+        for clip in finished:
+            self._queue.put(clip)
+
+    @staticmethod
+    def _public(clip: Dict) -> Dict:
+        return {
+            'id': clip['id'],
+            'camera_id': clip['camera_id'],
+            'reason': clip['reason'],
+            'triggered_at': clip['triggered_at'],
+            'filename': clip['filename'],
+            'url': f"/clips/{clip['id']}",
+            'status': clip['status'],
+            'continues': clip['continues']
+        }
+
+    def _run_writer(self):
+        while True:
+            try:
+                clip = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                self.flush_stale()
+                continue
+            try:
+                path = os.path.join(self.clip_dir, clip['filename'])
+                if self.clip_format == 'mp4':
+                    # Re-encoding is CPU-bound; keep it off the event loop in eventlet/gevent mode
+                    path = run_blocking(self._write_mp4, path, clip['frames'])
+                else:
+                    path = self._write_mjpeg(path, clip['frames'])
+                status = 'ready'
+            except Exception as e:
+                logger.error(f"Error writing clip {clip['id']}: {e}")
+                status = 'failed'
+
+            with self._lock:
+                info = self.clips[clip['id']]
+                info['status'] = status
+                if status == 'ready':
+                    info['filename'] = os.path.basename(path)
+                info['frames'] = len(clip['frames'])
+                if clip['frames']:
+                    info['start'] = clip['frames'][0][0]
+                    info['end'] = clip['frames'][-1][0]
+                self._prune_index()
+            logger.info(f"🎞️ Clip {clip['id']} {status} ({len(clip['frames'])} frames)")
+            if self.on_clip_ready is not None:
+                try:
+                    self.on_clip_ready(dict(info))
+                except Exception as e:
+                    logger.error(f"Error in clip callback: {e}")
+
+    @staticmethod
+    def _write_mjpeg(path: str, frames: List[Tuple[float, bytes]]) -> str:
+        """Concatenate the JPEGs as-is; playable as an MJPEG stream with no re-encode"""
+        with open(path, 'wb') as f:
+            for _, jpeg in frames:
+                f.write(jpeg)
+        return path
+
+    @classmethod
+    def _write_mp4(cls, path: str, frames: List[Tuple[float, bytes]]) -> str:
+        """Re-encode to MP4 at the observed frame rate, falling back to MJPEG"""
+        if not frames:
+            raise ValueError("No frames to write")
+        duration = frames[-1][0] - frames[0][0]
+        fps = max(1.0, (len(frames) - 1) / duration) if duration > 0 else 1.0
+
+        writer = None
+        try:
+            for _, jpeg in frames:
+                image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    continue
+                if writer is None:
+                    height, width = image.shape[:2]
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+                    if not writer.isOpened():
+                        raise RuntimeError("MP4 encoder unavailable")
+                elif image.shape[:2] != (height, width):
+                    image = cv2.resize(image, (width, height))
+                writer.write(image)
+        except RuntimeError:
+            logger.warning("MP4 encoding unavailable, writing MJPEG clip instead")
+            return cls._write_mjpeg(os.path.splitext(path)[0] + '.mjpeg', frames)
+        finally:
+            if writer is not None:
+                writer.release()
+        return path
+
+    def clip_path(self, clip_id: str) -> Optional[str]:
+        """Path of a finished clip, or None if unknown or still recording"""
+        info = self.clips.get(clip_id)
+        if info is None or info['status'] != 'ready':
+            return None
+        return os.path.join(self.clip_dir, info['filename'])
+
+    def list_clips(self, camera_id: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            clips = [dict(c) for c in self.clips.values() if not camera_id or c['camera_id'] == camera_id]
+        return sorted(clips, key=lambda c: c['triggered_at'], reverse=True)
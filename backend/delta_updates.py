@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Delta-Encoded Detection Updates
+Assigns stable identities to detections and emits only added, removed and moved objects
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEYFRAME_INTERVAL = 30   # Frames between full keyframes per camera
+DEFAULT_MOVE_THRESHOLD = 8       # Pixels an edge must shift before a move is reported
+DEFAULT_MATCH_IOU = 0.3          # Minimum overlap to treat two boxes as the same object
+DEFAULT_MAX_MISSED = 1           # Frames an object may vanish before it is removed
+
+
+def bbox_iou(a: Dict, b: Dict) -> float:
+    """Intersection over union of two ``{x, y, width, height}`` boxes"""
+    ix1, iy1 = max(a['x'], b['x']), max(a['y'], b['y'])
+    ix2 = min(a['x'] + a['width'], b['x'] + b['width'])
+    iy2 = min(a['y'] + a['height'], b['y'] + b['height'])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = a['width'] * a['height'] + b['width'] * b['height'] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def object_state(track_id: str, detection: Dict) -> Dict:
+    """The per-object fields carried by keyframes and deltas"""
+    return {
+        'id': track_id,
+        'type': detection['type'],
+        'original_class': detection.get('original_class', detection['type']),
+        'confidence': round(detection['confidence'], 3),
+        'bbox': dict(detection['bbox'])
+    }
+
+
+class CameraTracks:
+    """Tracked objects for one camera and the state last reported to clients"""
+
+    def __init__(self, camera_id: str):
+        self.camera_id = camera_id
+        self.next_id = 1
+        self.seq = 0
+        self.frames_since_keyframe = 0
+        self.tracks: Dict[str, Dict] = {}    # track_id -> {'bbox', 'type', 'missed'}
+        self.reported: Dict[str, Dict] = {}  # track_id -> last object_state sent
+
+
+class DeltaEncoder:
+    """Per-camera identity tracking and delta/keyframe generation
+
+    Detections are matched to existing tracks greedily by IoU within the same
+    type, and each matched detection gets a stable ``track_id``. Moves are
+    measured against the box last reported to clients, so slow drift is still
+    sent once it accumulates past the threshold.
+    """
+
+    def __init__(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+                 move_threshold: int = DEFAULT_MOVE_THRESHOLD,
+                 match_iou: float = DEFAULT_MATCH_IOU,
+                 max_missed: int = DEFAULT_MAX_MISSED):
+        self.keyframe_interval = keyframe_interval
+        self.move_threshold = move_threshold
+        self.match_iou = match_iou
+        self.max_missed = max_missed
+        self._cameras: Dict[str, CameraTracks] = {}
+        self._lock = threading.Lock()
+
+    def _camera(self, camera_id: str) -> CameraTracks:
+        camera = self._cameras.get(camera_id)
+        if camera is None:
+            camera = self._cameras[camera_id] = CameraTracks(camera_id)
+        return camera
+
+    def _match(self, camera: CameraTracks, detections: List[Dict]) -> List[str]:
+        """Assign a track id to every detection, creating tracks for new objects"""
+        pairs = []
+        for det_index, detection in enumerate(detections):
+            for track_id, track in camera.tracks.items():
+                if track['type'] != detection['type']:
+                    continue
+                iou = bbox_iou(track['bbox'], detection['bbox'])
+                if iou >= self.match_iou:
+                    pairs.append((iou, det_index, track_id))
+
+        assigned: List[Optional[str]] = [None] * len(detections)
+        used_tracks = set()
+        for _, det_index, track_id in sorted(pairs, reverse=True):
+            if assigned[det_index] is None and track_id not in used_tracks:
+                assigned[det_index] = track_id
+                used_tracks.add(track_id)
+
+        for det_index, detection in enumerate(detections):
+            track_id = assigned[det_index]
+            if track_id is None:
+                track_id = f"{camera.camera_id}:{camera.next_id}"
+                camera.next_id += 1
+                assigned[det_index] = track_id
+            camera.tracks[track_id] = {'bbox': detection['bbox'], 'type': detection['type'], 'missed': 0}
+            detection['track_id'] = track_id
+
+        # Age out tracks that were not seen this frame
+        seen = set(assigned)
+        for track_id in list(camera.tracks):
+            if track_id in seen:
+                continue
+            camera.tracks[track_id]['missed'] += 1
+            if camera.tracks[track_id]['missed'] > self.max_missed:
+                del camera.tracks[track_id]
+
+        return assigned
+
+    def _moved(self, old: Dict, new: Dict) -> bool:
+        return max(abs(old['x'] - new['x']), abs(old['y'] - new['y']),
+                   abs(old['x'] + old['width'] - new['x'] - new['width']),
+                   abs(old['y'] + old['height'] - new['y'] - new['height'])) >= self.move_threshold
+
+    def update(self, camera_id: str, detections: List[Dict]) -> Optional[Dict]:
+        """Track a frame's detections and return the delta (or keyframe) for clients
+
+        Detections are annotated in place with their ``track_id``. Returns
+        ``None`` when nothing changed enough to be worth sending; ``seq`` only
+        advances for updates that are returned, so ``base_seq`` gaps reveal
+        missed messages.
+        """
+        with self._lock:
+            camera = self._camera(camera_id)
+            track_ids = self._match(camera, detections)
+            camera.frames_since_keyframe += 1
+
+            current = {track_id: detection for track_id, detection in zip(track_ids, detections)}
+
+            # Objects that are only briefly missing stay in the reported state
+            for track_id in camera.reported:
+                if track_id not in current and track_id in camera.tracks:
+                    current[track_id] = None
+
+            if camera.frames_since_keyframe >= self.keyframe_interval:
+                return self._keyframe(camera, current)
+
+            added, moved = [], []
+            for track_id, detection in current.items():
+                if detection is None:
+                    continue
+                previous = camera.reported.get(track_id)
+                state = object_state(track_id, detection)
+                if previous is None:
+                    added.append(state)
+                    camera.reported[track_id] = state
+                elif self._moved(previous['bbox'], state['bbox']):
+                    moved.append({'id': track_id, 'bbox': state['bbox'], 'confidence': state['confidence']})
+                    camera.reported[track_id] = state
+
+            removed = [track_id for track_id in camera.reported if track_id not in current]
+            for track_id in removed:
+                del camera.reported[track_id]
+
+            if not (added or moved or removed):
+                return None
+
+            camera.seq += 1
+            return {
+                'camera_id': camera_id,
+                'seq': camera.seq,
+                'base_seq': camera.seq - 1,
+                'keyframe': False,
+                'added': added,
+                'moved': moved,
+                'removed': removed
+            }
+
+    def _keyframe(self, camera: CameraTracks, current: Dict[str, Optional[Dict]]) -> Dict:
+        camera.seq += 1
+        camera.frames_since_keyframe = 0
+        reported = {}
+        for track_id, detection in current.items():
+            reported[track_id] = object_state(track_id, detection) if detection else camera.reported[track_id]
+        camera.reported = reported
+        return self._keyframe_payload(camera)
+
+    def _keyframe_payload(self, camera: CameraTracks) -> Dict:
+        return {
+            'camera_id': camera.camera_id,
+            'seq': camera.seq,
+            'keyframe': True,
+            'objects': list(camera.reported.values())
+        }
+
+    def keyframe(self, camera_id: str) -> Optional[Dict]:
+        """Full current state for a camera, for late joiners and resyncs"""
+        with self._lock:
+            camera = self._cameras.get(camera_id)
+            return self._keyframe_payload(camera) if camera else None
+
+    def keyframes(self) -> List[Dict]:
+        """Full current state for every camera"""
+        with self._lock:
+            return [self._keyframe_payload(camera) for camera in self._cameras.values()]
@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+"""
+YOLO Detector
+Model loading, inference and class mapping shared by the API server and offline tools
+"""
+
+import base64
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+try:
+    import torch
+except ImportError:  # Without PyTorch the model gets letterboxed frames instead of tensors
+    torch = None
+
+from class_subsets import subset_class_ids
+from exported_runtime import ExportedModel, runtime_available
+from frame_buffers import POOL_ENABLED, frame_pool, letterbox, to_tensor
+from serving import native_lock
+from frame_stream import Prefetcher, batched
+from postprocess import DEFAULT_MAX_DETECTIONS, decode_predictions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMGSZ = 640
+DEFAULT_STRIDE = 32
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+# Resolved against this module, not the working directory, so every entry point loads the same files
+TRAINED_WEIGHTS = os.path.normpath(os.path.join(BACKEND_DIR, '..', 'yolo', 'runs', 'detect', 'detect3_resume2',
+                                                'weights', 'best.pt'))
+# Official weights are downloaded here once and reused
+DEFAULT_WEIGHTS = os.path.join(BACKEND_DIR, 'yolov8n.pt')
+THREAT_TYPES = ('person', 'drone', 'weapon')
+COUNT_KEYS = {'person': 'persons', 'vehicle': 'vehicles', 'drone': 'drones', 'weapon': 'weapons'}
+MAPPED_CLASSES_ONLY = os.environ.get('RAKSHAK_MAPPED_CLASSES_ONLY', '0') in ('1', 'true', 'yes')
+
+
+class YOLODetector:
+    # Defaults for cascade mode; any of these can be overridden in configure_cascade
+    DEFAULT_CASCADE_CONFIG = {
+        'screen_imgsz': 320,             # Input size for the screening model
+        'screen_confidence': 0.35,       # Any screen detection above this triggers stage 2
+        'candidate_confidence': 0.15,    # Lower trigger for high-severity classes
+        'high_severity_types': ['weapon', 'drone'],
+        'crop_regions': True,            # Confirm on crops instead of the full frame
+        'crop_padding': 0.25,            # Padding around candidates, fraction of box size
+        'min_crop_size': 96,             # Smallest crop side in pixels
+        'full_frame_area_ratio': 0.5     # Fall back to the full frame above this crop coverage
+    }
+
+    # Model class name -> application type, shared with offline tools
+    DEFAULT_CLASS_MAPPING = {
+        'person': 'person',
+        'car': 'vehicle', 'truck': 'vehicle', 'bus': 'vehicle', 
+        'motorcycle': 'vehicle', 'bicycle': 'vehicle',
+        'airplane': 'drone', 'aeroplane': 'drone',  # Map airplane to drone
+        'knife': 'weapon', 'scissors': 'weapon', 'gun': 'weapon', 
+        'pistol': 'weapon', 'weapon': 'weapon', 'rifle': 'weapon', 'firearm': 'weapon'
+    }
+    
+    def __init__(self, model_path: str = TRAINED_WEIGHTS):
+        """Initialize YOLO detector with the trained model"""
+        self.model_path = model_path
+        self.model = None
+        self._swap_lock = native_lock()
+        # Letterbox into preallocated buffers instead of letting the library allocate per frame
+        self.buffer_pool = frame_pool if POOL_ENABLED else None
+        # Cap for the direct post-processing path used by exported models
+        self.max_detections = DEFAULT_MAX_DETECTIONS
+        # Evaluate only classes in class_mapping when no subset is requested
+        self.mapped_classes_only = MAPPED_CLASSES_ONLY
+        self.load_model()
+        
+        # Two-stage cascade inference (disabled until configure_cascade is called)
+        self.screen_model = None
+        self.cascade_config = None
+        # Cascade frames run on several offload threads at once
+        self._cascade_stats_lock = native_lock()
+        self.cascade_stats = {
+            'frames': 0, 'screened_out': 0, 'crop_frames': 0, 'full_frames': 0,
+            'crops': 0, 'screen_time': 0.0, 'confirm_time': 0.0
+        }
+        
+        # Detection classes we're interested in - updated for custom trained model
+        self.target_classes = {
+            'person': 0,
+            'car': 2, 'truck': 7, 'bus': 5, 'motorcycle': 3, 'bicycle': 1,
+            'airplane': 4, 'aeroplane': 4,  # Will be mapped to 'drone'
+            'knife': 43, 'scissors': 76, 'gun': 28, 'pistol': 28,
+            'weapon': 28, 'rifle': 28, 'firearm': 28
+        }
+        
+        # Class mapping for our application
+        self.class_mapping = dict(self.DEFAULT_CLASS_MAPPING)
+    
+    def load_model(self):
+        """Load the YOLO model"""
+        try:
+            # Try to load custom trained model first
+            if os.path.exists(self.model_path):
+                logger.info(f"Loading custom YOLO model from: {self.model_path}")
+                self.model = self.load_network(self.model_path)
+                logger.info(f"✅ Custom trained YOLO model loaded successfully from {self.model_path}")
+                logger.info(f"Model classes: {list(self.model.names.values())}")
+            else:
+                # Fallback to default model
+                logger.warning(f"Custom model not found at {self.model_path}, using default yolov8n.pt")
+                self.model = YOLO(DEFAULT_WEIGHTS)
+                logger.info("✅ Default YOLO model loaded successfully")
+                logger.info(f"Model classes: {list(self.model.names.values())}")
+        except Exception as e:
+            logger.error(f"❌ Failed to load YOLO model: {e}")
+            # Try one more fallback
+            try:
+                logger.info("Attempting to load default yolov8n.pt model...")
+                self.model = YOLO(DEFAULT_WEIGHTS)
+                logger.info("✅ Default YOLO model loaded as fallback")
+                logger.info(f"Model classes: {list(self.model.names.values())}")
+            except Exception as fallback_error:
+                logger.error(f"❌ Fallback model loading also failed: {fallback_error}")
+                raise fallback_error
+    
+    def swap_model(self, model_path: str):
+        """Load new weights and atomically replace the active model
+
+        Requests already in flight keep the model reference they started with
+        and finish on the old weights; new requests pick up the new model.
+        """
+        with self._swap_lock:
+            logger.info(f"Hot-swapping YOLO model to: {model_path}")
+            new_model = self.load_network(model_path)
+            previous_path = self.model_path
+            self.model = new_model
+            self.model_path = model_path
+            logger.info(f"✅ Model swapped from {previous_path} to {model_path}")
+            logger.info(f"Model classes: {list(new_model.names.values())}")
+            return new_model
+    
+    @staticmethod
+    def load_network(model_path: str):
+        """Load weights with Ultralytics, or run ONNX/OpenVINO exports directly when their runtime is installed"""
+        if runtime_available(model_path):
+            return ExportedModel(model_path)
+        return YOLO(model_path)
+
+    def class_ids(self, classes: Optional[Sequence[str]], model=None) -> Optional[List[int]]:
+        """Model class ids for a subset of application types or raw class names
+
+        ``['weapon']`` selects every class mapped to weapon (knife, scissors,
+        gun, ...). None keeps all classes, unless ``mapped_classes_only``
+        limits them to those in ``class_mapping``.
+        """
+        if classes is None:
+            if not self.mapped_classes_only:
+                return None
+            classes = self.class_mapping.values()
+        return subset_class_ids((model or self.model).names, classes, self.class_mapping)
+    
+    def decode_base64(self, image_data: str) -> bytes:
+        """Strip any data URL prefix and return the encoded image bytes"""
+        # Remove data URL prefix if present
+        if ',' in image_data:
+            image_data = image_data.split(',')[1]
+        
+        return base64.b64decode(image_data)
+    
+    def preprocess_image(self, image_data) -> np.ndarray:
+        """Convert base64 image data (or already decoded image bytes) to OpenCV format"""
+        try:
+            # Decode base64 image
+            image_bytes = image_data if isinstance(image_data, bytes) else self.decode_base64(image_data)
+            nparr = np.frombuffer(image_bytes, np.uint8)
+            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            
+            if image is None:
+                raise ValueError("Failed to decode image")
+                
+            return image
+        except Exception as e:
+            logger.error(f"Error preprocessing image: {e}")
+            raise e
+    
+    def detect_objects(self, image: np.ndarray, confidence_threshold: float = 0.5,
+                       classes: Optional[Sequence[str]] = None, imgsz: Optional[int] = None) -> List[Dict]:
+        """Perform object detection on the image, optionally limited to a class subset
+
+        ``imgsz`` caps the inference size (e.g. while shedding load); exported
+        models and cascade mode always run at their own size.
+        """
+        try:
+            if self.cascade_config is not None and self.screen_model is not None:
+                return self.detect_objects_cascade(image, confidence_threshold, classes)
+
+            # Hold a local reference so a concurrent hot-swap cannot change
+            # the model (or its class names) halfway through this frame
+            model = self.model
+
+            if self.buffer_pool is not None or isinstance(model, ExportedModel):
+                return self.detect_batch([image], confidence_threshold, classes, imgsz)[0]
+
+            # Run YOLO inference
+            results = model(image, conf=confidence_threshold, classes=self.class_ids(classes, model),
+                            imgsz=self.input_geometry(model, imgsz)[0], verbose=False)
+            
+            return self._build_detections(results, model)
+            
+        except Exception as e:
+            logger.error(f"Error during object detection: {e}")
+            return []
+
+    def detect_batch(self, images: List[np.ndarray], confidence_threshold: float = 0.5,
+                     classes: Optional[Sequence[str]] = None, imgsz: Optional[int] = None) -> List[List[Dict]]:
+        """Run one batched forward pass over several frames; returns detections per frame
+
+        Cascade mode screens frame by frame, so it falls back to ``detect_objects``.
+        """
+        if not images:
+            return []
+        if self.cascade_config is not None and self.screen_model is not None:
+            return [self.detect_objects(image, confidence_threshold, classes) for image in images]
+
+        model = self.model
+        # Class filtering happens inside NMS, so skipped classes never become candidates
+        class_ids = self.class_ids(classes, model)
+        if isinstance(model, ExportedModel):
+            return self._detect_exported(model, images, confidence_threshold, class_ids)
+        if self.buffer_pool is None:
+            results = model(list(images), conf=confidence_threshold, classes=class_ids,
+                            imgsz=self.input_geometry(model, imgsz)[0], verbose=False)
+            return [self._build_detections([result], model) for result in results]
+
+        if torch is None:
+            # Letterbox into pooled canvases at the model's input size, so the
+            # library's own resize is a no-op and no per-frame arrays are allocated
+            size, stride, rect = self.input_geometry(model, imgsz)
+            canvases, letterboxes = [], []
+            try:
+                for image in images:
+                    canvas, scale, pad = letterbox(image, size, stride, rect, self.buffer_pool)
+                    canvases.append(canvas)
+                    letterboxes.append((scale, pad, (image.shape[1], image.shape[0])))
+                results = model(canvases, conf=confidence_threshold, classes=class_ids, imgsz=size, verbose=False)
+                return [self._build_detections([result], model, letterboxes=[lb])
+                        for result, lb in zip(results, letterboxes)]
+            finally:
+                for canvas in canvases:
+                    self.buffer_pool.release(canvas)
+
+        # Hand the model ready-made tensors, skipping its generic preprocessing
+        groups, letterboxes = self.preprocess_batch(images, model, imgsz)
+        detections: List[Optional[List[Dict]]] = [None] * len(images)
+        try:
+            for indices, tensor in groups:
+                results = model(torch.from_numpy(tensor), conf=confidence_threshold, classes=class_ids, verbose=False)
+                for index, result in zip(indices, results):
+                    detections[index] = self._build_detections([result], model, letterboxes=[letterboxes[index]])
+        finally:
+            for _, tensor in groups:
+                self.buffer_pool.release(tensor)
+        return detections
+
+    def _detect_exported(self, model: ExportedModel, images: List[np.ndarray], confidence_threshold: float,
+                         class_ids: Optional[List[int]] = None,
+                         offsets: Optional[List[Tuple[int, int]]] = None) -> List[List[Dict]]:
+        """Run an exported model on pooled tensors and decode its raw output with vectorized NMS"""
+        groups, letterboxes = self.preprocess_batch(images, model)
+        detections: List[Optional[List[Dict]]] = [None] * len(images)
+        try:
+            for indices, tensor in groups:
+                predictions = decode_predictions(model(tensor), confidence_threshold, classes=class_ids,
+                                                 max_detections=self.max_detections)
+                for index, prediction in zip(indices, predictions):
+                    detections[index] = self._array_detections(prediction, model.names, letterboxes[index],
+                                                               offsets[index] if offsets else (0, 0))
+        finally:
+            for _, tensor in groups:
+                (self.buffer_pool or frame_pool).release(tensor)
+        return detections
+
+    def preprocess_batch(self, images: List[np.ndarray], model=None,
+                         imgsz: Optional[int] = None) -> Tuple[List[Tuple[List[int], np.ndarray]], List[Tuple]]:
+        """Letterbox frames and convert them to model-ready float32 NCHW RGB tensors
+
+        Each frame is resized once into a pooled canvas and converted to the
+        tensor layout in one more vectorized pass. Frames are grouped by
+        letterboxed shape (one group per camera resolution, or a single group
+        for fixed-size exported models), and each group becomes one pooled
+        tensor. Returns ``([(indices, tensor), ...], letterboxes)``; release
+        the tensors to ``buffer_pool`` after inference.
+        """
+        size, stride, rect = self.input_geometry(model or self.model, imgsz)
+        pool = self.buffer_pool or frame_pool
+        canvases, letterboxes = [], []
+        try:
+            for image in images:
+                canvas, scale, pad = letterbox(image, size, stride, rect, pool)
+                canvases.append(canvas)
+                letterboxes.append((scale, pad, (image.shape[1], image.shape[0])))
+            by_shape: Dict[Tuple, List[int]] = {}
+            for index, canvas in enumerate(canvases):
+                by_shape.setdefault(canvas.shape, []).append(index)
+            groups = [(indices, to_tensor([canvases[i] for i in indices], pool)) for indices in by_shape.values()]
+        finally:
+            for canvas in canvases:
+                pool.release(canvas)
+        return groups, letterboxes
+
+    @staticmethod
+    def input_geometry(model, imgsz: Optional[int] = None) -> Tuple[int, int, bool]:
+        """Input size, stride and whether the model takes rectangular inputs
+
+        PyTorch weights accept any stride multiple, so ``imgsz`` can lower
+        their size; exported models (ONNX, OpenVINO, TensorRT) are built for a
+        fixed square input.
+        """
+        if isinstance(model, ExportedModel):
+            return model.imgsz, model.stride, False
+        default = getattr(model, 'overrides', {}).get('imgsz') or DEFAULT_IMGSZ
+        size = int(max(default) if isinstance(default, (list, tuple)) else default)
+        network = getattr(model, 'model', None)
+        strides = getattr(network, 'stride', None)
+        stride = DEFAULT_STRIDE if strides is None else int(max(strides))
+        if imgsz:
+            size = max(stride, min(size, imgsz // stride * stride))
+        return size, stride, strides is not None
+
+    def stream(self, frames: Iterable, confidence_threshold: float = 0.5, batch_size: int = 8,
+               prefetch: int = 16, stride: int = 1, decode: Optional[Callable[[Any], Optional[np.ndarray]]] = None,
+               decoders: int = 1, latest_only: bool = False,
+               classes: Optional[Sequence[str]] = None) -> Iterator[Tuple[Any, np.ndarray, List[Dict]]]:
+        """Detect over any iterator of frames, yielding ``(tag, frame, detections)`` lazily
+
+        Items are frames, or tuples whose last element is the frame and whose
+        leading elements come back as the tag (plain frames are tagged with
+        their position). The source is read ``prefetch`` items ahead on a
+        background thread and inferred ``batch_size`` frames at a time, so at
+        most ``prefetch + batch_size`` frames are held in memory. ``stride``
+        keeps every Nth item, ``decode`` turns payloads such as paths or JPEG
+        bytes into frames on ``decoders`` threads, and ``latest_only`` drops
+        the oldest waiting frames when inference falls behind a live source.
+        ``classes`` limits detection to a subset as in ``detect_objects``.
+        """
+        with Prefetcher(frames, depth=prefetch, stride=stride, decode=decode,
+                        decoders=decoders, latest_only=latest_only) as prefetcher:
+            for batch in batched(prefetcher, max(1, batch_size)):
+                results = self.detect_batch([frame for _, frame in batch], confidence_threshold, classes)
+                for (tag, frame), detections in zip(batch, results):
+                    yield tag, frame, detections
+
+    def _build_detections(self, results, model, offsets: Optional[List[Tuple[int, int]]] = None,
+                          detections: Optional[List[Dict]] = None,
+                          letterboxes: Optional[List[Tuple[float, Tuple[int, int], Tuple[int, int]]]] = None) -> List[Dict]:
+        """Convert Ultralytics results into detection dicts
+
+        ``offsets`` gives the (x, y) origin of each result when inference ran on
+        crops, and ``letterboxes`` the ``(scale, (pad_x, pad_y), (width, height))``
+        of each result when it ran on a letterboxed canvas, so boxes are
+        reported in full-frame coordinates.
+        """
+        detections = detections if detections is not None else []
+        
+        for index, result in enumerate(results):
+            if result.boxes is not None:
+                for box in result.boxes:
+                    # Get class ID and confidence
+                    cls_id = int(box.cls[0])
+                    confidence = float(box.conf[0])
+                    
+                    # Get class name
+                    class_name = model.names[cls_id]
+                    
+                    xyxy = box.xyxy[0].tolist()
+                    detections.append(self._make_detection(
+                        class_name, confidence, xyxy, len(detections),
+                        letterbox=letterboxes[index] if letterboxes else None,
+                        offset=offsets[index] if offsets else (0, 0)))
+        
+        return detections
+
+    def _array_detections(self, prediction: np.ndarray, names: Dict[int, str],
+                          letterbox: Tuple[float, Tuple[int, int], Tuple[int, int]],
+                          offset: Tuple[int, int] = (0, 0)) -> List[Dict]:
+        """Convert decoded ``(n, 6)`` rows from ``decode_predictions`` into detection dicts"""
+        detections = []
+        for x1, y1, x2, y2, confidence, cls_id in prediction.tolist():
+            detections.append(self._make_detection(names.get(int(cls_id), str(int(cls_id))), confidence,
+                                                   [x1, y1, x2, y2], len(detections), letterbox, offset))
+        return detections
+
+    def _make_detection(self, class_name: str, confidence: float, xyxy: List[float], index: int,
+                        letterbox: Optional[Tuple[float, Tuple[int, int], Tuple[int, int]]] = None,
+                        offset: Tuple[int, int] = (0, 0)) -> Dict:
+        """Detection dict for one box, mapped back to full-frame pixel coordinates"""
+        # Map to our application classes for coloring/threat logic
+        mapped_class = self.class_mapping.get(class_name.lower(), 'unknown')
+
+        # Always include detection so frontend can show original label
+        # (e.g., 'cell phone') even if it's not in our mapped target set
+        if letterbox:
+            scale, (pad_x, pad_y), (frame_w, frame_h) = letterbox
+            xyxy = [min(max((xyxy[0] - pad_x) / scale, 0), frame_w),
+                    min(max((xyxy[1] - pad_y) / scale, 0), frame_h),
+                    min(max((xyxy[2] - pad_x) / scale, 0), frame_w),
+                    min(max((xyxy[3] - pad_y) / scale, 0), frame_h)]
+        x1, y1, x2, y2 = map(int, xyxy)
+        offset_x, offset_y = offset
+        x1, x2 = x1 + offset_x, x2 + offset_x
+        y1, y2 = y1 + offset_y, y2 + offset_y
+
+        return {
+            'id': f"{mapped_class}_{int(time.time() * 1000)}_{index}",
+            'type': mapped_class,
+            'confidence': confidence,
+            'bbox': {
+                'x': x1,
+                'y': y1,
+                'width': x2 - x1,
+                'height': y2 - y1
+            },
+            'timestamp': time.time(),
+            'original_class': class_name
+        }
+    
+    def configure_cascade(self, screen_model_path: Optional[str], screen_model=None, **settings) -> Optional[Dict]:
+        """Enable two-stage cascade inference, or disable it with ``None``
+
+        A fast screening model runs on every frame at low resolution; the main
+        model only runs when the screen fires, either on the full frame or on
+        padded crops around the candidate regions. ``screen_model`` reuses a
+        screening model another detector already loaded from that path.
+        """
+        if screen_model_path is None:
+            self.cascade_config = None
+            self.screen_model = None
+            logger.info("Cascade inference disabled")
+            return None
+
+        config = dict(self.DEFAULT_CASCADE_CONFIG)
+        unknown = set(settings) - set(config)
+        if unknown:
+            raise ValueError(f"Unknown cascade settings: {sorted(unknown)}")
+        config.update(settings)
+        config['screen_model_path'] = screen_model_path
+
+        if screen_model is not None:
+            self.screen_model = screen_model
+        elif self.screen_model is None or self.cascade_config is None \
+                or self.cascade_config['screen_model_path'] != screen_model_path:
+            logger.info(f"Loading cascade screening model from: {screen_model_path}")
+            self.screen_model = YOLO(screen_model_path)
+
+        self.cascade_config = config
+        logger.info(f"✅ Cascade inference enabled: {config}")
+        return config
+
+    def _candidate_regions(self, boxes: List[List[float]], width: int, height: int) -> List[List[int]]:
+        """Pad candidate boxes and merge overlapping ones into crop regions"""
+        config = self.cascade_config
+        regions = []
+        for x1, y1, x2, y2 in boxes:
+            pad = config['crop_padding'] * max(x2 - x1, y2 - y1)
+            cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+            half_w = max((x2 - x1) / 2 + pad, config['min_crop_size'] / 2)
+            half_h = max((y2 - y1) / 2 + pad, config['min_crop_size'] / 2)
+            regions.append([max(0, int(cx - half_w)), max(0, int(cy - half_h)),
+                            min(width, int(cx + half_w)), min(height, int(cy + half_h))])
+
+        # Merge until no two regions overlap so no object is detected twice
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(regions)):
+                for j in range(i + 1, len(regions)):
+                    a, b = regions[i], regions[j]
+                    if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                        regions[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                        del regions[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return regions
+
+    def detect_objects_cascade(self, image: np.ndarray, confidence_threshold: float = 0.5,
+                               classes: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Screen the frame with the fast model and confirm candidates with the main model"""
+        config = self.cascade_config
+        screen_model = self.screen_model
+        model = self.model
+        class_ids = self.class_ids(classes, model)
+        height, width = image.shape[:2]
+
+        # Stage 1: cheap low-resolution screen with a permissive threshold
+        start = time.perf_counter()
+        screen_results = screen_model(image, conf=min(config['screen_confidence'], config['candidate_confidence']),
+                                      classes=self.class_ids(classes, screen_model),
+                                      imgsz=config['screen_imgsz'], verbose=False)
+        screen_time = time.perf_counter() - start
+
+        candidates = []
+        fired = False
+        for result in screen_results:
+            if result.boxes is None:
+                continue
+            for box in result.boxes:
+                confidence = float(box.conf[0])
+                class_name = screen_model.names[int(box.cls[0])]
+                mapped_class = self.class_mapping.get(class_name.lower(), 'unknown')
+                high_severity = mapped_class in config['high_severity_types']
+                if confidence >= config['screen_confidence'] or (
+                        high_severity and confidence >= config['candidate_confidence']):
+                    fired = True
+                    candidates.append(box.xyxy[0].tolist())
+
+        if not fired:
+            self._record_cascade(screen_time, screened_out=1)
+            return []
+
+        # Stage 2: run the main model on candidate crops, or the whole frame
+        # when the crops would cover most of it anyway
+        start = time.perf_counter()
+        regions = self._candidate_regions(candidates, width, height) if config['crop_regions'] else []
+        crop_area = sum((r[2] - r[0]) * (r[3] - r[1]) for r in regions)
+        if regions and crop_area <= config['full_frame_area_ratio'] * width * height:
+            crops = [image[r[1]:r[3], r[0]:r[2]] for r in regions]
+            offsets = [(r[0], r[1]) for r in regions]
+            if isinstance(model, ExportedModel):
+                detections = [d for found in self._detect_exported(model, crops, confidence_threshold,
+                                                                   class_ids, offsets)
+                              for d in found]
+            else:
+                results = model(crops, conf=confidence_threshold, classes=class_ids, verbose=False)
+                detections = self._build_detections(results, model, offsets=offsets)
+            self._record_cascade(screen_time, time.perf_counter() - start, crop_frames=1, crops=len(crops))
+        elif isinstance(model, ExportedModel):
+            detections = self._detect_exported(model, [image], confidence_threshold, class_ids)[0]
+            self._record_cascade(screen_time, time.perf_counter() - start, full_frames=1)
+        else:
+            results = model(image, conf=confidence_threshold, classes=class_ids, verbose=False)
+            detections = self._build_detections(results, model)
+            self._record_cascade(screen_time, time.perf_counter() - start, full_frames=1)
+
+        return detections
+
+    def _record_cascade(self, screen_time: float, confirm_time: float = 0.0, **counts):
+        """Add one frame's stage counts and timings to the cascade statistics"""
+        with self._cascade_stats_lock:
+            stats = self.cascade_stats
+            stats['frames'] += 1
+            stats['screen_time'] += screen_time
+            stats['confirm_time'] += confirm_time
+            for key, value in counts.items():
+                stats[key] += value
+
+    def get_cascade_stats(self) -> Dict:
+        """Cascade configuration, stage counts and mean stage timings"""
+        with self._cascade_stats_lock:
+            stats = dict(self.cascade_stats)
+        frames = max(stats['frames'], 1)
+        confirmed = max(stats['crop_frames'] + stats['full_frames'], 1)
+        return {
+            'enabled': self.cascade_config is not None,
+            'config': self.cascade_config,
+            **stats,
+            'screen_pass_rate': 1 - stats['screened_out'] / frames,
+            'mean_screen_ms': stats['screen_time'] * 1000 / frames,
+            'mean_confirm_ms': stats['confirm_time'] * 1000 / confirmed,
+            'mean_frame_ms': (stats['screen_time'] + stats['confirm_time']) * 1000 / frames
+        }
+    
+    def draw_detections(self, image: np.ndarray, detections: List[Dict]) -> np.ndarray:
+        """Draw bounding boxes and labels on the image"""
+        try:
+            # Color mapping for different object types
+            colors = {
+                'person': (0, 255, 0),      # Green
+                'vehicle': (255, 0, 0),     # Blue
+                'drone': (0, 165, 255),     # Orange
+                'weapon': (0, 0, 255),      # Red
+                'unknown': (128, 128, 128)  # Gray
+            }
+            
+            for detection in detections:
+                bbox = detection['bbox']
+                obj_type = detection['type']
+                confidence = detection['confidence']
+                
+                # Get color for this object type
+                color = colors.get(obj_type, colors['unknown'])
+                
+                # Draw bounding box
+                cv2.rectangle(
+                    image, 
+                    (bbox['x'], bbox['y']), 
+                    (bbox['x'] + bbox['width'], bbox['y'] + bbox['height']), 
+                    color, 
+                    2
+                )
+                
+                # Draw label with confidence; unmapped classes keep their model name
+                name = obj_type if obj_type != 'unknown' else detection.get('original_class', obj_type)
+                label = f"{name} {confidence:.2f}"
+                label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+                
+                # Draw label background
+                cv2.rectangle(
+                    image,
+                    (bbox['x'], bbox['y'] - label_size[1] - 10),
+                    (bbox['x'] + label_size[0], bbox['y']),
+                    color,
+                    -1
+                )
+                
+                # Draw label text
+                cv2.putText(
+                    image,
+                    label,
+                    (bbox['x'], bbox['y'] - 5),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.6,
+                    (255, 255, 255),
+                    2
+                )
+            
+            return image
+            
+        except Exception as e:
+            logger.error(f"Error drawing detections: {e}")
+            return image
+
+
+def summarize_detections(detections: List[Dict]) -> Tuple[Dict[str, int], List[Dict]]:
+    """Counts per application type and the detections that count as threats"""
+    counts = {key: 0 for key in COUNT_KEYS.values()}
+    for detection in detections:
+        key = COUNT_KEYS.get(detection['type'])
+        if key is not None:
+            counts[key] += 1
+    threats = [d for d in detections if d['type'] in THREAT_TYPES]
+    return counts, threats
+
+
+_detectors: Dict[str, YOLODetector] = {}
+_detectors_lock = native_lock()
+
+
+def get_detector(model_path: str = TRAINED_WEIGHTS) -> YOLODetector:
+    """Detector for a weights path, loaded once per process and shared by every caller
+
+    Scripts and app backends use this instead of loading weights themselves,
+    so they get the same class mapping, batching and post-processing as the
+    API server.
+    """
+    key = os.path.abspath(model_path)
+    with _detectors_lock:
+        detector = _detectors.get(key)
+        if detector is None:
+            detector = _detectors[key] = YOLODetector(model_path)
+    return detector
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Detection Event Store
+Append-only SQLite (WAL) store of detections and alerts with batched background writes
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from serving import run_blocking
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.environ.get('RAKSHAK_EVENT_DB', 'detections.db')
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.5   # Seconds between writer flushes
+DEFAULT_QUEUE_SIZE = 10000     # Pending batches before new events are dropped
+MAX_QUERY_LIMIT = 10000
+
+# Minute-level counts are maintained on write so long-range rollups never scan raw rows
+COUNT_BUCKET_SECONDS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    ts REAL NOT NULL,
+    camera_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    class TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    x INTEGER, y INTEGER, width INTEGER, height INTEGER,
+    track_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_detections_camera_type_ts ON detections (camera_id, type, ts);
+CREATE INDEX IF NOT EXISTS idx_detections_type_ts ON detections (type, ts);
+CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections (ts);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    ts REAL NOT NULL,
+    camera_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    location TEXT,
+    payload TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_camera_ts ON alerts (camera_id, ts);
+CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts);
+
+CREATE TABLE IF NOT EXISTS detection_counts (
+    bucket INTEGER NOT NULL,
+    camera_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (camera_id, type, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_counts_bucket ON detection_counts (bucket);
+"""
+
+
+class EventStore:
+    """Batched, append-only detection and alert log with time-indexed queries
+
+    Callers on the request path only enqueue rows; a single writer thread owns
+    the write connection and commits them in batches. Reads use per-thread
+    connections, which WAL mode lets run concurrently with the writer.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+        self._stopped = threading.Event()
+        self.stats = {'detections_written': 0, 'alerts_written': 0, 'dropped': 0, 'batches': 0}
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.commit()
+
+        self._writer = threading.Thread(target=self._run_writer, name='event-store-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+            connection.row_factory = sqlite3.Row
+        return connection
+
+    def _fetch(self, sql: str, params: List) -> List[sqlite3.Row]:
+        """Run a read query on a worker thread so sqlite never blocks the event loop"""
+        return run_blocking(lambda: self._reader().execute(sql, params).fetchall())
+
+    def record_detections(self, camera_id: str, detections: List[Dict], timestamp: Optional[float] = None):
+        """Queue a frame's detections for writing without blocking the caller"""
+        if not detections:
+            return
+        timestamp = timestamp or time.time()
+        rows = [(
+            timestamp, camera_id, d['type'], d.get('original_class', d['type']), d['confidence'],
+            d['bbox']['x'], d['bbox']['y'], d['bbox']['width'], d['bbox']['height'], d.get('track_id')
+        ) for d in detections]
+        self._enqueue(('detections', rows))
+
+    def record_alert(self, camera_id: str, kind: str, payload: Dict, location: Optional[str] = None,
+                     timestamp: Optional[float] = None):
+        """Queue an alert (threat, SOS, ...) for writing"""
+        row = (timestamp or time.time(), camera_id, kind, location, json.dumps(payload, default=str))
+        self._enqueue(('alerts', [row]))
+
+    def _enqueue(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.stats['dropped'] += len(item[1])
+
+    def _run_writer(self):
+        connection = self._connect()
+        while not self._stopped.is_set() or not self._queue.empty():
+            batch = {'detections': [], 'alerts': []}
+            deadline = time.monotonic() + self.flush_interval
+            pending = 0
+            while pending < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    table, rows = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch[table].extend(rows)
+                pending += len(rows)
+            if pending:
+                try:
+                    # Off the event loop: a commit would otherwise stall every connection under eventlet
+                    run_blocking(self._write_batch, connection, batch)
+                except Exception as e:
+                    logger.error(f"Error writing detection events: {e}")
+        connection.close()
+
+    def _write_batch(self, connection: sqlite3.Connection, batch: Dict[str, List]):
+        counts: Dict[tuple, int] = {}
+        for row in batch['detections']:
+            key = (int(row[0] // COUNT_BUCKET_SECONDS) * COUNT_BUCKET_SECONDS, row[1], row[2])
+            counts[key] = counts.get(key, 0) + 1
+
+        with connection:
+            if batch['detections']:
+                connection.executemany(
+                    'INSERT INTO detections VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch['detections'])
+                connection.executemany(
+                    'INSERT INTO detection_counts (bucket, camera_id, type, count) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (camera_id, type, bucket) DO UPDATE SET count = count + excluded.count',
+                    [(*key, count) for key, count in counts.items()])
+            if batch['alerts']:
+                connection.executemany('INSERT INTO alerts VALUES (?, ?, ?, ?, ?)', batch['alerts'])
+
+        self.stats['detections_written'] += len(batch['detections'])
+        self.stats['alerts_written'] += len(batch['alerts'])
+        self.stats['batches'] += 1
+
+    def query_detections(self, camera_id: Optional[str] = None, detection_type: Optional[str] = None,
+                         class_name: Optional[str] = None, start: Optional[float] = None,
+                         end: Optional[float] = None, limit: int = 1000) -> List[Dict]:
+        """Detections matching the filters, newest first"""
+        clauses, params = self._time_filters(start, end)
+        if camera_id:
+            clauses.append('camera_id = ?')
+            params.append(camera_id)
+        if detection_type:
+            clauses.append('type = ?')
+            params.append(detection_type)
+        if class_name:
+            clauses.append('class = ?')
+            params.append(class_name)
+
+        sql = 'SELECT * FROM detections'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY ts DESC LIMIT ?'
+        params.append(max(1, min(int(limit), MAX_QUERY_LIMIT)))
+        return [dict(row) for row in self._fetch(sql, params)]
+
+    def query_alerts(self, camera_id: Optional[str] = None, kind: Optional[str] = None,
+                     start: Optional[float] = None, end: Optional[float] = None,
+                     limit: int = 1000) -> List[Dict]:
+        """Alerts matching the filters, newest first"""
+        clauses, params = self._time_filters(start, end)
+        if camera_id:
+            clauses.append('camera_id = ?')
+            params.append(camera_id)
+        if kind:
+            clauses.append('kind = ?')
+            params.append(kind)
+
+        sql = 'SELECT * FROM alerts'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY ts DESC LIMIT ?'
+        params.append(max(1, min(int(limit), MAX_QUERY_LIMIT)))
+
+        alerts = []
+        for row in self._fetch(sql, params):
+            alert = dict(row)
+            alert['payload'] = json.loads(alert['payload']) if alert['payload'] else None
+            alerts.append(alert)
+        return alerts
+
+    def count_rollup(self, interval: int = 3600, camera_id: Optional[str] = None,
+                     detection_type: Optional[str] = None, start: Optional[float] = None,
+                     end: Optional[float] = None) -> List[Dict]:
+        """Detection counts per interval bucket and type
+
+        Intervals that are whole minutes are answered from the pre-aggregated
+        minute counts; finer intervals fall back to the raw detections. A
+        ``start`` or ``end`` inside a minute leaves a partial minute at that
+        edge, which is counted from the raw detections so both paths agree.
+        """
+        interval = max(1, int(interval))
+        filters = ([('camera_id = ?', camera_id)] if camera_id else []) + \
+                  ([('type = ?', detection_type)] if detection_type else [])
+        raw_sql = f'SELECT CAST(ts / {interval} AS INTEGER) * {interval} AS bucket, type, COUNT(*) AS count FROM detections'
+        if interval % COUNT_BUCKET_SECONDS:
+            return self._grouped(raw_sql, self._time_filters(start, end), filters)
+
+        # Whole minutes inside [start, end) come from the minute counts
+        inner_start = None if start is None else -(-float(start) // COUNT_BUCKET_SECONDS) * COUNT_BUCKET_SECONDS
+        inner_end = None if end is None else float(end) // COUNT_BUCKET_SECONDS * COUNT_BUCKET_SECONDS
+        if inner_start is not None and inner_end is not None and inner_start > inner_end:
+            # The whole range falls inside one minute
+            return self._grouped(raw_sql, self._time_filters(start, end), filters)
+        counts_sql = f'SELECT (bucket / {interval}) * {interval} AS bucket, type, SUM(count) AS count FROM detection_counts'
+        totals: Dict = {}
+        ranges = [(counts_sql, self._time_filters(inner_start, inner_end, 'bucket'))]
+        if start is not None and inner_start > start:
+            ranges.append((raw_sql, self._time_filters(start, inner_start)))
+        if end is not None and end > inner_end:
+            ranges.append((raw_sql, self._time_filters(inner_end, end)))
+        for sql, time_filters in ranges:
+            for row in self._grouped(sql, time_filters, filters):
+                key = (row['bucket'], row['type'])
+                totals[key] = totals.get(key, 0) + row['count']
+        return [{'bucket': bucket, 'type': kind, 'count': count}
+                for (bucket, kind), count in sorted(totals.items())]
+
+    def _grouped(self, sql: str, time_filters, filters: List) -> List[Dict]:
+        """Run a bucket/type aggregate with the given time and column filters"""
+        clauses, params = time_filters
+        for clause, value in filters:
+            clauses.append(clause)
+            params.append(value)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' GROUP BY 1, type ORDER BY 1'
+        return [dict(row) for row in self._fetch(sql, params)]
+
+    @staticmethod
+    def _time_filters(start: Optional[float], end: Optional[float], column: str = 'ts'):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append(f'{column} >= ?')
+            params.append(float(start))
+        if end is not None:
+            clauses.append(f'{column} < ?')
+            params.append(float(end))
+        return clauses, params
+
+    def close(self, timeout: float = 5.0):
+        """Flush pending events and stop the writer thread"""
+        self._stopped.set()
+        self._writer.join(timeout)
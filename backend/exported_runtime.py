@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Exported Model Runtime
+Runs ONNX and OpenVINO exports directly, without the Ultralytics predictor
+"""
+
+import ast
+import glob
+import logging
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    import onnxruntime
+except ImportError:  # ONNX exports fall back to Ultralytics without it
+    onnxruntime = None
+
+try:
+    from openvino.runtime import Core
+except ImportError:  # OpenVINO exports fall back to Ultralytics without it
+    Core = None
+
+from resource_governor import thread_settings
+
+logger = logging.getLogger(__name__)
+
+DIRECT_EXPORTS = os.environ.get('RAKSHAK_DIRECT_EXPORTS', '1') not in ('0', 'false', 'no')
+DEFAULT_IMGSZ = 640
+DEFAULT_STRIDE = 32
+
+
+def export_format(path: str) -> Optional[str]:
+    """'onnx' or 'openvino' for exported weights this runtime can run, else None"""
+    normalized = path.rstrip('/\\')
+    if normalized.endswith('.onnx'):
+        return 'onnx'
+    if normalized.endswith('_openvino_model') or normalized.endswith('.xml'):
+        return 'openvino'
+    return None
+
+
+def runtime_available(path: str) -> bool:
+    """Whether ``path`` is an export that can run directly with the installed runtimes"""
+    fmt = export_format(path)
+    return DIRECT_EXPORTS and ((fmt == 'onnx' and onnxruntime is not None) or
+                               (fmt == 'openvino' and Core is not None))
+
+
+def parse_names(names) -> Dict[int, str]:
+    """Class names from export metadata, stored as a dict or its string form"""
+    if isinstance(names, str):
+        names = ast.literal_eval(names)
+    if isinstance(names, (list, tuple)):
+        names = dict(enumerate(names))
+    return {int(k): str(v) for k, v in (names or {}).items()}
+
+
+def parse_imgsz(imgsz, fallback: int = DEFAULT_IMGSZ) -> int:
+    if isinstance(imgsz, str):
+        imgsz = ast.literal_eval(imgsz)
+    if isinstance(imgsz, (list, tuple)):
+        imgsz = max(imgsz)
+    return int(imgsz) if imgsz else fallback
+
+
+class ExportedModel:
+    """Exported YOLOv8 network plus the class names and input size from its metadata
+
+    Calling it with a float32 NCHW batch returns the raw ``(batch, 4 + classes,
+    anchors)`` output; decoding and NMS are done by ``postprocess``. Exports
+    built for a fixed batch of one are run frame by frame.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = export_format(path)
+        metadata: Dict = {}
+        if self.format == 'onnx':
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = thread_settings['inference']
+            options.inter_op_num_threads = 1
+            self.session = onnxruntime.InferenceSession(path, options, providers=onnxruntime.get_available_providers())
+            model_input = self.session.get_inputs()[0]
+            self.input_name = model_input.name
+            shape = model_input.shape
+            metadata = dict(self.session.get_modelmeta().custom_metadata_map)
+        else:
+            xml_path = path if path.endswith('.xml') else next(iter(glob.glob(os.path.join(path, '*.xml'))), None)
+            if xml_path is None:
+                raise FileNotFoundError(f"No OpenVINO model (.xml) found in {path}")
+            core = Core()
+            network = core.read_model(xml_path)
+            self.compiled = core.compile_model(network, 'CPU',
+                                               {'INFERENCE_NUM_THREADS': str(thread_settings['inference'])})
+            self.output = self.compiled.output(0)
+            shape = [d.get_length() if d.is_static else None for d in network.input(0).get_partial_shape()]
+            metadata_path = os.path.join(os.path.dirname(xml_path), 'metadata.yaml')
+            if os.path.exists(metadata_path):
+                import yaml  # Installed with Ultralytics
+                with open(metadata_path, 'r') as f:
+                    metadata = yaml.safe_load(f) or {}
+
+        self.fixed_batch = shape[0] if isinstance(shape[0], int) else None
+        spatial = shape[2] if len(shape) > 2 and isinstance(shape[2], int) else None
+        self.imgsz = parse_imgsz(metadata.get('imgsz'), spatial or DEFAULT_IMGSZ)
+        self.stride = int(metadata.get('stride', DEFAULT_STRIDE))
+        self.names = parse_names(metadata.get('names'))
+        self.task = metadata.get('task', 'detect')
+        logger.info(f"✅ Running {self.format} export directly: {path} ({self.imgsz}px, {len(self.names)} classes)")
+
+    def _run(self, tensor: np.ndarray) -> np.ndarray:
+        if self.format == 'onnx':
+            return self.session.run(None, {self.input_name: tensor})[0]
+        return self.compiled(tensor)[self.output]
+
+    def __call__(self, tensor: np.ndarray) -> np.ndarray:
+        if self.fixed_batch == 1 and tensor.shape[0] > 1:
+            return np.concatenate([self._run(tensor[i:i + 1]) for i in range(tensor.shape[0])])
+        return self._run(tensor)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Frame Buffers
+Preallocated, resolution-keyed NumPy buffers for the decode-to-inference path
+"""
+
+import logging
+import math
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from serving import native_lock
+
+logger = logging.getLogger(__name__)
+
+POOL_ENABLED = os.environ.get('RAKSHAK_BUFFER_POOL', '1') not in ('0', 'false', 'no')
+MAX_BUFFERS_PER_SHAPE = 8      # Free buffers kept per shape; more are left to the garbage collector
+MAX_SHAPES = 16                # Distinct resolutions kept; the least recently used is evicted
+LETTERBOX_COLOR = 114          # Same grey padding Ultralytics uses
+PIXEL_SCALE = np.float32(1 / 255)
+
+
+class BufferPool:
+    """Free lists of arrays keyed by ``(shape, dtype)``
+
+    Cameras send frames at a handful of fixed resolutions, so after warm-up
+    every letterbox canvas, tensor and scratch copy comes from the pool
+    instead of the allocator. Buffers are returned with ``release`` (or by
+    leaving ``borrow``); their contents are not cleared.
+    """
+
+    def __init__(self, max_per_shape: int = MAX_BUFFERS_PER_SHAPE, max_shapes: int = MAX_SHAPES):
+        self.max_per_shape = max_per_shape
+        self.max_shapes = max_shapes
+        self._free: 'OrderedDict[Tuple, List[np.ndarray]]' = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'released': 0, 'discarded': 0}
+        self._outstanding = 0
+        self._lock = native_lock()
+
+    @staticmethod
+    def _key(shape, dtype) -> Tuple:
+        return tuple(int(d) for d in shape), np.dtype(dtype).str
+
+    def acquire(self, shape, dtype=np.uint8) -> np.ndarray:
+        key = self._key(shape, dtype)
+        with self._lock:
+            self._outstanding += 1
+            free = self._free.get(key)
+            if free:
+                self._free.move_to_end(key)
+                self._stats['hits'] += 1
+                return free.pop()
+            self._stats['misses'] += 1
+        return np.empty(key[0], dtype=dtype)
+
+    def release(self, array: np.ndarray):
+        key = self._key(array.shape, array.dtype)
+        with self._lock:
+            self._outstanding -= 1
+            free = self._free.get(key)
+            if free is None:
+                free = self._free[key] = []
+                while len(self._free) > self.max_shapes:
+                    _, evicted = self._free.popitem(last=False)
+                    self._stats['discarded'] += len(evicted)
+            self._free.move_to_end(key)
+            if len(free) < self.max_per_shape:
+                free.append(array)
+                self._stats['released'] += 1
+            else:
+                self._stats['discarded'] += 1
+
+    @contextmanager
+    def borrow(self, shape, dtype=np.uint8):
+        array = self.acquire(shape, dtype)
+        try:
+            yield array
+        finally:
+            self.release(array)
+
+    def copy(self, image: np.ndarray) -> np.ndarray:
+        """Pooled copy of an array; release it when done"""
+        array = self.acquire(image.shape, image.dtype)
+        np.copyto(array, image)
+        return array
+
+    def trim(self) -> int:
+        """Drop every free buffer, e.g. under memory pressure; returns the bytes released"""
+        with self._lock:
+            freed = sum(a.nbytes for free in self._free.values() for a in free)
+            self._stats['discarded'] += sum(len(free) for free in self._free.values())
+            self._free.clear()
+        return freed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            requests = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': round(self._stats['hits'] / requests, 3) if requests else None,
+                'outstanding': self._outstanding,
+                'shapes': {f"{'x'.join(map(str, shape))} {dtype}": len(free)
+                           for (shape, dtype), free in self._free.items()},
+                'pooled_bytes': sum(a.nbytes for free in self._free.values() for a in free)
+            }
+
+
+# One pool per worker process, shared by its request threads
+frame_pool = BufferPool()
+
+
+def letterbox_geometry(height: int, width: int, size: int, stride: int = 32,
+                       rect: bool = True) -> Tuple[float, Tuple[int, int], Tuple[int, int]]:
+    """Scale, resized ``(w, h)`` and padded ``(w, h)`` for fitting a frame into ``size``
+
+    ``rect`` pads only up to the next multiple of ``stride`` (what PyTorch
+    models accept); fixed-shape exported models need a full ``size`` square.
+    """
+    scale = min(size / height, size / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    if rect:
+        out_w, out_h = math.ceil(new_w / stride) * stride, math.ceil(new_h / stride) * stride
+    else:
+        out_w = out_h = size
+    return scale, (new_w, new_h), (out_w, out_h)
+
+
+def letterbox(image: np.ndarray, size: int = 640, stride: int = 32, rect: bool = True,
+              pool: BufferPool = frame_pool) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """Resize and pad a BGR frame into a pooled canvas; returns ``(canvas, scale, (pad_x, pad_y))``
+
+    The frame is resized straight into the canvas, and only the border is
+    filled, so each pixel is written once. Release the canvas to ``pool``.
+    """
+    height, width = image.shape[:2]
+    scale, (new_w, new_h), (out_w, out_h) = letterbox_geometry(height, width, size, stride, rect)
+    pad_x, pad_y = (out_w - new_w) // 2, (out_h - new_h) // 2
+
+    canvas = pool.acquire((out_h, out_w) + image.shape[2:], image.dtype)
+    canvas[:pad_y] = LETTERBOX_COLOR
+    canvas[pad_y + new_h:] = LETTERBOX_COLOR
+    canvas[pad_y:pad_y + new_h, :pad_x] = LETTERBOX_COLOR
+    canvas[pad_y:pad_y + new_h, pad_x + new_w:] = LETTERBOX_COLOR
+
+    region = canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w]
+    if (new_w, new_h) == (width, height):
+        np.copyto(region, image)
+    else:
+        cv2.resize(image, (new_w, new_h), dst=region, interpolation=cv2.INTER_LINEAR)
+    return canvas, scale, (pad_x, pad_y)
+
+
+def to_tensor(canvases: List[np.ndarray], pool: BufferPool = frame_pool) -> np.ndarray:
+    """Stack same-shape BGR uint8 canvases into a pooled float32 NCHW RGB tensor in [0, 1]
+
+    Color swap, HWC to CHW transpose, float conversion and normalization
+    happen in a single vectorized pass per frame, writing straight into the
+    pooled tensor. Release the tensor to ``pool`` after inference.
+    """
+    height, width = canvases[0].shape[:2]
+    tensor = pool.acquire((len(canvases), 3, height, width), np.float32)
+    for index, canvas in enumerate(canvases):
+        np.multiply(canvas[..., ::-1].transpose(2, 0, 1), PIXEL_SCALE, out=tensor[index], casting='unsafe')
+    return tensor
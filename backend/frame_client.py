@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Local Frame Client
+Sends camera frames to the detection server through shared memory, or over HTTP when it cannot
+
+    from frame_client import LocalFrameClient
+
+    cap = cv2.VideoCapture(0)
+    with LocalFrameClient('CAM-007', confidence=0.6, location='Gate') as client:
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            client.send(frame)
+
+On the server host, frames are written raw into a shared-memory ring that
+the server reads in place; detections then arrive over Socket.IO like any
+other camera's. When the server is remote, refuses the ring or stops
+reading it, each frame is posted to ``/detect`` as a JPEG instead and the
+detection response is returned.
+"""
+
+import base64
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import cv2
+import numpy as np
+
+from shared_frames import DEFAULT_SLOTS, HEARTBEAT_TIMEOUT, FrameRingWriter, SharedFrameError, available, ring_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVER_URL = 'http://localhost:5000'
+RETRY_SECONDS = 10.0            # Wait before trying shared memory again after it failed
+JPEG_QUALITY = 80
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+
+class LocalFrameClient:
+    """Frame sender for one camera, preferring shared memory over the network path"""
+
+    def __init__(self, camera_id: str, server_url: str = DEFAULT_SERVER_URL, confidence: float = 0.5,
+                 location: Optional[str] = None, fusion: bool = True, clips: bool = True,
+                 slots: int = DEFAULT_SLOTS, shared: bool = True, timeout: float = 5.0):
+        self.camera_id = camera_id
+        self.server_url = server_url.rstrip('/')
+        self.options = {'confidence': confidence, 'fusion': fusion, 'location': location, 'clips': clips}
+        self.slots = slots
+        self.timeout = timeout
+        self.shared = shared and available() and urlparse(self.server_url).hostname in LOCAL_HOSTS
+        self.writer: Optional[FrameRingWriter] = None
+        self._generation = 0
+        self._attached_at = 0.0
+        self._retry_at = 0.0
+        self.stats = {'shared': 0, 'network': 0, 'attaches': 0, 'fallbacks': 0}
+
+    @property
+    def transport(self) -> str:
+        return 'shared_memory' if self.writer is not None else 'network'
+
+    def _post(self, path: str, payload: Dict) -> Dict:
+        request = urllib.request.Request(f"{self.server_url}{path}", data=json.dumps(payload).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def _open_ring(self, frame: np.ndarray) -> bool:
+        """Create a ring sized for ``frame`` and ask the server to read it"""
+        self._generation += 1
+        try:
+            self.writer = FrameRingWriter(self.camera_id, frame.shape, self.slots,
+                                          name=ring_name(self.camera_id, self._generation))
+            self._post('/local/attach', {'camera_id': self.camera_id, 'ring': self.writer.name, **self.options})
+        except (SharedFrameError, OSError, ValueError) as e:
+            logger.warning(f"Shared memory unavailable for {self.camera_id}, using the network path: {e}")
+            self._close_ring()
+            self._retry_at = time.time() + RETRY_SECONDS
+            self.stats['fallbacks'] += 1
+            return False
+        self._attached_at = time.time()
+        self.stats['attaches'] += 1
+        logger.info(f"🔗 {self.camera_id} sending frames through shared memory ({self.writer.name})")
+        return True
+
+    def _close_ring(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def _shared_ready(self, frame: np.ndarray) -> bool:
+        if not self.shared:
+            return False
+        if self.writer is not None:
+            if frame.nbytes > self.writer.capacity:
+                # Resolution went up; replace the ring with a bigger one
+                self._close_ring()
+            elif self.writer.reader_alive() or time.time() - self._attached_at < HEARTBEAT_TIMEOUT:
+                return True
+            else:
+                logger.warning(f"Server stopped reading {self.camera_id}'s ring; reattaching")
+                self._close_ring()
+        if time.time() < self._retry_at:
+            return False
+        return self._open_ring(frame)
+
+    def send(self, frame: np.ndarray, timestamp: Optional[float] = None) -> Optional[Dict]:
+        """Hand one BGR frame to the server
+
+        Returns None when it went through shared memory (results are
+        broadcast over Socket.IO), or the ``/detect`` response otherwise.
+        """
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        if self._shared_ready(frame):
+            try:
+                self.writer.write(frame, timestamp)
+                self.stats['shared'] += 1
+                return None
+            except SharedFrameError as e:
+                logger.warning(f"Could not write {self.camera_id}'s frame to shared memory: {e}")
+                self._close_ring()
+                self._retry_at = time.time() + RETRY_SECONDS
+                self.stats['fallbacks'] += 1
+        return self._send_network(frame)
+
+    def _send_network(self, frame: np.ndarray) -> Dict:
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if not ok:
+            raise ValueError("Failed to encode frame")
+        payload = {'image': base64.b64encode(buffer.tobytes()).decode('ascii'), 'camera_id': self.camera_id,
+                   'confidence': self.options['confidence'], 'fusion': self.options['fusion']}
+        if self.options['location']:
+            payload['location'] = self.options['location']
+        self.stats['network'] += 1
+        try:
+            return self._post('/detect', payload)
+        except urllib.error.HTTPError as e:
+            # Dropped frames (429) and server errors still carry a JSON body
+            return json.loads(e.read().decode('utf-8') or '{}')
+
+    def close(self):
+        """Detach from the server and remove the ring"""
+        if self.writer is not None:
+            try:
+                self._post('/local/detach', {'camera_id': self.camera_id})
+            except (OSError, ValueError):
+                pass
+            self._close_ring()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Frame Streams
+Bounded prefetching pipelines that feed frames from any source to batched inference
+"""
+
+import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class _Failure:
+    """Carries an exception from the prefetch thread to the consumer"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def probe_video(source: Union[str, int]) -> Dict:
+    """Frame rate, frame count and size of a video file or camera (0 when unknown)"""
+    capture = cv2.VideoCapture(source)
+    try:
+        return {
+            'fps': capture.get(cv2.CAP_PROP_FPS) or 0.0,
+            'frames': max(int(capture.get(cv2.CAP_PROP_FRAME_COUNT)), 0),
+            'width': int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        }
+    finally:
+        capture.release()
+
+
+def capture_frames(source: Union[str, int], start: int = 0, stride: int = 1) -> Iterator[Tuple[int, Optional[float], np.ndarray]]:
+    """Yield ``(index, timestamp, frame)`` from a video file, camera index or stream URL
+
+    Frames skipped by ``stride`` are only grabbed, not decoded. ``timestamp``
+    is the position in seconds, or None when the source reports no frame rate.
+    """
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video source {source}")
+    stride = max(1, stride)
+    fps = capture.get(cv2.CAP_PROP_FPS) or None
+    try:
+        index = start
+        if start:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+        while capture.grab():
+            if index % stride == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                yield index, index / fps if fps else None, frame
+            index += 1
+    finally:
+        capture.release()
+
+
+def split_item(item, position: int) -> Tuple[Any, Any]:
+    """Items are frames, or tuples whose last element is the frame and the rest a tag"""
+    if isinstance(item, tuple):
+        return (item[0] if len(item) == 2 else item[:-1]), item[-1]
+    return position, item
+
+
+class Prefetcher:
+    """Pulls items from an iterator on a background thread into a bounded queue
+
+    At most ``depth`` items wait in memory. With ``decode`` each item's payload
+    (a path, JPEG bytes, ...) is turned into a frame on ``decoders`` threads,
+    in order; payloads that decode to None are skipped. ``latest_only`` is for
+    live sources: instead of blocking the source when the consumer falls
+    behind, the oldest waiting item is dropped. Errors raised by the source are
+    re-raised in the consumer.
+    """
+
+    def __init__(self, items: Iterable, depth: int = 16, stride: int = 1,
+                 decode: Optional[Callable[[Any], Optional[np.ndarray]]] = None,
+                 decoders: int = 1, latest_only: bool = False):
+        self.depth = max(1, depth)
+        self.stride = max(1, stride)
+        self.decode = decode
+        self.decoders = max(1, decoders)
+        self.latest_only = latest_only
+        self.dropped = 0
+        self._items = items
+        self._queue: queue.Queue = queue.Queue(maxsize=self.depth)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        latest_only = self.latest_only and item is not _END and not isinstance(item, _Failure)
+        while not self._stop.is_set():
+            try:
+                if latest_only:
+                    self._queue.put_nowait(item)
+                else:
+                    self._queue.put(item, timeout=0.25)
+                return True
+            except queue.Full:
+                if latest_only:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        return False
+
+    def _tagged(self) -> Iterator[Tuple[Any, Any]]:
+        for position, item in enumerate(self._items):
+            if self._stop.is_set():
+                return
+            if position % self.stride == 0:
+                yield split_item(item, position)
+
+    def _run(self):
+        try:
+            if self.decode is None:
+                for tag, frame in self._tagged():
+                    if not self._put((tag, frame)):
+                        return
+            else:
+                self._run_decoders()
+        except Exception as e:
+            self._put(_Failure(e))
+            return
+        self._put(_END)
+
+    def _run_decoders(self):
+        with ThreadPoolExecutor(max_workers=self.decoders) as pool:
+            pending: deque = deque()
+
+            def hand_over() -> bool:
+                tag, future = pending.popleft()
+                frame = future.result()
+                if frame is None:
+                    logger.warning(f"Skipping undecodable frame {tag}")
+                    return True
+                return self._put((tag, frame))
+
+            for tag, payload in self._tagged():
+                pending.append((tag, pool.submit(self.decode, payload)))
+                # Keep a small window decoding ahead and hand frames over in order
+                if len(pending) > self.decoders * 2 and not hand_over():
+                    return
+            while pending:
+                if not hand_over():
+                    return
+
+    def __iter__(self) -> Iterator[Tuple[Any, np.ndarray]]:
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterator into lists of up to ``size`` items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Geofence and Proximity Engine
+Geo-tags camera detections and joins them with live soldier positions and configured geofences
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from location_service import EARTH_RADIUS_M, haversine_m, soldier_payload
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAMERAS_PATH = os.environ.get('RAKSHAK_CAMERAS', 'cameras.json')
+DEFAULT_GEOFENCES_PATH = os.environ.get('RAKSHAK_GEOFENCES', 'geofences.json')
+DEFAULT_THREAT_TTL = 30.0          # Seconds a geo-tagged threat stays active without being seen
+DEFAULT_NEAREST_UNITS = 3
+AVAILABLE_STATUSES = ('active', 'standby')
+
+# Detection type -> (ThreatLocation type, severity)
+THREAT_CLASSES = {
+    'weapon': ('weapon', 'critical'),
+    'drone': ('drone', 'high'),
+    'person': ('intrusion', 'medium'),
+    'vehicle': ('vehicle', 'medium')
+}
+
+
+def destination_point(lat: float, lng: float, bearing_deg: float, distance_m: float) -> Tuple[float, float]:
+    """Point reached from (lat, lng) travelling ``distance_m`` along ``bearing_deg``"""
+    delta = distance_m / EARTH_RADIUS_M
+    theta = math.radians(bearing_deg)
+    phi1, lmb1 = math.radians(lat), math.radians(lng)
+    phi2 = math.asin(math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta))
+    lmb2 = lmb1 + math.atan2(math.sin(theta) * math.sin(delta) * math.cos(phi1),
+                             math.cos(delta) - math.sin(phi1) * math.sin(phi2))
+    return math.degrees(phi2), (math.degrees(lmb2) + 540) % 360 - 180
+
+
+def point_in_polygon(lat: float, lng: float, polygon: List[List[float]]) -> bool:
+    """Ray-casting test for a ``[[lat, lng], ...]`` polygon"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lng_i = polygon[i]
+        lat_j, lng_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing = (lng_j - lng_i) * (lat - lat_i) / (lat_j - lat_i) + lng_i
+            if lng < crossing:
+                inside = not inside
+        j = i
+    return inside
+
+
+def normalize_geofence(fence: Dict) -> Dict:
+    """Validate a geofence and precompute its bounding box"""
+    polygon = [[float(lat), float(lng)] for lat, lng in fence['polygon']]
+    if len(polygon) < 3:
+        raise ValueError(f"Geofence {fence.get('id')} needs at least 3 points")
+    return {
+        'id': str(fence['id']),
+        'name': fence.get('name', str(fence['id'])),
+        'polygon': polygon,
+        'threat_types': list(fence.get('threat_types', list(THREAT_CLASSES))),
+        'watch_units': bool(fence.get('watch_units', False)),
+        'severity': fence.get('severity', 'high'),
+        'bbox': (min(p[0] for p in polygon), min(p[1] for p in polygon),
+                 max(p[0] for p in polygon), max(p[1] for p in polygon))
+    }
+
+
+class GeoEngine:
+    """Incremental threat geo-tagging, geofence evaluation and nearest-unit assignment
+
+    Camera detections are projected onto the map from the camera's configured
+    position, heading, field of view and range. Each threat track is kept for
+    ``threat_ttl`` seconds; events are only produced when something changes
+    (a new threat, a geofence entry, a different nearest unit), both when
+    detections arrive and when soldier positions move.
+    """
+
+    def __init__(self, soldier_index, cameras_path: str = DEFAULT_CAMERAS_PATH,
+                 geofences_path: str = DEFAULT_GEOFENCES_PATH,
+                 nearest_units: int = DEFAULT_NEAREST_UNITS, threat_ttl: float = DEFAULT_THREAT_TTL):
+        self.soldier_index = soldier_index
+        self.cameras_path = cameras_path
+        self.geofences_path = geofences_path
+        self.nearest_units = nearest_units
+        self.threat_ttl = threat_ttl
+        self.cameras: Dict[str, Dict] = {}
+        self.geofences: List[Dict] = []
+        self._threats: Dict[str, Dict] = {}
+        self._unit_fences: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        for path, setter in ((self.cameras_path, self.set_cameras), (self.geofences_path, self.set_geofences)):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r') as f:
+                    setter(json.load(f), persist=False)
+            except Exception as e:
+                logger.warning(f"Could not read {path}: {e}")
+
+    @staticmethod
+    def _save(path: str, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def set_cameras(self, cameras: Dict, persist: bool = True):
+        """Configure camera placement: ``{camera_id: {lat, lng, heading, fov, range_m, min_range_m}}``"""
+        parsed = {}
+        for camera_id, camera in cameras.items():
+            parsed[str(camera_id)] = {
+                'lat': float(camera['lat']),
+                'lng': float(camera['lng']),
+                'heading': float(camera.get('heading', 0.0)),
+                'fov': float(camera.get('fov', 60.0)),
+                'range_m': float(camera.get('range_m', 100.0)),
+                'min_range_m': float(camera.get('min_range_m', 5.0)),
+                'location': camera.get('location')
+            }
+        with self._lock:
+            self.cameras = parsed
+        if persist:
+            self._save(self.cameras_path, parsed)
+
+    def set_geofences(self, geofences: List[Dict], persist: bool = True):
+        """Configure geofence polygons; ``watch_units`` fences also alert on soldiers entering"""
+        parsed = [normalize_geofence(fence) for fence in geofences]
+        with self._lock:
+            self.geofences = parsed
+            self._unit_fences.clear()
+        if persist:
+            self._save(self.geofences_path, [{k: v for k, v in f.items() if k != 'bbox'} for f in parsed])
+
+    def _fences_containing(self, lat: float, lng: float, threat_type: Optional[str] = None,
+                           units: bool = False) -> List[Dict]:
+        matches = []
+        for fence in self.geofences:
+            south, west, north, east = fence['bbox']
+            if not (south <= lat <= north and west <= lng <= east):
+                continue
+            if units and not fence['watch_units']:
+                continue
+            if threat_type and threat_type not in fence['threat_types']:
+                continue
+            if point_in_polygon(lat, lng, fence['polygon']):
+                matches.append(fence)
+        return matches
+
+    def geotag(self, camera_id: str, detection: Dict, frame_width: int, frame_height: int) -> Optional[Tuple[float, float]]:
+        """Estimate a detection's map position from the camera's pose
+
+        Bearing comes from the box centre's horizontal offset within the field of
+        view; distance from how high the box's bottom edge sits in the frame
+        (bottom of frame = ``min_range_m``, horizon = ``range_m``).
+        """
+        camera = self.cameras.get(camera_id)
+        if camera is None or frame_width <= 0 or frame_height <= 0:
+            return None
+        bbox = detection['bbox']
+        center_x = (bbox['x'] + bbox['width'] / 2) / frame_width
+        bottom_y = min(1.0, max(0.0, (bbox['y'] + bbox['height']) / frame_height))
+        bearing = camera['heading'] + (center_x - 0.5) * camera['fov']
+        distance = camera['min_range_m'] + (camera['range_m'] - camera['min_range_m']) * (1.0 - bottom_y)
+        return destination_point(camera['lat'], camera['lng'], bearing, distance)
+
+    def _nearest(self, lat: float, lng: float) -> List[Dict]:
+        units = self.soldier_index.nearest(lat, lng, k=self.nearest_units, statuses=AVAILABLE_STATUSES)
+        return [{'id': u['id'], 'name': u['name'], 'unit': u['unit'], 'status': u['status'],
+                 'position': {'lat': u['lat'], 'lng': u['lng']}, 'distanceMeters': u['distance_m']}
+                for u in units]
+
+    @staticmethod
+    def _threat_payload(threat: Dict) -> Dict:
+        return {
+            'id': threat['id'],
+            'camera_id': threat['camera_id'],
+            'position': {'lat': threat['lat'], 'lng': threat['lng']},
+            'type': threat['type'],
+            'severity': threat['severity'],
+            'timestamp': int(threat['last_seen'] * 1000),
+            'description': threat['description'],
+            'geofences': [f['id'] for f in threat['fences']],
+            'nearestUnits': threat['nearest']
+        }
+
+    def process_detections(self, camera_id: str, detections: List[Dict], frame_width: int,
+                           frame_height: int, timestamp: Optional[float] = None) -> List[Tuple[str, Dict]]:
+        """Geo-tag threat detections and return the events they cause"""
+        timestamp = timestamp or time.time()
+        events = []
+        with self._lock:
+            if camera_id not in self.cameras:
+                return events
+            for detection in detections:
+                if detection['type'] not in THREAT_CLASSES:
+                    continue
+                position = self.geotag(camera_id, detection, frame_width, frame_height)
+                if position is None:
+                    continue
+                lat, lng = position
+                threat_type, severity = THREAT_CLASSES[detection['type']]
+                threat_id = f"{camera_id}:{detection.get('track_id', detection['id'])}"
+                fences = self._fences_containing(lat, lng, detection['type'])
+                nearest = self._nearest(lat, lng)
+
+                previous = self._threats.get(threat_id)
+                threat = {
+                    'id': threat_id,
+                    'camera_id': camera_id,
+                    'lat': lat,
+                    'lng': lng,
+                    'type': threat_type,
+                    'severity': severity,
+                    'first_seen': previous['first_seen'] if previous else timestamp,
+                    'last_seen': timestamp,
+                    'description': f"{detection.get('original_class', detection['type'])} "
+                                   f"({detection['confidence']:.0%}) on camera {camera_id}",
+                    'fences': fences,
+                    'nearest': nearest
+                }
+                self._threats[threat_id] = threat
+                payload = self._threat_payload(threat)
+
+                old_fences = {f['id'] for f in previous['fences']} if previous else set()
+                for fence in fences:
+                    if fence['id'] not in old_fences:
+                        events.append(('geofence_alert', {
+                            'kind': 'threat_entered', 'geofence': fence['id'], 'name': fence['name'],
+                            'severity': fence['severity'], 'threat': payload, 'timestamp': timestamp
+                        }))
+
+                old_nearest = previous['nearest'][0]['id'] if previous and previous['nearest'] else None
+                new_nearest = nearest[0]['id'] if nearest else None
+                if previous is None or old_nearest != new_nearest:
+                    events.append(('proximity_alert', {'threat': payload, 'timestamp': timestamp}))
+
+            self._expire(timestamp)
+        return events
+
+    def process_soldier_updates(self, records: List[Dict], timestamp: Optional[float] = None) -> List[Tuple[str, Dict]]:
+        """Re-evaluate unit geofences and nearest-unit assignments after positions move"""
+        timestamp = timestamp or time.time()
+        events = []
+        with self._lock:
+            for record in records:
+                inside = {f['id']: f for f in self._fences_containing(record['lat'], record['lng'], units=True)}
+                previous = self._unit_fences.get(record['id'], set())
+                for fence_id in inside.keys() - previous:
+                    events.append(('geofence_alert', {
+                        'kind': 'unit_entered', 'geofence': fence_id, 'name': inside[fence_id]['name'],
+                        'severity': inside[fence_id]['severity'], 'unit': soldier_payload(record),
+                        'timestamp': timestamp
+                    }))
+                for fence_id in previous - inside.keys():
+                    events.append(('geofence_alert', {
+                        'kind': 'unit_exited', 'geofence': fence_id, 'unit': soldier_payload(record),
+                        'timestamp': timestamp
+                    }))
+                self._unit_fences[record['id']] = set(inside)
+
+            self._expire(timestamp)
+            if not records or not self._threats:
+                return events
+
+            # Only threats the moved units could now be nearest to need a new query
+            for threat in self._threats.values():
+                current = threat['nearest']
+                farthest = current[-1]['distanceMeters'] if len(current) >= self.nearest_units else float('inf')
+                assigned = {u['id'] for u in current}
+                affected = any(
+                    r['id'] in assigned or haversine_m(threat['lat'], threat['lng'], r['lat'], r['lng']) < farthest
+                    for r in records
+                )
+                if not affected:
+                    continue
+                nearest = self._nearest(threat['lat'], threat['lng'])
+                old_ids = [u['id'] for u in current]
+                threat['nearest'] = nearest
+                if [u['id'] for u in nearest] != old_ids:
+                    events.append(('proximity_alert', {'threat': self._threat_payload(threat), 'timestamp': timestamp}))
+        return events
+
+    def _expire(self, now: float):
+        for threat_id in [t for t, threat in self._threats.items() if now - threat['last_seen'] > self.threat_ttl]:
+            del self._threats[threat_id]
+
+    def active_threats(self, bbox: Optional[Tuple[float, float, float, float]] = None) -> List[Dict]:
+        """Geo-tagged threats still active, optionally limited to a viewport"""
+        with self._lock:
+            self._expire(time.time())
+            threats = list(self._threats.values())
+        if bbox is not None:
+            south, west, north, east = bbox
+            threats = [t for t in threats if south <= t['lat'] <= north and
+                       (west <= t['lng'] <= east if west <= east else (t['lng'] >= west or t['lng'] <= east))]
+        return [self._threat_payload(t) for t in threats]
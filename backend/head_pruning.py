@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Detection Head Pruning
+Builds class-subset variants of trained weights and exports them for direct inference
+
+    python head_pruning.py ../yolo/runs/detect/detect3_resume2/weights/best.pt --classes weapon_watch
+
+The last 1x1 convolution of each classification branch in the YOLOv8 Detect
+head is cut down to the subset's output channels, so the exported network
+only scores (and sigmoid-activates, concatenates and returns) those classes.
+The pruned weights are saved as ``<stem>_<subset>.pt`` next to the source and
+exported to ONNX beside them; both are registered so cameras can be routed
+to the export with ``/admin/routes``.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from copy import deepcopy
+from typing import Dict, List, Optional, Sequence
+
+from class_subsets import SUBSET_PRESETS, parse_subset, subset_class_ids, subset_from_args
+from model_registry import ModelRegistry, model_name_for_path
+
+logger = logging.getLogger(__name__)
+
+def prune_detection_head(model, class_ids: Sequence[int]):
+    """Keep only ``class_ids`` in the Detect head of a loaded Ultralytics YOLO model, in place
+
+    Class ``class_ids[i]`` becomes class ``i``; names are renumbered to match.
+    Box regression branches are untouched.
+    """
+    import torch
+    from torch import nn
+
+    network = model.model
+    head = network.model[-1]
+    if not hasattr(head, 'cv3') or not hasattr(head, 'reg_max'):
+        raise ValueError(f"{type(head).__name__} is not a YOLOv8 Detect head")
+    index = torch.tensor(list(class_ids), dtype=torch.long)
+    for branch in head.cv3:
+        conv = branch[-1]
+        pruned = nn.Conv2d(conv.in_channels, len(class_ids), conv.kernel_size, conv.stride,
+                           conv.padding, bias=conv.bias is not None).to(conv.weight.device, conv.weight.dtype)
+        pruned.weight.data = conv.weight.data[index].clone()
+        if conv.bias is not None:
+            pruned.bias.data = conv.bias.data[index].clone()
+        branch[-1] = pruned
+
+    head.nc = len(class_ids)
+    head.no = head.nc + head.reg_max * 4
+    head.shape = None  # Anchors are rebuilt on the next forward pass
+    names = {new_id: network.names[old_id] for new_id, old_id in enumerate(class_ids)}
+    network.names = names
+    if isinstance(getattr(network, 'yaml', None), dict):
+        network.yaml['nc'] = head.nc
+    return model
+
+
+def build_pruned_export(weights_path: str, classes, class_mapping: Dict[str, str], label: str,
+                        imgsz: int = 640,
+                        registry: Optional[ModelRegistry] = None) -> Dict:
+    """Prune ``weights_path`` to a class subset, save it, export it and register both"""
+    import torch
+    from ultralytics import YOLO
+
+    subset = parse_subset(classes)
+    if subset is None:
+        raise ValueError("Pruning needs a class subset, not 'all'")
+    model = YOLO(weights_path)
+    class_ids = subset_class_ids(model.names, subset, class_mapping)
+    if not class_ids:
+        raise ValueError(f"No classes of {weights_path} match {subset}")
+    logger.info(f"✂️  Pruning {weights_path} to {len(class_ids)}/{len(model.names)} classes: "
+                f"{[model.names[i] for i in class_ids]}")
+    prune_detection_head(model, class_ids)
+
+    # Save the pruned weights first so the export is written next to them, not over the original export
+    stem = os.path.splitext(weights_path)[0]
+    pruned_path = f"{stem}_{label}.pt"
+    network = model.model
+    torch.save({'model': deepcopy(network).half(), 'train_args': dict(getattr(network, 'args', {}) or {})},
+               pruned_path)
+    network.pt_path = pruned_path
+    export_path = model.export(format='onnx', imgsz=imgsz)
+
+    registry = registry or ModelRegistry()
+    name = f"{model_name_for_path(weights_path)}_{label}"
+    entry = registry.register(pruned_path, name=name)
+    registry.record_class_names(entry, network.names)
+    export_entry = registry.register(export_path, name=f"{name}_onnx")
+    registry.record_class_names(export_entry, network.names)
+    registry.save()
+    logger.info(f"✅ Pruned model saved to {pruned_path}, exported to {export_path}")
+    return {'weights': pruned_path, 'export': export_path, 'name': export_entry['name'],
+            'classes': [network.names[i] for i in sorted(network.names)]}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Prune a YOLOv8 detection head to a class subset and export it')
+    parser.add_argument('weights', help='Trained .pt weights')
+    parser.add_argument('--classes', nargs='+', required=True,
+                        help=f"A preset ({', '.join(p for p in SUBSET_PRESETS if p != 'all')}) "
+                             "or application types / model class names")
+    parser.add_argument('--name', help='Suffix for the pruned files (default: the preset or joined names)')
+    parser.add_argument('--imgsz', type=int, default=640)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    classes = subset_from_args(args.classes)
+    label = args.name or (classes if isinstance(classes, str) else '-'.join(sorted(c.lower() for c in classes)))
+    from detector import YOLODetector  # Same class_mapping the server uses
+
+    try:
+        result = build_pruned_export(args.weights, classes, YOLODetector.DEFAULT_CLASS_MAPPING, label,
+                                     imgsz=args.imgsz)
+    except ValueError as e:
+        parser.error(str(e))
+    logger.info(f"Route cameras to it with: PUT /admin/routes "
+                f"{{\"routes\": [{{\"camera\": \"<pattern>\", \"model\": \"{result['name']}\"}}]}}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Inference Scheduler
+Weighted fair queuing of detection requests across cameras in front of the model,
+with frames admitted together run as one batch
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from serving import run_blocking
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS_PATH = os.environ.get('RAKSHAK_CAMERA_SETTINGS', 'camera_settings.json')
+INFERENCE_WORKERS = int(os.environ.get('RAKSHAK_INFERENCE_WORKERS', '1'))
+INFERENCE_BATCH = int(os.environ.get('RAKSHAK_INFERENCE_BATCH', '4'))  # Most frames per forward pass
+MAX_QUEUE_PER_CAMERA = 2        # Older waiting frames are dropped beyond this
+MAX_WAIT_SECONDS = 10.0
+BOOST_SECONDS = 30.0            # How long a threat keeps a camera boosted
+BOOST_FACTOR = 4.0
+STATS_ALPHA = 0.2
+
+# Priority -> (default weight, guaranteed minimum fps)
+PRIORITY_CLASSES = {
+    'critical': (4.0, 2.0),
+    'high': (2.0, 1.0),
+    'normal': (1.0, 0.5),
+    'low': (0.5, 0.2)
+}
+DEFAULT_PRIORITY = 'normal'
+
+
+class FrameDropped(Exception):
+    """A queued frame was superseded by a newer one or waited too long"""
+
+
+class BatchRequest:
+    __slots__ = ('image', 'event', 'result', 'seconds', 'lead')
+
+    def __init__(self, image):
+        self.image = image
+        self.event = threading.Event()
+        self.result: Optional[List[Dict]] = None
+        self.seconds = 0.0
+        self.lead = False
+
+
+class InferenceBatcher:
+    """Runs frames waiting for the same model and settings as one ``detect_batch`` call
+
+    Batching is opportunistic: the first frame for a model runs at once, and
+    frames that arrive while it runs (from any camera) are collected and run
+    together as the next batch, so a lone camera never waits for a batch to
+    fill. At most ``workers`` batches run at a time.
+    """
+
+    def __init__(self, workers: int = INFERENCE_WORKERS, max_batch: int = INFERENCE_BATCH):
+        self.max_batch = max(1, max_batch)
+        self._runs = threading.Semaphore(max(1, workers))
+        self._pending: Dict[Tuple, List[BatchRequest]] = {}
+        self._running: set = set()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.frames = 0
+
+    def detect(self, detector, image, confidence_threshold: float, classes: Optional[Sequence[str]] = None,
+               imgsz: Optional[int] = None) -> Tuple[List[Dict], float]:
+        """Detections for one frame and its share of the batch's inference seconds"""
+        key = (id(detector), confidence_threshold, tuple(classes) if classes else None, imgsz)
+        request = BatchRequest(image)
+        with self._lock:
+            self._pending.setdefault(key, []).append(request)
+            if key not in self._running:
+                self._running.add(key)
+                request.lead = True
+        if not request.lead:
+            request.event.wait()
+        if request.result is None:
+            # Handed the lead: this frame heads the pending list, so it is in the next batch
+            self._run_batch(key, detector, confidence_threshold, classes, imgsz)
+        return request.result, request.seconds
+
+    def _run_batch(self, key: Tuple, detector, confidence_threshold: float, classes, imgsz):
+        with self._lock:
+            batch = self._pending[key][:self.max_batch]
+            del self._pending[key][:self.max_batch]
+
+        with self._runs:
+            start = time.time()
+            try:
+                results = run_blocking(detector.detect_batch, [r.image for r in batch], confidence_threshold,
+                                       classes, imgsz)
+            except Exception as e:
+                logger.error(f"Error during batched object detection: {e}")
+                results = [[] for _ in batch]
+            seconds = (time.time() - start) / len(batch)
+
+        with self._lock:
+            self.batches += 1
+            self.frames += len(batch)
+            # Frames that arrived meanwhile are next; the first of them leads that batch
+            if self._pending[key]:
+                self._pending[key][0].lead = True
+                self._pending[key][0].event.set()
+            else:
+                del self._pending[key]
+                self._running.discard(key)
+        for request, detections in zip(batch, results):
+            request.result = detections
+            request.seconds = seconds
+            request.event.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'max_batch': self.max_batch,
+                'batches': self.batches,
+                'frames': self.frames,
+                'mean_batch': round(self.frames / self.batches, 2) if self.batches else 0.0
+            }
+
+
+class Ticket:
+    __slots__ = ('camera_id', 'arrived', 'event', 'granted', 'dropped')
+
+    def __init__(self, camera_id: str):
+        self.camera_id = camera_id
+        self.arrived = time.time()
+        self.event = threading.Event()
+        self.granted = False
+        self.dropped = False
+
+
+class InferenceScheduler:
+    """Grants inference slots to waiting requests by weighted fair queuing
+
+    The head frame of each camera's queue gets start-time fair queuing tags
+    (one unit of work divided by the camera's effective weight), so a weight 4
+    camera is served four times as often as a weight 1 camera when both are
+    backlogged.
+    Cameras behind their guaranteed ``min_fps`` are served first, cameras with
+    an active threat run with ``BOOST_FACTOR`` times their weight for
+    ``BOOST_SECONDS``, and each camera keeps at most ``MAX_QUEUE_PER_CAMERA``
+    waiting frames so stale frames are dropped rather than served late.
+    Up to ``batch_size`` frames are admitted per worker; ``batcher`` runs the
+    ones that share a model together.
+    """
+
+    def __init__(self, workers: int = INFERENCE_WORKERS, settings_path: str = DEFAULT_SETTINGS_PATH,
+                 batch_size: int = INFERENCE_BATCH):
+        self.workers = max(1, workers)
+        self.batcher = InferenceBatcher(self.workers, batch_size)
+        self.slots = self.workers * self.batcher.max_batch
+        self.settings_path = settings_path
+        self.settings: Dict[str, Dict] = {}
+        self._queues: Dict[str, Deque[Ticket]] = {}
+        self._last_finish: Dict[str, float] = {}
+        self._boost_until: Dict[str, float] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._virtual_time = 0.0
+        self._busy = 0
+        self._lock = threading.Lock()
+        if os.path.exists(settings_path):
+            try:
+                with open(settings_path, 'r') as f:
+                    self.set_settings(json.load(f), persist=False)
+            except Exception as e:
+                logger.warning(f"Could not read camera settings {settings_path}: {e}")
+
+    def set_settings(self, settings: Dict[str, Dict], persist: bool = True):
+        """Replace per-camera ``{priority, weight, min_fps}`` settings"""
+        parsed = {}
+        for camera_id, camera in settings.items():
+            priority = camera.get('priority', DEFAULT_PRIORITY)
+            if priority not in PRIORITY_CLASSES:
+                raise ValueError(f"Unknown priority '{priority}' for camera {camera_id}")
+            weight, min_fps = PRIORITY_CLASSES[priority]
+            parsed[str(camera_id)] = {
+                'priority': priority,
+                'weight': float(camera.get('weight', weight)),
+                'min_fps': float(camera.get('min_fps', min_fps))
+            }
+            if parsed[str(camera_id)]['weight'] <= 0:
+                raise ValueError(f"Weight for camera {camera_id} must be positive")
+        with self._lock:
+            self.settings = parsed
+        if persist:
+            tmp_path = f"{self.settings_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(parsed, f, indent=2)
+            os.replace(tmp_path, self.settings_path)
+
+    def profile(self, camera_id: str, now: Optional[float] = None) -> Dict:
+        """Priority, configured weight, effective (boosted) weight and minimum fps"""
+        settings = self.settings.get(camera_id)
+        if settings is None:
+            weight, min_fps = PRIORITY_CLASSES[DEFAULT_PRIORITY]
+            settings = {'priority': DEFAULT_PRIORITY, 'weight': weight, 'min_fps': min_fps}
+        boosted = (now or time.time()) < self._boost_until.get(camera_id, 0.0)
+        return {
+            **settings,
+            'boosted': boosted,
+            'effective_weight': settings['weight'] * (BOOST_FACTOR if boosted else 1.0)
+        }
+
+    def boost(self, camera_id: str, seconds: float = BOOST_SECONDS):
+        """Temporarily raise a camera's share, e.g. while it sees a threat"""
+        with self._lock:
+            if time.time() >= self._boost_until.get(camera_id, 0.0):
+                logger.info(f"⚡ Boosting camera {camera_id} for {seconds:.0f}s")
+            self._boost_until[camera_id] = time.time() + seconds
+
+    def _camera_stats(self, camera_id: str) -> Dict:
+        stats = self._stats.get(camera_id)
+        if stats is None:
+            stats = self._stats[camera_id] = {
+                'served': 0, 'dropped': 0, 'wait_ms': 0.0, 'service_ms': 0.0,
+                'served_fps': 0.0, 'last_served': None
+            }
+        return stats
+
+    def _drop(self, ticket: Ticket):
+        ticket.dropped = True
+        self._camera_stats(ticket.camera_id)['dropped'] += 1
+        ticket.event.set()
+
+    def _dispatch(self):
+        """Hand free slots to the most deserving waiting tickets (lock held)"""
+        now = time.time()
+        while self._busy < self.slots:
+            heads = [q[0] for q in self._queues.values() if q]
+            if not heads:
+                return
+
+            # Tags are assigned at the head of the queue, so dropped frames cost nothing
+            candidates, overdue = [], []
+            for ticket in heads:
+                profile = self.profile(ticket.camera_id, now)
+                start_tag = max(self._virtual_time, self._last_finish.get(ticket.camera_id, 0.0))
+                finish_tag = start_tag + 1.0 / profile['effective_weight']
+                candidates.append((start_tag, finish_tag, ticket.arrived, ticket))
+
+                # Cameras below their guaranteed rate go first, most overdue first
+                last = self._camera_stats(ticket.camera_id)['last_served']
+                if profile['min_fps'] > 0 and last is not None and now - last > 1.0 / profile['min_fps']:
+                    overdue.append((now - last - 1.0 / profile['min_fps'], start_tag, finish_tag, ticket))
+            if overdue:
+                _, start_tag, finish_tag, ticket = max(overdue, key=lambda item: item[0])
+            else:
+                start_tag, finish_tag, _, ticket = min(candidates, key=lambda item: item[:3])
+
+            self._queues[ticket.camera_id].popleft()
+            self._last_finish[ticket.camera_id] = finish_tag
+            self._virtual_time = max(self._virtual_time, start_tag)
+            self._busy += 1
+            ticket.granted = True
+            ticket.event.set()
+
+    @contextmanager
+    def slot(self, camera_id: str):
+        """Wait for this camera's turn at the model; raises ``FrameDropped`` if superseded"""
+        ticket = Ticket(camera_id)
+        with self._lock:
+            queue = self._queues.setdefault(camera_id, deque())
+            queue.append(ticket)
+            while len(queue) > MAX_QUEUE_PER_CAMERA:
+                self._drop(queue.popleft())
+            self._dispatch()
+
+        if not ticket.event.wait(MAX_WAIT_SECONDS):
+            with self._lock:
+                if not ticket.granted:
+                    self._queues[camera_id].remove(ticket)
+                    self._drop(ticket)
+        if ticket.dropped:
+            raise FrameDropped(f"Frame from camera {camera_id} dropped by the scheduler")
+
+        started = time.time()
+        try:
+            yield
+        finally:
+            finished = time.time()
+            with self._lock:
+                self._busy -= 1
+                stats = self._camera_stats(camera_id)
+                stats['served'] += 1
+                stats['wait_ms'] += STATS_ALPHA * ((started - ticket.arrived) * 1000 - stats['wait_ms'])
+                stats['service_ms'] += STATS_ALPHA * ((finished - started) * 1000 - stats['service_ms'])
+                if stats['last_served'] is not None and started > stats['last_served']:
+                    stats['served_fps'] += STATS_ALPHA * (1.0 / (started - stats['last_served']) - stats['served_fps'])
+                stats['last_served'] = started
+                self._dispatch()
+
+    def stats(self) -> Dict:
+        """Queue and service statistics per camera"""
+        now = time.time()
+        with self._lock:
+            cameras: List[str] = sorted(set(self._stats) | set(self._queues) | set(self.settings))
+            return {
+                'workers': self.workers,
+                'slots': self.slots,
+                'busy': self._busy,
+                'batching': self.batcher.stats(),
+                'virtual_time': round(self._virtual_time, 3),
+                'cameras': {
+                    camera_id: {
+                        **self.profile(camera_id, now),
+                        'queued': len(self._queues.get(camera_id, ())),
+                        **{k: round(v, 2) if isinstance(v, float) else v
+                           for k, v in self._camera_stats(camera_id).items()}
+                    }
+                    for camera_id in cameras
+                }
+            }
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Soldier Location Service
+Latest soldier positions in memory with a uniform grid index for viewport and nearest-unit queries
+"""
+
+import heapq
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+EARTH_RADIUS_M = 6371000.0
+METERS_PER_DEGREE = 111320.0
+DEFAULT_CELL_DEGREES = 0.01   # ~1.1 km cells
+SOLDIER_STATUSES = ('active', 'standby', 'sos', 'offline')
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in metres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_bbox(value: str) -> Tuple[float, float, float, float]:
+    """Parse ``south,west,north,east`` into floats"""
+    parts = [float(p) for p in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox must be 'south,west,north,east'")
+    south, west, north, east = parts
+    if south > north:
+        raise ValueError("bbox south must not exceed north")
+    return south, west, north, east
+
+
+def normalize_soldier(data: Dict, previous: Optional[Dict] = None) -> Dict:
+    """Build a soldier record from an update, accepting camelCase or snake_case fields
+
+    Fields missing from a partial update keep their previous values.
+    """
+    record = dict(previous or {})
+    position = data.get('position') or {}
+    lat = position.get('lat', data.get('lat'))
+    lng = position.get('lng', data.get('lng'))
+    if lat is None or lng is None:
+        if previous is None:
+            raise ValueError(f"Soldier {data.get('id')} update has no position")
+    else:
+        lat, lng = float(lat), float(lng)
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError(f"Soldier {data.get('id')} position out of range")
+        record['lat'], record['lng'] = lat, lng
+
+    status = data.get('status', record.get('status', 'active'))
+    if status not in SOLDIER_STATUSES:
+        raise ValueError(f"Unknown soldier status '{status}'")
+
+    record.update({
+        'id': str(data['id']),
+        'name': data.get('name', record.get('name', str(data['id']))),
+        'unit': data.get('unit', record.get('unit', '')),
+        'status': status,
+        'battery_level': data.get('batteryLevel', data.get('battery_level', record.get('battery_level'))),
+        'heading': data.get('heading', record.get('heading')),
+        'speed': data.get('speed', record.get('speed')),
+        'last_update': float(data.get('timestamp', time.time()))
+    })
+    return record
+
+
+def soldier_payload(record: Dict) -> Dict:
+    """Serialize a record in the frontend's ``SoldierLocation`` shape"""
+    return {
+        'id': record['id'],
+        'name': record['name'],
+        'unit': record['unit'],
+        'position': {'lat': record['lat'], 'lng': record['lng']},
+        'status': record['status'],
+        'lastUpdate': int(record['last_update'] * 1000),
+        'batteryLevel': record['battery_level'],
+        'heading': record['heading'],
+        'speed': record['speed']
+    }
+
+
+class SoldierIndex:
+    """Latest position per soldier, bucketed in a uniform lat/lng grid
+
+    Updates move a soldier between cells in O(1). Viewport queries visit only
+    the cells overlapping the box (or only occupied cells when that is fewer),
+    and nearest-unit queries search rings of cells outward from the query
+    point until no unvisited cell can hold anything closer.
+    """
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._soldiers: Dict[str, Dict] = {}
+        self._cells: Dict[Tuple[int, int], set] = {}
+        self._lock = threading.RLock()
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def __len__(self) -> int:
+        return len(self._soldiers)
+
+    def get(self, soldier_id: str) -> Optional[Dict]:
+        with self._lock:
+            record = self._soldiers.get(soldier_id)
+            return dict(record) if record else None
+
+    def update_many(self, updates: Iterable[Dict]) -> Tuple[List[Dict], List[str]]:
+        """Apply position updates; returns the updated records and any per-item errors"""
+        updated, errors = [], []
+        with self._lock:
+            for data in updates:
+                try:
+                    soldier_id = str(data['id'])
+                    previous = self._soldiers.get(soldier_id)
+                    record = normalize_soldier(data, previous)
+                except (KeyError, TypeError, ValueError) as e:
+                    errors.append(str(e))
+                    continue
+
+                if previous is not None:
+                    old_cell = self._cell(previous['lat'], previous['lng'])
+                    members = self._cells.get(old_cell)
+                    if members is not None:
+                        members.discard(soldier_id)
+                        if not members:
+                            del self._cells[old_cell]
+                self._cells.setdefault(self._cell(record['lat'], record['lng']), set()).add(soldier_id)
+                self._soldiers[soldier_id] = record
+                updated.append(dict(record))
+        return updated, errors
+
+    def remove(self, soldier_id: str) -> bool:
+        with self._lock:
+            record = self._soldiers.pop(soldier_id, None)
+            if record is None:
+                return False
+            cell = self._cell(record['lat'], record['lng'])
+            self._cells[cell].discard(soldier_id)
+            if not self._cells[cell]:
+                del self._cells[cell]
+            return True
+
+    def query_bbox(self, south: float, west: float, north: float, east: float,
+                   statuses: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Soldiers inside a viewport; ``west > east`` means the box crosses the antimeridian"""
+        statuses = set(statuses) if statuses else None
+        lng_ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+
+        with self._lock:
+            row_min, row_max = self._cell(south, 0)[0], self._cell(north, 0)[0]
+            cells = []
+            for lng_lo, lng_hi in lng_ranges:
+                col_min, col_max = self._cell(0, lng_lo)[1], self._cell(0, lng_hi)[1]
+                if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self._cells):
+                    cells.extend(c for c in self._cells
+                                 if row_min <= c[0] <= row_max and col_min <= c[1] <= col_max)
+                else:
+                    cells.extend((r, c) for r in range(row_min, row_max + 1)
+                                 for c in range(col_min, col_max + 1) if (r, c) in self._cells)
+
+            results = []
+            for cell in cells:
+                for soldier_id in self._cells[cell]:
+                    record = self._soldiers[soldier_id]
+                    if not (south <= record['lat'] <= north):
+                        continue
+                    if not any(lo <= record['lng'] <= hi for lo, hi in lng_ranges):
+                        continue
+                    if statuses and record['status'] not in statuses:
+                        continue
+                    results.append(dict(record))
+                    if limit and len(results) >= limit:
+                        return results
+            return results
+
+    def nearest(self, lat: float, lng: float, k: int = 5, statuses: Optional[Iterable[str]] = None,
+                max_distance_m: Optional[float] = None) -> List[Dict]:
+        """The ``k`` closest soldiers to a point, each with ``distance_m``"""
+        statuses = set(statuses) if statuses else None
+        with self._lock:
+            if not self._cells:
+                return []
+            center_row, center_col = self._cell(lat, lng)
+            rows = [c[0] for c in self._cells]
+            cols = [c[1] for c in self._cells]
+            max_ring = max(abs(center_row - min(rows)), abs(center_row - max(rows)),
+                           abs(center_col - min(cols)), abs(center_col - max(cols)))
+
+            best: List[Tuple[float, str]] = []  # max-heap of (-distance, id)
+            for ring in range(max_ring + 1):
+                # Anything in this ring is at least (ring - 1) cells away along one axis
+                lat_extent = min(89.0, abs(lat) + (ring + 1) * self.cell_degrees)
+                ring_floor = max(0, ring - 1) * self.cell_degrees * METERS_PER_DEGREE \
+                    * math.cos(math.radians(lat_extent))
+                if len(best) >= k and ring_floor > -best[0][0]:
+                    break
+                if max_distance_m is not None and ring_floor > max_distance_m:
+                    break
+
+                if ring and 8 * ring > len(self._cells):
+                    # Rings now hold more cells than are occupied (e.g. a far-off
+                    # position): scan the remaining occupied cells once and stop
+                    cells = [c for c in self._cells
+                             if max(abs(c[0] - center_row), abs(c[1] - center_col)) >= ring]
+                else:
+                    cells = self._ring_cells(center_row, center_col, ring)
+                for row, col in cells:
+                    for soldier_id in self._cells.get((row, col), ()):
+                        record = self._soldiers[soldier_id]
+                        if statuses and record['status'] not in statuses:
+                            continue
+                        distance = haversine_m(lat, lng, record['lat'], record['lng'])
+                        if max_distance_m is not None and distance > max_distance_m:
+                            continue
+                        if len(best) < k:
+                            heapq.heappush(best, (-distance, soldier_id))
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, (-distance, soldier_id))
+                if ring and 8 * ring > len(self._cells):
+                    break
+
+            results = []
+            for neg_distance, soldier_id in sorted(best, reverse=True):
+                record = dict(self._soldiers[soldier_id])
+                record['distance_m'] = round(-neg_distance, 1)
+                results.append(record)
+            return results
+
+    def _ring_cells(self, row: int, col: int, ring: int):
+        if ring == 0:
+            yield row, col
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield row - ring, c
+            yield row + ring, c
+        for r in range(row - ring + 1, row + ring):
+            yield r, col - ring
+            yield r, col + ring
+
+    def all(self, statuses: Optional[Iterable[str]] = None) -> List[Dict]:
+        statuses = set(statuses) if statuses else None
+        with self._lock:
+            return [dict(r) for r in self._soldiers.values() if not statuses or r['status'] in statuses]
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+YOLO Model Pool
+Keeps several models loaded at once under a shared memory budget and routes cameras to them
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from serving import native_lock, run_blocking
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTES_PATH = os.environ.get('YOLO_CAMERA_ROUTES', 'camera_routes.json')
+DEFAULT_MEMORY_BUDGET_MB = float(os.environ.get('YOLO_MODEL_MEMORY_MB', '1024'))
+
+# Loaded weights need roughly this much extra room for fused layers and buffers
+RUNTIME_MEMORY_FACTOR = 2.0
+
+# A model that failed to load (or did not fit the budget) is not retried for this long
+LOAD_RETRY_SECONDS = float(os.environ.get('YOLO_MODEL_RETRY_SECONDS', '60'))
+
+DEFAULT_MODEL_KEY = 'default'
+
+
+def estimate_weights_bytes(path: Optional[str]) -> int:
+    """Estimate the resident memory of a model before loading it, from its weights file size"""
+    if path and os.path.exists(path):
+        return int(os.path.getsize(path) * RUNTIME_MEMORY_FACTOR)
+    return 0
+
+
+def estimate_model_bytes(detector, fallback_path: Optional[str] = None) -> int:
+    """Estimate the resident memory of a loaded detector from its parameters"""
+    try:
+        module = detector.model.model
+        param_bytes = sum(p.numel() * p.element_size() for p in module.parameters())
+        return int(param_bytes * RUNTIME_MEMORY_FACTOR)
+    except Exception:
+        pass
+    return estimate_weights_bytes(fallback_path or getattr(detector, 'model_path', None))
+
+
+class ModelBudgetExceeded(RuntimeError):
+    """Raised when a model cannot fit the memory budget even after evicting idle models
+
+    ``loaded`` tells whether the model was loaded (and thrown away) first.
+    """
+
+    def __init__(self, message: str, loaded: bool = False):
+        super().__init__(message)
+        self.loaded = loaded
+
+
+class ModelPool:
+    """Lazily loaded, LRU-evicted set of detectors with per-camera routing rules
+
+    Routing rules are evaluated in order and the first rule whose ``camera``
+    glob matches a ``camera_id`` decides which model serves it. Cameras with no
+    matching rule use the default detector, which is pinned and never evicted.
+    Models that are currently serving a request are never evicted either.
+
+    Room for a model is made before it is loaded, using an estimate from its
+    weights file; a model that cannot fit is refused rather than loaded over
+    budget. Cameras routed to a refused or broken model use the default
+    detector; a model that failed to load, or turned out bigger than its
+    estimate, is not tried again for ``LOAD_RETRY_SECONDS``.
+
+    A cascade configured through ``configure_cascade`` applies to every pooled
+    detector, including ones loaded later, and they share one screening model.
+    """
+
+    def __init__(self, registry, detector_factory: Callable, default_detector,
+                 memory_budget_mb: float = DEFAULT_MEMORY_BUDGET_MB,
+                 routes_path: str = DEFAULT_ROUTES_PATH):
+        self.registry = registry
+        self.detector_factory = detector_factory
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.routes_path = routes_path
+        self.routes: List[Dict] = []
+        # Loads run on run_blocking workers, so these locks must hold across OS threads
+        self._lock = native_lock()
+        self._load_locks: Dict = {}
+        self._models: "OrderedDict[str, Dict]" = OrderedDict()
+        self._models[DEFAULT_MODEL_KEY] = self._new_slot(default_detector, pinned=True)
+        # Bytes set aside for models that are being loaded right now
+        self._reserved = 0
+        # key -> (retry_at, error) for models that recently failed to load
+        self._failures: Dict[str, tuple] = {}
+        self.evictions = 0
+        # (screen model path, settings) applied to every detector, or None
+        self.cascade: Optional[Tuple[str, Dict]] = None
+        self.load_routes()
+
+    def _new_slot(self, detector, pinned: bool = False) -> Dict:
+        return {
+            'detector': detector,
+            'bytes': estimate_model_bytes(detector),
+            'pinned': pinned,
+            'in_use': 0,
+            'loaded_at': time.time(),
+            'last_used': time.time(),
+            'inferences': 0,
+            'inference_time': 0.0
+        }
+
+    def load_routes(self):
+        """Read routing rules from disk, keeping none if the file is missing"""
+        if not os.path.exists(self.routes_path):
+            return
+        try:
+            with open(self.routes_path, 'r') as f:
+                self.set_routes(json.load(f).get('routes', []), persist=False)
+        except Exception as e:
+            logger.warning(f"Could not read camera routes {self.routes_path}: {e}")
+
+    def set_routes(self, routes: List[Dict], persist: bool = True):
+        """Replace the routing rules, e.g. ``[{"camera": "gate-*", "model": "detect3_resume2"}]``"""
+        if not isinstance(routes, list):
+            raise ValueError("Routes must be a list of {camera, model} rules")
+        for rule in routes:
+            if not isinstance(rule, dict) or 'camera' not in rule or 'model' not in rule:
+                raise ValueError("Each route needs a 'camera' pattern and a 'model'")
+        self.routes = [{'camera': str(r['camera']), 'model': str(r['model'])} for r in routes]
+        with self._lock:
+            # New routes may point at fixed weights; let failed models be tried again
+            self._failures.clear()
+        if persist:
+            tmp_path = f"{self.routes_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'routes': self.routes}, f, indent=2)
+            os.replace(tmp_path, self.routes_path)
+        logger.info(f"Camera routes updated: {self.routes}")
+
+    def route(self, camera_id: str) -> str:
+        """Return the model key serving a camera"""
+        for rule in self.routes:
+            if fnmatch.fnmatch(str(camera_id), rule['camera']):
+                return rule['model']
+        return DEFAULT_MODEL_KEY
+
+    def _evict_for(self, needed_bytes: int) -> bool:
+        """Drop idle least-recently-used models until ``needed_bytes`` fits the budget
+
+        Nothing is evicted, and False returned, when even evicting every idle
+        model would not make enough room. Must be called with ``self._lock`` held.
+        """
+        used = sum(slot['bytes'] for slot in self._models.values()) + self._reserved
+        idle = [key for key, slot in self._models.items() if not slot['pinned'] and not slot['in_use']]
+        if used - sum(self._models[key]['bytes'] for key in idle) + needed_bytes > self.memory_budget:
+            return False
+        for key in idle:
+            if used + needed_bytes <= self.memory_budget:
+                break
+            slot = self._models.pop(key)
+            used -= slot['bytes']
+            self.evictions += 1
+            logger.info(f"♻️ Evicted idle model {key} ({slot['bytes'] / 1e6:.1f} MB)")
+        return True
+
+    def _get_or_load(self, key: str) -> Dict:
+        with self._lock:
+            slot = self._models.get(key)
+            if slot is not None:
+                return slot
+            load_lock = self._load_locks.setdefault(key, native_lock())
+
+        # Load outside the pool lock so other cameras keep being served
+        with load_lock:
+            with self._lock:
+                slot = self._models.get(key)
+                if slot is not None:
+                    return slot
+                retry_at, error = self._failures.get(key, (0.0, None))
+                if time.time() < retry_at:
+                    raise RuntimeError(f"{error} (retrying in {retry_at - time.time():.0f}s)")
+
+            try:
+                slot = self._load(key)
+            except ModelBudgetExceeded as e:
+                # Refused before loading: cheap to check again, and busy models may free up soon
+                if not e.loaded:
+                    raise
+                with self._lock:
+                    self._failures[key] = (time.time() + LOAD_RETRY_SECONDS, str(e))
+                raise
+            except Exception as e:
+                with self._lock:
+                    self._failures[key] = (time.time() + LOAD_RETRY_SECONDS, str(e))
+                raise
+            with self._lock:
+                self._failures.pop(key, None)
+            return slot
+
+    def _load(self, key: str) -> Dict:
+        """Make room for a model, load it and add it to the pool; must hold the key's load lock"""
+        entry = self.registry.resolve(key, any_path=False)
+        estimate = estimate_weights_bytes(entry['path'])
+        with self._lock:
+            if not self._evict_for(estimate):
+                raise ModelBudgetExceeded(f"Model {key} (~{estimate / 1e6:.1f} MB) does not fit the memory budget")
+            self._reserved += estimate
+
+        try:
+            logger.info(f"Loading model {key} for routed cameras from {entry['path']}")
+            detector = self.detector_factory(entry['path'])
+            if detector.model is not None:
+                self.registry.record_class_names(entry, detector.model.names)
+            self._apply_cascade(detector)
+            slot = self._new_slot(detector)
+        finally:
+            with self._lock:
+                self._reserved -= estimate
+
+        with self._lock:
+            # The estimate can be short (e.g. weights downloaded on load); check the real size
+            if not self._evict_for(slot['bytes']):
+                raise ModelBudgetExceeded(f"Model {key} ({slot['bytes'] / 1e6:.1f} MB) does not fit the memory budget",
+                                          loaded=True)
+            self._models[key] = slot
+        return slot
+
+    def prepare(self, camera_id: str) -> Tuple[str, Dict]:
+        """Return ``(key, slot)`` for the model routed to ``camera_id``, loading it if needed
+
+        Call this before waiting for an inference slot, so a cold load never
+        holds one; pass the result to ``acquire``.
+        """
+        key = self.route(camera_id)
+        with self._lock:
+            slot = self._models.get(key)
+            retrying = key in self._failures and time.time() < self._failures[key][0]
+        if slot is None and retrying:
+            # Already reported when the load failed; serve with the default until the back-off ends
+            key = DEFAULT_MODEL_KEY
+            slot = self._models[key]
+        elif slot is None:
+            try:
+                slot = run_blocking(self._get_or_load, key)
+            except Exception as e:
+                logger.error(f"Model {key} unavailable for camera {camera_id}, using default: {e}")
+                key = DEFAULT_MODEL_KEY
+                slot = self._models[key]
+        return key, slot
+
+    @contextmanager
+    def acquire(self, camera_id: str, prepared: Optional[Tuple[str, Dict]] = None):
+        """Yield the detector routed for ``camera_id`` and account for its use
+
+        ``prepared`` is the result of an earlier ``prepare``; a slot evicted
+        since then stays usable because this request holds its detector.
+        """
+        key, slot = prepared or self.prepare(camera_id)
+        with self._lock:
+            slot['in_use'] += 1
+            slot['last_used'] = time.time()
+            if key in self._models:
+                self._models.move_to_end(key)
+
+        start = time.perf_counter()
+        try:
+            yield slot['detector']
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                slot['in_use'] -= 1
+                slot['inferences'] += 1
+                slot['inference_time'] += elapsed
+
+    def configure_cascade(self, screen_model_path: Optional[str], **settings) -> Optional[Dict]:
+        """Enable the cascade on every pooled detector, or disable it with ``None``
+
+        The default detector loads the screening model; the others share it.
+        Raises ``ValueError`` for unknown settings, like ``YOLODetector.configure_cascade``.
+        """
+        config = self._models[DEFAULT_MODEL_KEY]['detector'].configure_cascade(screen_model_path, **settings)
+        with self._lock:
+            self.cascade = (screen_model_path, settings) if config is not None else None
+            detectors = [slot['detector'] for key, slot in self._models.items() if key != DEFAULT_MODEL_KEY]
+        for detector in detectors:
+            self._apply_cascade(detector)
+        return config
+
+    def _apply_cascade(self, detector):
+        """Bring a routed detector's cascade in line with the pool's setting"""
+        cascade = self.cascade
+        if cascade is None:
+            if detector.cascade_config is not None:
+                detector.configure_cascade(None)
+            return
+        screen_path, settings = cascade
+        detector.configure_cascade(screen_path, screen_model=self._models[DEFAULT_MODEL_KEY]['detector'].screen_model,
+                                   **settings)
+
+    def cascade_stats(self) -> Dict:
+        """Cascade statistics of the default detector, with each routed model's under ``models``"""
+        with self._lock:
+            detectors = list(self._models.items())
+        stats = self._models[DEFAULT_MODEL_KEY]['detector'].get_cascade_stats()
+        stats['models'] = {key: slot['detector'].get_cascade_stats()
+                           for key, slot in detectors if key != DEFAULT_MODEL_KEY}
+        return stats
+
+    def refresh(self, key: str = DEFAULT_MODEL_KEY):
+        """Re-estimate a slot's memory after its detector swapped weights"""
+        with self._lock:
+            slot = self._models.get(key)
+            if slot is not None:
+                slot['bytes'] = estimate_model_bytes(slot['detector'])
+                slot['loaded_at'] = time.time()
+
+    def stats(self) -> Dict:
+        """Per-model memory and inference accounting for the admin API"""
+        with self._lock:
+            models = {}
+            for key, slot in self._models.items():
+                models[key] = {
+                    'model_path': slot['detector'].model_path,
+                    'memory_mb': round(slot['bytes'] / 1e6, 1),
+                    'pinned': slot['pinned'],
+                    'in_use': slot['in_use'],
+                    'loaded_at': slot['loaded_at'],
+                    'last_used': slot['last_used'],
+                    'inferences': slot['inferences'],
+                    'inference_seconds': round(slot['inference_time'], 3)
+                }
+            return {
+                'memory_budget_mb': round(self.memory_budget / 1e6, 1),
+                'memory_used_mb': round(sum(s['bytes'] for s in self._models.values()) / 1e6, 1),
+                'evictions': self.evictions,
+                'load_failures': {key: {'error': error, 'retry_at': retry_at}
+                                  for key, (retry_at, error) in self._failures.items()},
+                'routes': list(self.routes),
+                'models': models
+            }
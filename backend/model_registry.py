@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+YOLO Model Registry
+Indexes available model weights in a small on-disk manifest and resolves them by name or version
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from serving import native_lock
+
+logger = logging.getLogger(__name__)
+
+# Resolved against this module, not the working directory, so every entry point sees the same files
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+YOLO_DIR = os.path.normpath(os.path.join(BACKEND_DIR, '..', 'yolo'))
+CUSTOM_MODEL_PATH = os.path.join(BACKEND_DIR, 'custom_model.pt')  # Copied by setup script
+
+# Locations checked for trained weights, in priority order
+MODEL_SEARCH_PATHS = [
+    CUSTOM_MODEL_PATH,
+    os.path.join(YOLO_DIR, 'runs', 'detect', 'detect3_resume2', 'weights', 'best.pt'),
+    os.path.join(YOLO_DIR, 'best.pt')
+]
+
+# Directories scanned for any additional training runs
+RUNS_DIRECTORIES = [
+    os.path.join(YOLO_DIR, 'runs', 'detect')
+]
+
+# Only weights under these directories can be loaded by path over the admin API
+MODEL_DIRECTORIES = [d for d in os.environ.get('RAKSHAK_MODEL_DIRS', '').split(os.pathsep) if d] or [
+    BACKEND_DIR, YOLO_DIR
+]
+
+DEFAULT_MODEL = "yolov8n.pt"
+DEFAULT_MANIFEST_PATH = os.environ.get('YOLO_MODEL_MANIFEST', os.path.join(BACKEND_DIR, 'models.json'))
+
+# Exported variants that may sit next to a .pt file (suffix -> format)
+EXPORT_FORMATS = {
+    '.onnx': 'onnx',
+    '_openvino_model': 'openvino',
+    '.torchscript': 'torchscript',
+    '.engine': 'engine',
+    '_ncnn_model': 'ncnn'
+}
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 of a weights file without reading it into memory at once"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_name_for_path(path: str) -> str:
+    """Derive a registry name from a weights path
+
+    ``runs/detect/<run>/weights/best.pt`` is named after the training run,
+    anything else after the file stem.
+    """
+    parts = os.path.normpath(path).split(os.sep)
+    if len(parts) >= 3 and parts[-2] == 'weights':
+        return parts[-3]
+    return os.path.splitext(parts[-1])[0]
+
+
+def find_exports(path: str) -> Dict[str, str]:
+    """Find exported variants (ONNX, OpenVINO, ...) written next to a .pt file"""
+    stem = os.path.splitext(path)[0]
+    exports = {}
+    for suffix, fmt in EXPORT_FORMATS.items():
+        candidate = stem + suffix
+        if os.path.exists(candidate):
+            exports[fmt] = candidate
+    return exports
+
+
+def in_model_directory(path: str) -> bool:
+    """Whether a weights path lies under one of ``MODEL_DIRECTORIES`` (after resolving links)"""
+    real = os.path.realpath(path)
+    for directory in MODEL_DIRECTORIES:
+        root = os.path.realpath(directory)
+        if os.path.commonpath([real, root]) == root:
+            return True
+    return False
+
+
+def is_hub_weights(spec: str) -> bool:
+    """Whether a spec names official weights such as ``yolov8n`` or ``yolov8s.pt``"""
+    name = spec[:-3] if spec.endswith('.pt') else spec
+    return os.sep not in spec and '/' not in spec and name.startswith('yolov8') and ':' not in spec
+
+
+class ModelRegistry:
+    """Manifest-backed index of available YOLO weights
+
+    The manifest maps a model name to a list of versions, each recording the
+    weights path, content hash, class names and exported variants. Hashes are
+    only recomputed when a file's size or mtime changes, so rescans are cheap.
+    """
+
+    def __init__(self, manifest_path: str = DEFAULT_MANIFEST_PATH,
+                 search_paths: Optional[List[str]] = None):
+        self.manifest_path = manifest_path
+        self.search_paths = list(search_paths or MODEL_SEARCH_PATHS)
+        # Scans run on run_blocking workers, so the lock must hold across OS threads;
+        # file hashing happens outside it
+        self._lock = native_lock()
+        self.manifest = {'models': {}, 'active': None}
+        self._load_manifest()
+
+    def _load_manifest(self):
+        """Read the manifest from disk, starting empty if missing or unreadable"""
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            self.manifest['models'] = manifest.get('models', {})
+            self.manifest['active'] = manifest.get('active')
+        except Exception as e:
+            logger.warning(f"Could not read model manifest {self.manifest_path}: {e}")
+
+    def save(self):
+        """Atomically write the manifest to disk"""
+        with self._lock:
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
+
+    def _candidate_paths(self) -> List[str]:
+        """List weights files found in the search paths and training run directories"""
+        candidates = [path for path in self.search_paths if os.path.exists(path)]
+        for runs_dir in RUNS_DIRECTORIES:
+            if not os.path.isdir(runs_dir):
+                continue
+            for run in sorted(os.listdir(runs_dir)):
+                path = os.path.join(runs_dir, run, 'weights', 'best.pt')
+                if os.path.exists(path):
+                    candidates.append(path)
+        # Deduplicate while keeping priority order
+        seen = set()
+        unique = []
+        for path in candidates:
+            real = os.path.realpath(path)
+            if real not in seen:
+                seen.add(real)
+                unique.append(path)
+        return unique
+
+    def register(self, path: str, name: Optional[str] = None) -> Dict:
+        """Add (or refresh) a weights file in the manifest and return its entry"""
+        name = name or model_name_for_path(path)
+        stat = os.stat(path)
+        with self._lock:
+            # Reuse the cached entry when the file has not changed
+            for entry in self.manifest['models'].get(name, []):
+                if (os.path.realpath(entry['path']) == os.path.realpath(path)
+                        and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime):
+                    entry['exports'] = find_exports(path)
+                    return entry
+
+        sha256 = file_sha256(path)
+        with self._lock:
+            versions = self.manifest['models'].setdefault(name, [])
+            for entry in versions:
+                if entry['sha256'] == sha256:
+                    entry.update({'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime,
+                                  'exports': find_exports(path)})
+                    return entry
+
+            entry = {
+                'name': name,
+                'version': max([e['version'] for e in versions], default=0) + 1,
+                'path': path,
+                'sha256': sha256,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'class_names': [],
+                'exports': find_exports(path),
+                'registered_at': time.time()
+            }
+            versions.append(entry)
+            logger.info(f"Registered model {name} v{entry['version']} from {path}")
+            return entry
+
+    def scan(self) -> List[Dict]:
+        """Index every weights file that can be found and persist the manifest"""
+        entries = []
+        for path in self._candidate_paths():
+            try:
+                entries.append(self.register(path))
+            except Exception as e:
+                logger.error(f"Failed to register model {path}: {e}")
+        try:
+            self.save()
+        except Exception as e:
+            logger.warning(f"Could not write model manifest {self.manifest_path}: {e}")
+        return entries
+
+    def list_models(self) -> Dict:
+        """Return a copy of the manifest suitable for JSON responses"""
+        with self._lock:
+            return json.loads(json.dumps(self.manifest))
+
+    def get(self, name: str, version: Optional[int] = None) -> Optional[Dict]:
+        """Look up a model by name and optional version (latest if omitted)"""
+        with self._lock:
+            versions = self.manifest['models'].get(name, [])
+            if not versions:
+                return None
+            if version is None:
+                return max(versions, key=lambda e: e['version'])
+            for entry in versions:
+                if entry['version'] == int(version):
+                    return entry
+            return None
+
+    def resolve(self, spec: Optional[str] = None, any_path: bool = True) -> Dict:
+        """Resolve ``name``, ``name:version`` or a file path to a manifest entry
+
+        With no spec the active model is used, then the first weights file
+        found in the search paths, then the default ``yolov8n.pt``. An active
+        model whose weights have gone missing is skipped with a warning.
+        Raises ``KeyError`` for unknown models and ``ValueError`` for a
+        malformed version or, unless ``any_path``, a path outside
+        ``MODEL_DIRECTORIES``.
+        """
+        if spec:
+            return self._resolve_spec(spec, any_path)
+
+        active = self.manifest.get('active')
+        if active:
+            try:
+                return self._resolve_spec(active, any_path=True)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"⚠️ Active model is unavailable ({e}), falling back to the search paths")
+
+        for path in self._candidate_paths():
+            return self.register(path)
+
+        logger.info("Using default YOLOv8 model")
+        return self._hub_entry(DEFAULT_MODEL)
+
+    def _resolve_spec(self, spec: str, any_path: bool) -> Dict:
+        if os.path.exists(spec):
+            if not any_path and not in_model_directory(spec):
+                raise ValueError(f"Model path '{spec}' is outside the model directories")
+            return self.register(spec)
+        name, _, version = spec.partition(':')
+        if version and not version.isdigit():
+            raise ValueError(f"Invalid model version '{version}' in '{spec}'")
+        entry = self.get(name, int(version) if version else None)
+        if entry is not None and os.path.exists(entry['path']):
+            return entry
+        if is_hub_weights(spec):
+            return self._hub_entry(spec)
+        raise KeyError(f"Model '{spec}' is not in the registry")
+
+    def _hub_entry(self, spec: str) -> Dict:
+        """Unregistered entry for official weights that Ultralytics downloads on load"""
+        path = spec if spec.endswith('.pt') else f"{spec}.pt"
+        return {
+            'name': model_name_for_path(path),
+            'version': 0,
+            'path': path,
+            'sha256': None,
+            'class_names': [],
+            'exports': {}
+        }
+
+    def set_active(self, entry: Dict):
+        """Mark an entry as the active model and persist the choice"""
+        with self._lock:
+            if entry.get('version'):
+                self.manifest['active'] = f"{entry['name']}:{entry['version']}"
+            else:
+                self.manifest['active'] = None
+        try:
+            self.save()
+        except Exception as e:
+            logger.warning(f"Could not write model manifest {self.manifest_path}: {e}")
+
+    def record_class_names(self, entry: Dict, names) -> None:
+        """Store the class names reported by a loaded model on its entry"""
+        if isinstance(names, dict):
+            names = [names[k] for k in sorted(names)]
+        with self._lock:
+            entry['class_names'] = list(names)
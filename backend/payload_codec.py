@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Compact Detection Payloads
+Columnar MessagePack encoding of detection results for Socket.IO and HTTP clients
+"""
+
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # Compact mode is optional; verbose JSON still works without it
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+COMPACT_FORMAT_VERSION = 1
+COMPACT_MIMETYPE = 'application/x-msgpack'
+
+# Application-level types, in the order their uint8 ids are assigned
+DETECTION_TYPES = ['person', 'vehicle', 'drone', 'weapon', 'unknown']
+
+# Class id reserved for names that no longer fit in the uint8 dictionary
+OVERFLOW_CLASS_ID = 255
+
+
+def compact_available() -> bool:
+    """Whether the optional msgpack dependency is installed"""
+    return msgpack is not None
+
+
+class ClassDictionary:
+    """Append-only mapping of original class names to stable uint8 ids
+
+    Ids never change once assigned, so a client only needs the dictionary again
+    when ``version`` (the number of entries) grows past what it has seen.
+    """
+
+    def __init__(self, names: Optional[List[str]] = None):
+        self._lock = threading.Lock()
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for name in names or []:
+            self.class_id(name)
+
+    @property
+    def version(self) -> int:
+        return len(self.names)
+
+    def class_id(self, name: str) -> int:
+        """Return the id for a class name, assigning the next one if it is new"""
+        class_id = self._ids.get(name)
+        if class_id is not None:
+            return class_id
+        with self._lock:
+            if name in self._ids:
+                return self._ids[name]
+            if len(self.names) >= OVERFLOW_CLASS_ID:
+                return OVERFLOW_CLASS_ID
+            self._ids[name] = len(self.names)
+            self.names.append(name)
+            return self._ids[name]
+
+    def to_payload(self) -> Dict:
+        return {
+            'v': COMPACT_FORMAT_VERSION,
+            'dv': self.version,
+            'classes': list(self.names),
+            'types': DETECTION_TYPES
+        }
+
+
+def encode_detections(camera_id: str, detections: List[Dict], counts: Dict, threats: List[Dict],
+                      timestamp: float, classes: ClassDictionary, seq: int = 0) -> Dict:
+    """Build the columnar compact payload for one frame
+
+    Boxes are little-endian int16 ``[x, y, w, h]`` rows, classes and types are
+    uint8 ids, confidences are uint8 quantized to 1/255 and threats are uint16
+    indices into the detection columns instead of copies of the detections.
+    """
+    count = len(detections)
+    boxes = np.empty((count, 4), dtype='<i2')
+    class_ids = np.empty(count, dtype=np.uint8)
+    type_ids = np.empty(count, dtype=np.uint8)
+    confidences = np.empty(count, dtype=np.float32)
+    type_index = {name: i for i, name in enumerate(DETECTION_TYPES)}
+
+    for i, detection in enumerate(detections):
+        bbox = detection['bbox']
+        boxes[i] = np.clip([bbox['x'], bbox['y'], bbox['width'], bbox['height']], -32768, 32767)
+        class_ids[i] = classes.class_id(detection.get('original_class', detection['type']))
+        type_ids[i] = type_index.get(detection['type'], type_index['unknown'])
+        confidences[i] = detection['confidence']
+
+    threat_ids = {id(threat) for threat in threats}
+    threat_indices = np.array([i for i, d in enumerate(detections) if id(d) in threat_ids], dtype='<u2')
+
+    return {
+        'v': COMPACT_FORMAT_VERSION,
+        'dv': classes.version,
+        'cam': camera_id,
+        'seq': seq,
+        'ts': timestamp,
+        'n': count,
+        'boxes': boxes.tobytes(),
+        'cls': class_ids.tobytes(),
+        'type': type_ids.tobytes(),
+        'conf': np.rint(np.clip(confidences, 0, 1) * 255).astype(np.uint8).tobytes(),
+        'threats': threat_indices.tobytes(),
+        'counts': [counts.get('persons', 0), counts.get('vehicles', 0),
+                   counts.get('drones', 0), counts.get('weapons', 0)]
+    }
+
+
+def decode_detections(payload: Dict, classes: List[str]) -> Dict:
+    """Expand a compact payload back into verbose detection dicts (for tools and tests)"""
+    count = payload['n']
+    boxes = np.frombuffer(payload['boxes'], dtype='<i2').reshape(count, 4)
+    class_ids = np.frombuffer(payload['cls'], dtype=np.uint8)
+    type_ids = np.frombuffer(payload['type'], dtype=np.uint8)
+    confidences = np.frombuffer(payload['conf'], dtype=np.uint8) / 255.0
+
+    detections = []
+    for i in range(count):
+        x, y, w, h = (int(v) for v in boxes[i])
+        class_id = int(class_ids[i])
+        detections.append({
+            'type': DETECTION_TYPES[type_ids[i]],
+            'confidence': float(confidences[i]),
+            'bbox': {'x': x, 'y': y, 'width': w, 'height': h},
+            'timestamp': payload['ts'],
+            'original_class': classes[class_id] if class_id < len(classes) else 'unknown'
+        })
+
+    threat_indices = np.frombuffer(payload['threats'], dtype='<u2')
+    persons, vehicles, drones, weapons = payload['counts']
+    return {
+        'camera_id': payload['cam'],
+        'detections': detections,
+        'threats': [detections[i] for i in threat_indices],
+        'counts': {'persons': persons, 'vehicles': vehicles, 'drones': drones, 'weapons': weapons},
+        'timestamp': payload['ts']
+    }
+
+
+def pack(payload: Dict) -> bytes:
+    """Serialize a compact payload with MessagePack"""
+    if msgpack is None:
+        raise RuntimeError("Compact payloads require the 'msgpack' package")
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def unpack(data: bytes) -> Dict:
+    """Deserialize a MessagePack compact payload"""
+    if msgpack is None:
+        raise RuntimeError("Compact payloads require the 'msgpack' package")
+    return msgpack.unpackb(data, raw=False)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Detection Post-processing
+Vectorized YOLOv8 output decoding and class-aware NMS for models run outside Ultralytics
+"""
+
+import logging
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Same defaults as the Ultralytics predictor, so both paths return identical detections
+DEFAULT_IOU_THRESHOLD = 0.7
+DEFAULT_MAX_DETECTIONS = 300
+MAX_NMS_CANDIDATES = 30000    # Highest-confidence boxes kept for NMS
+MAX_WH = 7680                 # Per-class box offset for class-aware NMS in one pass
+
+
+def xywh_to_xyxy(xywh: np.ndarray) -> np.ndarray:
+    """``(4, n)`` centre/size rows to ``(n, 4)`` corner boxes"""
+    cx, cy, w, h = xywh
+    half_w, half_h = w / 2, h / 2
+    return np.stack([cx - half_w, cy - half_h, cx + half_w, cy + half_h], axis=1)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression over ``(n, 4)`` xyxy boxes, best score first
+
+    Uses the same rule as ``torchvision.ops.nms``: a box is dropped when its
+    IoU with a kept box is greater than ``iou_threshold``. Each kept box is
+    compared against all remaining boxes in one vectorized step.
+    """
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        inter = (np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None) *
+                 np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None))
+        iou = inter / (areas[best] + areas[rest] - inter)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def decode_predictions(output: np.ndarray, confidence_threshold: float = 0.25,
+                       iou_threshold: float = DEFAULT_IOU_THRESHOLD,
+                       classes: Optional[Sequence[int]] = None,
+                       max_detections: int = DEFAULT_MAX_DETECTIONS,
+                       agnostic: bool = False) -> List[np.ndarray]:
+    """Decode raw YOLOv8 output ``(batch, 4 + classes, anchors)`` into detections per image
+
+    Returns one ``(n, 6)`` float32 array per image with ``x1, y1, x2, y2,
+    confidence, class`` rows in input-tensor coordinates, best first. Anchors
+    whose best class score is not above the threshold are discarded before any
+    sorting, ``classes`` keeps only boxes whose best class is listed (as the
+    Ultralytics ``classes`` argument does), and NMS is class-aware unless
+    ``agnostic``.
+    """
+    output = np.asarray(output, dtype=np.float32)
+    if output.ndim == 2:
+        output = output[None]
+    class_filter = np.asarray(classes, dtype=np.int64) if classes is not None else None
+
+    decoded = []
+    for prediction in output:
+        scores = prediction[4:]
+        best = scores.max(axis=0)
+        candidates = np.flatnonzero(best > confidence_threshold)
+        if candidates.size and class_filter is not None:
+            labels = scores[:, candidates].argmax(axis=0)
+            candidates = candidates[np.isin(labels, class_filter)]
+        if not candidates.size:
+            decoded.append(np.zeros((0, 6), dtype=np.float32))
+            continue
+
+        confidence = best[candidates]
+        if candidates.size > MAX_NMS_CANDIDATES:
+            top = np.argpartition(-confidence, MAX_NMS_CANDIDATES)[:MAX_NMS_CANDIDATES]
+            candidates, confidence = candidates[top], confidence[top]
+        labels = scores[:, candidates].argmax(axis=0)
+        boxes = xywh_to_xyxy(prediction[:4, candidates])
+
+        offsets = 0 if agnostic else labels[:, None].astype(np.float32) * MAX_WH
+        keep = nms(boxes + offsets, confidence, iou_threshold)[:max_detections]
+        decoded.append(np.column_stack([boxes[keep], confidence[keep], labels[keep]]).astype(np.float32))
+    return decoded
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Local Pub/Sub Broker
+Minimal Redis-protocol server implementing PUBLISH/SUBSCRIBE for running several
+backend workers on one machine without installing Redis
+
+    python pubsub_broker.py --port 6379
+    RAKSHAK_MESSAGE_QUEUE=redis://localhost:6379/0 python yolo_detection.py
+
+Only the commands the Socket.IO Redis manager and redis-py's pub/sub client
+use are implemented; there is no key/value storage or persistence.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import logging
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 6379
+
+
+def encode(value) -> bytes:
+    """Serialize a reply in RESP2"""
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    return b'*%d\r\n' % len(value) + b''.join(encode(item) for item in value)
+
+
+class Client:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.channels: Set[bytes] = set()
+        self.patterns: Set[bytes] = set()
+
+    def send(self, data: bytes):
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+    @property
+    def subscriptions(self) -> int:
+        return len(self.channels) + len(self.patterns)
+
+
+class PubSubBroker:
+    """Routes PUBLISH messages to SUBSCRIBE/PSUBSCRIBE clients"""
+
+    def __init__(self):
+        self.channels: Dict[bytes, Set[Client]] = {}
+        self.patterns: Dict[bytes, Set[Client]] = {}
+        self.published = 0
+
+    async def read_command(self, reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()  # Inline command, e.g. from telnet
+        args = []
+        for _ in range(int(line[1:])):
+            header = await reader.readline()
+            length = int(header[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = Client(writer)
+        try:
+            while True:
+                args = await self.read_command(reader)
+                if args is None:
+                    break
+                if args:
+                    self.execute(client, args)
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.unsubscribe_all(client)
+            writer.close()
+
+    def execute(self, client: Client, args: List[bytes]):
+        command = args[0].upper()
+        if command == b'PUBLISH' and len(args) == 3:
+            client.send(encode(self.publish(args[1], args[2])))
+        elif command in (b'SUBSCRIBE', b'PSUBSCRIBE'):
+            registry, own = (self.channels, client.channels) if command == b'SUBSCRIBE' \
+                else (self.patterns, client.patterns)
+            for name in args[1:]:
+                registry.setdefault(name, set()).add(client)
+                own.add(name)
+                client.send(encode([command.lower(), name, client.subscriptions]))
+        elif command in (b'UNSUBSCRIBE', b'PUNSUBSCRIBE'):
+            registry, own = (self.channels, client.channels) if command == b'UNSUBSCRIBE' \
+                else (self.patterns, client.patterns)
+            for name in args[1:] or list(own):
+                registry.get(name, set()).discard(client)
+                own.discard(name)
+                client.send(encode([command.lower(), name, client.subscriptions]))
+        elif command == b'PING':
+            if client.subscriptions:
+                client.send(encode([b'pong', args[1] if len(args) > 1 else b'']))
+            else:
+                client.send(b'+PONG\r\n' if len(args) == 1 else encode(args[1]))
+        elif command == b'HELLO':
+            if len(args) > 1 and args[1] != b'2':
+                client.send(b'-NOPROTO this broker only speaks RESP2\r\n')
+            else:
+                client.send(encode([b'server', b'rakshak-pubsub', b'version', b'6.0.0', b'proto', 2,
+                                    b'mode', b'standalone', b'role', b'master', b'modules', []]))
+        elif command == b'QUIT':
+            client.send(b'+OK\r\n')
+            client.writer.close()
+        elif command in (b'SELECT', b'CLIENT', b'AUTH', b'ECHO'):
+            client.send(encode(args[1]) if command == b'ECHO' else b'+OK\r\n')
+        else:
+            client.send(b'-ERR unknown command \'%s\'\r\n' % args[0])
+
+    def publish(self, channel: bytes, message: bytes) -> int:
+        receivers = 0
+        for client in self.channels.get(channel, ()):
+            client.send(encode([b'message', channel, message]))
+            receivers += 1
+        for pattern, clients in self.patterns.items():
+            if fnmatch.fnmatchcase(channel.decode(errors='replace'), pattern.decode(errors='replace')):
+                for client in clients:
+                    client.send(encode([b'pmessage', pattern, channel, message]))
+                    receivers += 1
+        self.published += 1
+        return receivers
+
+    def unsubscribe_all(self, client: Client):
+        for name in client.channels:
+            self.channels.get(name, set()).discard(client)
+        for name in client.patterns:
+            self.patterns.get(name, set()).discard(client)
+
+
+async def serve(host: str, port: int):
+    broker = PubSubBroker()
+    server = await asyncio.start_server(broker.handle, host, port)
+    logger.info(f"📡 Pub/sub broker listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Redis-protocol pub/sub broker')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
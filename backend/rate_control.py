@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Adaptive Rate Control
+Advises each camera on frame rate, resolution and JPEG quality from current server load
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from inference_scheduler import DEFAULT_PRIORITY, INFERENCE_WORKERS, PRIORITY_CLASSES
+
+TARGET_UTILIZATION = 0.8       # Share of estimated capacity handed out to cameras
+TARGET_QUEUE_DEPTH = 2         # Requests waiting per worker before advice tightens
+MAX_FPS = 10.0
+CAMERA_IDLE_SECONDS = 10.0     # Cameras silent for longer are not counted as demand
+LATENCY_ALPHA = 0.2
+
+# Load level -> (max frame width, JPEG quality); critical cameras get one level better
+QUALITY_LEVELS = [
+    (1280, 0.8),
+    (960, 0.7),
+    (640, 0.6),
+    (480, 0.5)
+]
+LOAD_THRESHOLDS = (0.5, 0.8, 1.1)
+
+
+class RateController:
+    """Turns queue depth and measured inference latency into per-camera advice
+
+    Capacity is estimated as ``workers / mean inference latency`` frames per
+    second. ``TARGET_UTILIZATION`` of it is split across recently active
+    cameras by weight, never below the camera's minimum fps, and
+    scaled down further while requests are queueing. The overall load level
+    picks the resolution and JPEG quality rung; ``shed_level_lookup`` (the
+    resource governor's load shedding level) can force a lower one.
+    """
+
+    def __init__(self, workers: int = INFERENCE_WORKERS,
+                 profile_lookup: Optional[Callable[[str], Dict]] = None,
+                 shed_level_lookup: Optional[Callable[[], int]] = None):
+        self.workers = max(1, workers)
+        self.profile_lookup = profile_lookup
+        self.shed_level_lookup = shed_level_lookup
+        self.latency_ms: Optional[float] = None
+        self.in_flight = 0
+        self._last_seen: Dict[str, float] = {}
+        self._arrival_fps: Dict[str, float] = {}
+        self._last_advice: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def profile(self, camera_id: str) -> Dict:
+        """Priority, effective weight and minimum fps for a camera"""
+        if self.profile_lookup is not None:
+            return self.profile_lookup(camera_id)
+        weight, min_fps = PRIORITY_CLASSES[DEFAULT_PRIORITY]
+        return {'priority': DEFAULT_PRIORITY, 'effective_weight': weight, 'min_fps': min_fps}
+
+    @contextmanager
+    def track(self, camera_id: str):
+        """Count a /detect request as queued or running while it is being served"""
+        now = time.time()
+        with self._lock:
+            self.in_flight += 1
+            previous = self._last_seen.get(camera_id)
+            if previous is not None and now > previous:
+                rate = 1.0 / (now - previous)
+                current = self._arrival_fps.get(camera_id, rate)
+                self._arrival_fps[camera_id] = current + LATENCY_ALPHA * (rate - current)
+            self._last_seen[camera_id] = now
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def record_inference(self, seconds: float):
+        latency = seconds * 1000
+        with self._lock:
+            if self.latency_ms is None:
+                self.latency_ms = latency
+            else:
+                self.latency_ms += LATENCY_ALPHA * (latency - self.latency_ms)
+
+    def _active_cameras(self, now: float):
+        return [c for c, seen in self._last_seen.items() if now - seen <= CAMERA_IDLE_SECONDS]
+
+    def load(self, now: Optional[float] = None) -> Dict:
+        """Capacity, demand and queue pressure behind the current advice"""
+        now = now or time.time()
+        with self._lock:
+            active = self._active_cameras(now)
+            latency_ms = self.latency_ms
+            in_flight = self.in_flight
+            demand = sum(self._arrival_fps.get(c, 0.0) for c in active)
+        capacity = self.workers * 1000.0 / latency_ms if latency_ms else MAX_FPS * max(1, len(active))
+        queue_depth = max(0, in_flight - self.workers)
+        level_load = max(demand / capacity, queue_depth / (TARGET_QUEUE_DEPTH * self.workers))
+        return {
+            'capacity_fps': round(capacity, 2),
+            'latency_ms': round(latency_ms, 1) if latency_ms else None,
+            'in_flight': in_flight,
+            'queue_depth': queue_depth,
+            'demand_fps': round(demand, 2),
+            'active_cameras': active,
+            'load': round(level_load, 3)
+        }
+
+    def advise(self, camera_id: str, now: Optional[float] = None) -> Dict:
+        """Frame rate, resolution and JPEG quality this camera should send at"""
+        load = self.load(now)
+        active = load['active_cameras'] or [camera_id]
+        if camera_id not in active:
+            active = active + [camera_id]
+
+        weights = {c: self.profile(c)['effective_weight'] for c in active}
+        profile = self.profile(camera_id)
+        priority = profile['priority']
+        budget = load['capacity_fps'] * TARGET_UTILIZATION
+        queue_limit = TARGET_QUEUE_DEPTH * self.workers
+        if load['queue_depth'] > queue_limit:
+            budget *= queue_limit / load['queue_depth']
+        fps = min(MAX_FPS, max(profile['min_fps'], budget * weights[camera_id] / sum(weights.values())))
+
+        level = sum(load['load'] > t for t in LOAD_THRESHOLDS)
+        if self.shed_level_lookup is not None:
+            level = min(len(QUALITY_LEVELS) - 1, max(level, self.shed_level_lookup()))
+        if priority == 'critical':
+            level = max(0, level - 1)
+        max_width, jpeg_quality = QUALITY_LEVELS[level]
+        return {
+            'camera_id': camera_id,
+            'priority': priority,
+            'boosted': profile.get('boosted', False),
+            'fps': round(fps, 2),
+            'interval_ms': int(round(1000 / fps)),
+            'max_width': max_width,
+            'jpeg_quality': jpeg_quality,
+            'level': level,
+            'load': load['load']
+        }
+
+    def changed(self, advice: Dict) -> bool:
+        """Whether advice differs enough from what the camera was last told to push it"""
+        with self._lock:
+            previous = self._last_advice.get(advice['camera_id'])
+            if previous is not None and previous['level'] == advice['level'] \
+                    and abs(previous['fps'] - advice['fps']) <= 0.1 * previous['fps']:
+                return False
+            self._last_advice[advice['camera_id']] = advice
+            return True
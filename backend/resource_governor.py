@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Resource Governor
+Thread pool sizes, request and memory limits, and load shedding as the limits are approached
+
+Import this module before NumPy or OpenCV in an entry point (right after
+``serving``): BLAS libraries read their thread counts from the environment
+when NumPy loads.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Optional
+
+from inference_scheduler import DEFAULT_PRIORITY, INFERENCE_WORKERS, PRIORITY_CLASSES
+
+try:
+    import psutil
+except ImportError:  # RSS is read from /proc instead (Linux only)
+    psutil = None
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # BLAS limits then rely on the environment variables set below
+    threadpool_limits = None
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+CPU_COUNT = os.cpu_count() or 1
+# Threads per forward pass (PyTorch, ONNX Runtime, OpenVINO); 0 splits the cores across inference workers
+INFERENCE_THREADS = int(os.environ.get('RAKSHAK_INFERENCE_THREADS', '0'))
+# Request threads already decode and resize in parallel, so OpenCV and BLAS default to one thread each
+OPENCV_THREADS = int(os.environ.get('RAKSHAK_OPENCV_THREADS', '1'))
+BLAS_THREADS = int(os.environ.get('RAKSHAK_BLAS_THREADS', '1'))
+MAX_REQUEST_MB = float(os.environ.get('RAKSHAK_MAX_REQUEST_MB', '8'))
+MAX_IN_FLIGHT_FRAMES = int(os.environ.get('RAKSHAK_MAX_IN_FLIGHT_FRAMES', '16'))
+MEMORY_LIMIT_MB = float(os.environ.get('RAKSHAK_MEMORY_LIMIT_MB', '0'))  # 0: RSS is tracked but not capped
+SHED_IMGSZ = int(os.environ.get('RAKSHAK_SHED_IMGSZ', '480'))
+RSS_SAMPLE_SECONDS = 0.5
+RECENT_DECISIONS = 50
+
+# Pressure (share of the tightest limit in use) at which shedding levels 1, 2 and 3 start
+SHED_THRESHOLDS = (0.7, 0.85, 1.0)
+# Level -> priorities whose frames are dropped; critical and boosted cameras never are
+SHED_PRIORITIES = [(), (), ('low',), ('low', 'normal')]
+
+BLAS_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+for _var in BLAS_ENV_VARS:
+    os.environ.setdefault(_var, str(BLAS_THREADS))
+
+thread_settings: Dict[str, int] = {
+    'inference': INFERENCE_THREADS or max(1, CPU_COUNT // INFERENCE_WORKERS),
+    'opencv': OPENCV_THREADS,
+    'blas': BLAS_THREADS
+}
+
+
+def configure_threads(processes: int = INFERENCE_WORKERS) -> Dict[str, int]:
+    """Apply the thread limits to OpenCV, PyTorch and BLAS; ``processes`` concurrent models share the cores"""
+    import cv2
+
+    thread_settings['inference'] = INFERENCE_THREADS or max(1, CPU_COUNT // max(1, processes))
+    cv2.setNumThreads(OPENCV_THREADS)
+    try:
+        import torch
+    except ImportError:  # Exported models and the OpenCV path need no PyTorch
+        torch = None
+    if torch is not None:
+        torch.set_num_threads(thread_settings['inference'])
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:  # Only settable before PyTorch's first parallel op
+            pass
+    if threadpool_limits is not None:
+        threadpool_limits(BLAS_THREADS, user_api='blas')
+    logger.info(f"🧵 Threads: {thread_settings['inference']} per inference, "
+                f"{OPENCV_THREADS} OpenCV, {BLAS_THREADS} BLAS ({CPU_COUNT} cores)")
+    return dict(thread_settings)
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB, or None where it cannot be read"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / MB
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class LoadShed(Exception):
+    """A frame was refused to keep the server within its resource limits"""
+
+
+class ResourceGovernor:
+    """Admits frames against the in-flight and memory limits, shedding load as they fill up
+
+    Pressure is the fuller of the two limits: frames in flight (counting the
+    one being admitted) over ``max_in_flight``, and RSS over
+    ``memory_limit_mb``. From level 1 frames are inferred at ``shed_imgsz``
+    and visualizations are skipped, at level 2 low-priority cameras are
+    dropped and at level 3 normal ones too. Critical and boosted cameras keep
+    full resolution and are only refused at the hard in-flight cap. Above the
+    memory limit ``reclaim`` (e.g. trimming the buffer pool) is called. Every
+    decision is counted per camera.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT_FRAMES, memory_limit_mb: float = MEMORY_LIMIT_MB,
+                 shed_imgsz: int = SHED_IMGSZ, profile_lookup: Optional[Callable[[str], Dict]] = None,
+                 reclaim: Optional[Callable[[], int]] = None):
+        self.max_in_flight = max(1, max_in_flight)
+        self.memory_limit_mb = memory_limit_mb
+        self.shed_imgsz = shed_imgsz
+        self.profile_lookup = profile_lookup
+        self.reclaim = reclaim
+        self.in_flight = 0
+        self.level = 0
+        self.pressure = 0.0
+        self._rss_mb: Optional[float] = None
+        self._rss_at = 0.0
+        self._decisions: Dict[str, int] = {}
+        self._cameras: Dict[str, Dict[str, int]] = {}
+        self._recent: Deque[Dict] = deque(maxlen=RECENT_DECISIONS)
+        self._lock = threading.Lock()
+
+    def profile(self, camera_id: str) -> Dict:
+        if self.profile_lookup is not None:
+            return self.profile_lookup(camera_id)
+        weight, min_fps = PRIORITY_CLASSES[DEFAULT_PRIORITY]
+        return {'priority': DEFAULT_PRIORITY, 'effective_weight': weight, 'min_fps': min_fps}
+
+    def rss_mb(self) -> Optional[float]:
+        """Sampled RSS; past the memory limit this also reclaims cached memory"""
+        now = time.time()
+        if now - self._rss_at < RSS_SAMPLE_SECONDS:
+            return self._rss_mb
+        self._rss_at = now
+        self._rss_mb = current_rss_mb()
+        if self.reclaim is not None and self.memory_limit_mb and (self._rss_mb or 0) > self.memory_limit_mb:
+            freed = self.reclaim()
+            self.record('reclaimed_memory', None, f"RSS {self._rss_mb:.0f} MB over {self.memory_limit_mb:.0f} MB, "
+                                                  f"released {freed / MB:.1f} MB")
+        return self._rss_mb
+
+    def record(self, decision: str, camera_id: Optional[str] = None, reason: str = ''):
+        """Count one load shedding decision"""
+        with self._lock:
+            self._decisions[decision] = self._decisions.get(decision, 0) + 1
+            if camera_id is not None:
+                camera = self._cameras.setdefault(camera_id, {})
+                camera[decision] = camera.get(decision, 0) + 1
+            self._recent.append({'time': time.time(), 'decision': decision, 'camera_id': camera_id,
+                                 'level': self.level, 'reason': reason})
+
+    def _set_level(self, pressure: float) -> int:
+        """Update pressure and level (lock held)"""
+        level = sum(pressure >= t for t in SHED_THRESHOLDS)
+        if level != self.level:
+            log = logger.warning if level > self.level else logger.info
+            log(f"🛡️ Load shedding level {self.level} → {level} (pressure {pressure:.2f})")
+        self.pressure = pressure
+        self.level = level
+        return level
+
+    @contextmanager
+    def admit(self, camera_id: str):
+        """Hold an in-flight slot for one frame
+
+        Yields ``{'level', 'imgsz', 'visualize'}`` (``imgsz`` is None for full
+        resolution) or raises ``LoadShed`` if the frame is refused.
+        """
+        profile = self.profile(camera_id)
+        protected = profile['priority'] == 'critical' or profile.get('boosted', False)
+        rss = self.rss_mb()
+        memory_pressure = rss / self.memory_limit_mb if self.memory_limit_mb and rss is not None else 0.0
+        with self._lock:
+            level = self._set_level(max((self.in_flight + 1) / self.max_in_flight, memory_pressure))
+            if self.in_flight >= self.max_in_flight:
+                reason = f"{self.in_flight} frames already in flight"
+            elif not protected and profile['priority'] in SHED_PRIORITIES[level]:
+                reason = f"{profile['priority']} priority at load level {level}"
+            else:
+                reason = None
+                self.in_flight += 1
+        if reason is not None:
+            self.record('dropped_frame', camera_id, reason)
+            raise LoadShed(f"Frame from camera {camera_id} shed: {reason}")
+
+        admission = {'level': level, 'imgsz': None if level == 0 or protected else self.shed_imgsz,
+                     'visualize': level == 0}
+        if admission['imgsz']:
+            self.record('reduced_resolution', camera_id, f"inferred at {self.shed_imgsz}px at load level {level}")
+        try:
+            yield admission
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        rss = self.rss_mb()
+        with self._lock:
+            return {
+                'level': self.level,
+                'pressure': round(self.pressure, 3),
+                'in_flight': self.in_flight,
+                'rss_mb': round(rss, 1) if rss is not None else None,
+                'limits': {
+                    'max_in_flight': self.max_in_flight,
+                    'memory_limit_mb': self.memory_limit_mb or None,
+                    'max_request_mb': MAX_REQUEST_MB,
+                    'shed_imgsz': self.shed_imgsz
+                },
+                'threads': dict(thread_settings),
+                'decisions': dict(self._decisions),
+                'cameras': {camera_id: dict(counts) for camera_id, counts in self._cameras.items()},
+                'recent': list(self._recent)
+            }
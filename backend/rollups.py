@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Detection Rollups
+Rolling per-camera, per-class detection aggregates at 1 s / 1 min / 1 h resolution
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from detector import COUNT_KEYS
+
+# Resolution name -> (bucket seconds, buckets kept)
+RESOLUTIONS = {
+    '1s': (1, 300),      # Last 5 minutes
+    '1m': (60, 180),     # Last 3 hours
+    '1h': (3600, 168)    # Last 7 days
+}
+
+TYPES = list(COUNT_KEYS)
+
+# Series key covering every camera
+ALL_CAMERAS = '*'
+
+
+class RingSeries:
+    """Fixed-size ring of time buckets holding per-type sums and maxima
+
+    Each slot remembers which bucket it holds, so stale slots from a previous
+    lap of the ring read as zero without any background clearing.
+    """
+
+    def __init__(self, bucket_seconds: int, size: int):
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        self.bucket_ids = np.full(size, -1, dtype=np.int64)
+        self.frames = np.zeros(size, dtype=np.int64)
+        self.sums = np.zeros((size, len(TYPES)), dtype=np.int64)
+        self.maxima = np.zeros((size, len(TYPES)), dtype=np.int32)
+
+    def add(self, timestamp: float, counts: np.ndarray):
+        bucket = int(timestamp // self.bucket_seconds)
+        slot = bucket % self.size
+        if self.bucket_ids[slot] != bucket:
+            self.bucket_ids[slot] = bucket
+            self.frames[slot] = 0
+            self.sums[slot] = 0
+            self.maxima[slot] = 0
+        self.frames[slot] += 1
+        self.sums[slot] += counts
+        np.maximum(self.maxima[slot], counts, out=self.maxima[slot])
+
+    def series(self, now: float, points: int) -> Dict:
+        """The most recent ``points`` buckets, oldest first, with empty buckets as zero"""
+        points = max(1, min(points, self.size))
+        last = int(now // self.bucket_seconds)
+        buckets = np.arange(last - points + 1, last + 1)
+        slots = buckets % self.size
+        valid = self.bucket_ids[slots] == buckets
+
+        frames = np.where(valid, self.frames[slots], 0)
+        sums = np.where(valid[:, None], self.sums[slots], 0)
+        maxima = np.where(valid[:, None], self.maxima[slots], 0)
+        return {
+            'bucket_seconds': self.bucket_seconds,
+            'timestamps': (buckets * self.bucket_seconds).tolist(),
+            'frames': frames.tolist(),
+            'sum': {COUNT_KEYS[t]: sums[:, i].tolist() for i, t in enumerate(TYPES)},
+            'max': {COUNT_KEYS[t]: maxima[:, i].tolist() for i, t in enumerate(TYPES)}
+        }
+
+
+class DetectionRollups:
+    """Maintains ring-buffer rollups as frames arrive
+
+    ``record`` is O(resolutions) per frame; reading a series never touches
+    raw detections.
+    """
+
+    def __init__(self, resolutions: Optional[Dict] = None):
+        self.resolutions = resolutions or RESOLUTIONS
+        self._series: Dict[str, Dict[str, RingSeries]] = {}
+        self._latest: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _camera_series(self, camera_id: str) -> Dict[str, RingSeries]:
+        series = self._series.get(camera_id)
+        if series is None:
+            series = self._series[camera_id] = {
+                name: RingSeries(seconds, size) for name, (seconds, size) in self.resolutions.items()
+            }
+        return series
+
+    def record(self, camera_id: str, counts: Dict, timestamp: Optional[float] = None):
+        """Add one frame's per-type counts (as returned by /detect) to every resolution"""
+        timestamp = timestamp or time.time()
+        values = np.array([counts.get(COUNT_KEYS[t], 0) for t in TYPES], dtype=np.int32)
+        with self._lock:
+            for key in (camera_id, ALL_CAMERAS):
+                for ring in self._camera_series(key).values():
+                    ring.add(timestamp, values)
+            self._latest[camera_id] = {'counts': dict(counts), 'timestamp': timestamp}
+
+    def series(self, resolution: str = '1m', camera_id: str = ALL_CAMERAS,
+               points: int = 60, now: Optional[float] = None) -> Optional[Dict]:
+        """Rollup series for a camera (or all cameras) at one resolution"""
+        if resolution not in self.resolutions:
+            raise ValueError(f"Unknown resolution '{resolution}', expected one of {list(self.resolutions)}")
+        with self._lock:
+            series = self._series.get(camera_id)
+            if series is None:
+                return None
+            return {'camera_id': camera_id, 'resolution': resolution,
+                    **series[resolution].series(now or time.time(), points)}
+
+    def cameras(self) -> List[str]:
+        with self._lock:
+            return [camera for camera in self._series if camera != ALL_CAMERAS]
+
+    def summary(self, window_seconds: int = 60, now: Optional[float] = None) -> Dict:
+        """Latest counts per camera plus totals over the last ``window_seconds``
+
+        The window is read from the 1 s ring, so it is clamped to the span that
+        ring holds and the clamped value is what gets reported.
+        """
+        now = now or time.time()
+        points = max(1, min(int(window_seconds), RESOLUTIONS['1s'][1]))
+        with self._lock:
+            cameras = {}
+            for camera_id, latest in self._latest.items():
+                window = self._series[camera_id]['1s'].series(now, points)
+                cameras[camera_id] = {
+                    'latest': latest['counts'],
+                    'last_frame': latest['timestamp'],
+                    'window_max': {key: max(values) for key, values in window['max'].items()},
+                    'window_frames': sum(window['frames'])
+                }
+            totals = {}
+            if ALL_CAMERAS in self._series:
+                window = self._series[ALL_CAMERAS]['1s'].series(now, points)
+                totals = {key: sum(values) for key, values in window['sum'].items()}
+            current = {key: 0 for key in COUNT_KEYS.values()}
+            for latest in self._latest.values():
+                for key in current:
+                    current[key] += latest['counts'].get(key, 0)
+        return {
+            'window_seconds': points,
+            'current': current,
+            'window_totals': totals,
+            'cameras': cameras,
+            'timestamp': now
+        }
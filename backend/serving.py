@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Serving Mode
+Selects the Socket.IO async worker, offloads blocking work and configures the message queue
+
+Import this module before anything else in an entry point: in ``eventlet`` or
+``gevent`` mode it monkey-patches the standard library on import.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# 'threading' (development server), 'eventlet' or 'gevent'
+SERVER_MODE = os.environ.get('RAKSHAK_SERVER_MODE', 'threading')
+# e.g. redis://localhost:6379/0 so several worker processes can emit to every client
+MESSAGE_QUEUE = os.environ.get('RAKSHAK_MESSAGE_QUEUE') or None
+OFFLOAD_THREADS = int(os.environ.get('RAKSHAK_OFFLOAD_THREADS', '4'))
+SERVER_HOST = os.environ.get('RAKSHAK_HOST', '0.0.0.0')
+SERVER_PORT = int(os.environ.get('RAKSHAK_PORT', '5000'))
+
+if SERVER_MODE == 'eventlet':
+    os.environ.setdefault('EVENTLET_THREADPOOL_SIZE', str(OFFLOAD_THREADS))
+    import eventlet
+    import eventlet.patcher
+    import eventlet.tpool
+    eventlet.monkey_patch()
+elif SERVER_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+    import gevent
+elif SERVER_MODE != 'threading':
+    raise ValueError(f"Unknown RAKSHAK_SERVER_MODE '{SERVER_MODE}', expected threading, eventlet or gevent")
+else:
+    import threading
+
+
+def socketio_options() -> dict:
+    """Keyword arguments for ``SocketIO(app, ...)`` matching the serving mode"""
+    options = {'async_mode': SERVER_MODE}
+    if MESSAGE_QUEUE:
+        options['message_queue'] = MESSAGE_QUEUE
+    return options
+
+
+def run_blocking(function, *args, **kwargs):
+    """Run CPU-bound or native code (inference, decoding, encoding) off the event loop
+
+    Under eventlet/gevent a long call in a green thread would stall every
+    connection on the hub, so it is handed to a real OS thread pool instead.
+    In threading mode each request already has its own thread.
+    """
+    if SERVER_MODE == 'eventlet':
+        return eventlet.tpool.execute(function, *args, **kwargs)
+    if SERVER_MODE == 'gevent':
+        return gevent.get_hub().threadpool.apply(function, args, kwargs)
+    return function(*args, **kwargs)
+
+
+def native_lock():
+    """A lock that blocks real OS threads even after monkey-patching
+
+    Green locks are not safe across the OS threads ``run_blocking`` uses, so
+    state shared with those workers takes one of these. Keep the critical
+    sections short and never yield to the event loop while holding it.
+    """
+    if SERVER_MODE == 'eventlet':
+        return eventlet.patcher.original('threading').Lock()
+    if SERVER_MODE == 'gevent':
+        return monkey.get_original('threading', 'Lock')()
+    return threading.Lock()
+
+
+def run_server(app, socketio, host: str = SERVER_HOST, port: int = SERVER_PORT):
+    """Serve the app with the configured worker"""
+    if SERVER_MODE == 'threading':
+        logger.info(f"Serving on {host}:{port} with the development server "
+                    f"(set RAKSHAK_SERVER_MODE=eventlet for production)")
+        socketio.run(app, host=host, port=port, debug=False, allow_unsafe_werkzeug=True)
+    else:
+        logger.info(f"Serving on {host}:{port} with {SERVER_MODE} "
+                    f"(message queue: {MESSAGE_QUEUE or 'none'})")
+        socketio.run(app, host=host, port=port, debug=False)
@@ -7,6 +7,8 @@ import os
 import shutil
 import logging
 
+from model_registry import CUSTOM_MODEL_PATH, MODEL_SEARCH_PATHS, ModelRegistry
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,16 +16,11 @@ logger = logging.getLogger(__name__)
 def setup_custom_model():
     """Copy custom YOLO model to backend directory"""
     
-    # Possible locations of the custom model
-    custom_model_paths = [
-        "../yolo/runs/detect/detect3_resume2/weights/best.pt",
-        "yolo/runs/detect/detect3_resume2/weights/best.pt",
-        "../yolo/best.pt",
-        "yolo/best.pt"
-    ]
-    
     # Target location in backend
-    target_path = "custom_model.pt"
+    target_path = CUSTOM_MODEL_PATH
+    
+    # Possible locations of the custom model
+    custom_model_paths = [path for path in MODEL_SEARCH_PATHS if path != target_path]
     
     # Find and copy custom model
     for source_path in custom_model_paths:
@@ -31,6 +28,9 @@ def setup_custom_model():
             try:
                 shutil.copy2(source_path, target_path)
                 logger.info(f"Custom YOLO model copied from {source_path} to {target_path}")
+                
+                # Index the copy so the server can resolve it by name
+                ModelRegistry().scan()
                 return True
             except Exception as e:
                 logger.error(f"Failed to copy model from {source_path}: {e}")
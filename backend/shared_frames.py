@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Shared-Memory Frame Rings
+Raw frame handoff from capture processes on the same host, without JPEG or HTTP
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # Python < 3.8: local cameras use the network path
+    shared_memory = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'RKFR'
+VERSION = 1
+DEFAULT_SLOTS = 4
+ALIGNMENT = 64
+POLL_INTERVAL = 0.005          # Seconds between checks for a new frame
+HEARTBEAT_TIMEOUT = 5.0        # A reader silent for this long is considered gone
+
+HEADER_DTYPE = np.dtype({
+    'names': ['magic', 'version', 'slots', 'closed', 'capacity', 'latest', 'pinned', 'reader_heartbeat'],
+    'formats': ['S4', '<u4', '<u4', '<u4', '<u8', '<u8', '<u8', '<f8'],
+    'itemsize': ALIGNMENT
+})
+SLOT_DTYPE = np.dtype({
+    'names': ['begin', 'end', 'height', 'width', 'channels', 'timestamp'],
+    'formats': ['<u8', '<u8', '<u4', '<u4', '<u4', '<f8'],
+    'offsets': [0, 8, 16, 20, 24, 32],
+    'itemsize': ALIGNMENT
+})
+
+
+class SharedFrameError(Exception):
+    """A ring could not be created, attached or written"""
+
+
+def available() -> bool:
+    return shared_memory is not None
+
+
+def ring_name(camera_id: str, generation: int = 0) -> str:
+    """Short, filesystem-safe segment name (macOS allows 31 characters)"""
+    digest = hashlib.sha1(str(camera_id).encode('utf-8')).hexdigest()[:10]
+    return f"rk_{digest}_{os.getpid()}_{generation}"
+
+
+def _aligned(size: int) -> int:
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class FrameRing:
+    """Views over a ring segment: a header, ``slots`` slot headers, then the frame slots
+
+    Each slot is a seqlock: the writer sets ``begin`` to the new sequence
+    number, copies the frame, then sets ``end``; a slot is intact while
+    ``begin == end``. The reader publishes the sequence it is using in
+    ``pinned`` and the writer never overwrites that slot, so frames can be
+    read in place.
+    """
+
+    def __init__(self, segment):
+        self.segment = segment
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=segment.buf)
+        if self.header['magic'].item() != MAGIC or int(self.header['version']) != VERSION:
+            self.header = None
+            raise SharedFrameError(f"{segment.name} is not a frame ring")
+        self.slot_count = int(self.header['slots'])
+        self.capacity = int(self.header['capacity'])
+        self.slots = np.ndarray((self.slot_count,), SLOT_DTYPE, buffer=segment.buf, offset=ALIGNMENT)
+        self.data_offset = ALIGNMENT * (1 + self.slot_count)
+
+    @staticmethod
+    def size(slots: int, capacity: int) -> int:
+        return ALIGNMENT * (1 + slots) + slots * capacity
+
+    def view(self, index: int) -> np.ndarray:
+        slot = self.slots[index]
+        shape = (int(slot['height']), int(slot['width']), int(slot['channels']))
+        return np.ndarray(shape, np.uint8, buffer=self.segment.buf, offset=self.data_offset + index * self.capacity)
+
+    def release(self):
+        """Drop every view so the segment can be closed"""
+        self.header = None
+        self.slots = None
+
+    def close(self):
+        self.release()
+        try:
+            self.segment.close()
+        except BufferError:
+            # A frame view is still referenced somewhere; the mapping goes with the process
+            logger.debug(f"Frame ring {self.segment.name} still has live views")
+
+
+class FrameRingWriter:
+    """Capture-process side: creates the segment and writes frames into it"""
+
+    def __init__(self, camera_id: str, frame_shape: Tuple[int, ...], slots: int = DEFAULT_SLOTS,
+                 name: Optional[str] = None):
+        if shared_memory is None:
+            raise SharedFrameError("multiprocessing.shared_memory is not available")
+        if slots < 3:
+            raise SharedFrameError("A frame ring needs at least 3 slots")
+        self.camera_id = camera_id
+        self.capacity = _aligned(int(np.prod(frame_shape)))
+        self.name = name or ring_name(camera_id)
+        segment = shared_memory.SharedMemory(name=self.name, create=True, size=FrameRing.size(slots, self.capacity))
+        header = np.ndarray((), HEADER_DTYPE, buffer=segment.buf)
+        header[()] = (MAGIC, VERSION, slots, 0, self.capacity, 0, 0, 0.0)
+        del header
+        self.ring = FrameRing(segment)
+        self.sequence = 0
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """Copy a uint8 frame into the next free slot and publish it; returns its sequence number"""
+        if frame.dtype != np.uint8 or frame.ndim != 3 or frame.shape[2] != 3:
+            raise SharedFrameError("Frames must be BGR uint8 arrays of shape (h, w, 3)")
+        if frame.nbytes > self.capacity:
+            raise SharedFrameError(f"Frame of {frame.nbytes} bytes exceeds the ring slot size {self.capacity}")
+        ring = self.ring
+        sequence = self.sequence + 1
+        pinned = int(ring.header['pinned'])
+        index = sequence % ring.slot_count
+        # Skip the slot the server is reading from; with 3+ slots another is always free
+        if pinned and int(ring.slots[index]['end']) == pinned:
+            index = (index + 1) % ring.slot_count
+
+        slots = ring.slots
+        slots['begin'][index] = sequence
+        target = np.ndarray(frame.shape, np.uint8, buffer=ring.segment.buf,
+                            offset=ring.data_offset + index * ring.capacity)
+        np.copyto(target, frame)
+        del target
+        slots['height'][index], slots['width'][index] = frame.shape[:2]
+        slots['channels'][index] = frame.shape[2]
+        slots['timestamp'][index] = timestamp or time.time()
+        slots['end'][index] = sequence
+        ring.header['latest'] = sequence
+        self.sequence = sequence
+        return sequence
+
+    def reader_alive(self) -> bool:
+        return time.time() - float(self.ring.header['reader_heartbeat']) < HEARTBEAT_TIMEOUT
+
+    def close(self):
+        """Mark the ring closed for the reader and remove the segment"""
+        if self.ring.header is not None:
+            self.ring.header['closed'] = 1
+        segment = self.ring.segment
+        self.ring.close()
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedFrame:
+    """A frame read in place from a ring; check ``intact()`` before trusting results derived from it"""
+
+    __slots__ = ('ring', 'index', 'sequence', 'image', 'timestamp')
+
+    def __init__(self, ring: FrameRing, index: int, sequence: int):
+        self.ring = ring
+        self.index = index
+        self.sequence = sequence
+        self.image = ring.view(index)
+        self.timestamp = float(ring.slots[index]['timestamp'])
+
+    def intact(self) -> bool:
+        """Whether the writer left the slot alone while the frame was in use"""
+        slot = self.ring.slots[self.index]
+        return int(slot['begin']) == self.sequence and int(slot['end']) == self.sequence
+
+
+def _attach(name: str):
+    """Open an existing segment without letting this process's resource tracker unlink it on exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 always registers attached segments
+        segment = shared_memory.SharedMemory(name=name)
+        try:
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        except Exception:
+            pass
+        return segment
+
+
+class FrameRingReader:
+    """Server side: follows the newest frame of one ring"""
+
+    def __init__(self, name: str):
+        if shared_memory is None:
+            raise SharedFrameError("multiprocessing.shared_memory is not available")
+        try:
+            self.ring = FrameRing(_attach(name))
+        except FileNotFoundError:
+            raise SharedFrameError(f"No frame ring named {name}")
+        self.name = name
+        self.last_sequence = 0
+
+    @property
+    def closed(self) -> bool:
+        return self.ring.header is None or bool(self.ring.header['closed'])
+
+    def latest(self) -> Optional[SharedFrame]:
+        """Pin and return the newest unseen frame, or None if there is none yet
+
+        Frames published while an older one was being processed are skipped,
+        so a slow model always works on the most recent image.
+        """
+        ring = self.ring
+        ring.header['reader_heartbeat'] = time.time()
+        sequence = int(ring.header['latest'])
+        if sequence <= self.last_sequence:
+            return None
+        for index in range(ring.slot_count):
+            if int(ring.slots[index]['end']) == sequence:
+                break
+        else:
+            return None
+        ring.header['pinned'] = sequence
+        frame = SharedFrame(ring, index, sequence)
+        if not frame.intact():
+            ring.header['pinned'] = 0
+            return None
+        self.last_sequence = sequence
+        return frame
+
+    def release(self):
+        if self.ring.header is not None:
+            self.ring.header['pinned'] = 0
+
+    def close(self):
+        self.ring.close()
+
+
+class SharedFrameReceiver:
+    """Runs ``handler(camera_id, frame, options)`` on each new frame of every attached ring
+
+    Each ring gets its own loop, started with ``spawn`` (a thread by
+    default, or the Socket.IO background task under eventlet/gevent). Loops
+    end when the writer closes its ring or the camera is detached.
+    """
+
+    def __init__(self, handler: Callable[[str, SharedFrame, Dict], bool],
+                 spawn: Optional[Callable] = None, sleep: Callable[[float], None] = time.sleep,
+                 poll_interval: float = POLL_INTERVAL):
+        self.handler = handler
+        self.spawn = spawn or (lambda target, *args: threading.Thread(target=target, args=args, daemon=True).start())
+        self.sleep = sleep
+        self.poll_interval = poll_interval
+        self._cameras: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, camera_id: str, name: str, options: Optional[Dict] = None) -> Dict:
+        """Start following ``name`` for ``camera_id``, replacing any ring it had"""
+        reader = FrameRingReader(name)
+        entry = {'reader': reader, 'options': dict(options or {}), 'attached_at': time.time(),
+                 'frames': 0, 'skipped': 0, 'torn': 0, 'errors': 0, 'last_frame': None}
+        with self._lock:
+            previous = self._cameras.get(camera_id)
+            self._cameras[camera_id] = entry
+        if previous is not None:
+            previous['stop'] = True
+        self.spawn(self._run, camera_id, entry)
+        logger.info(f"🔗 Camera {camera_id} attached over shared memory ({name})")
+        return self._entry_stats(entry)
+
+    def detach(self, camera_id: str) -> bool:
+        with self._lock:
+            entry = self._cameras.pop(camera_id, None)
+        if entry is None:
+            return False
+        entry['stop'] = True
+        return True
+
+    def _run(self, camera_id: str, entry: Dict):
+        reader = entry['reader']
+        try:
+            while not entry.get('stop') and not reader.closed:
+                frame = reader.latest()
+                if frame is None:
+                    self.sleep(self.poll_interval)
+                    continue
+                try:
+                    if entry['last_frame']:
+                        entry['skipped'] += frame.sequence - entry['last_frame'] - 1
+                    entry['last_frame'] = frame.sequence
+                    if self.handler(camera_id, frame, entry['options']):
+                        entry['frames'] += 1
+                    else:
+                        entry['torn'] += 1
+                except Exception as e:
+                    entry['errors'] += 1
+                    logger.error(f"Error processing shared frame from {camera_id}: {e}")
+                finally:
+                    reader.release()
+                    del frame
+        finally:
+            with self._lock:
+                if self._cameras.get(camera_id) is entry:
+                    del self._cameras[camera_id]
+            reader.close()
+            logger.info(f"Camera {camera_id} detached from shared memory")
+
+    @staticmethod
+    def _entry_stats(entry: Dict) -> Dict:
+        return {
+            'ring': entry['reader'].name,
+            'options': entry['options'],
+            'attached_at': entry['attached_at'],
+            'frames': entry['frames'],
+            'skipped': entry['skipped'],
+            'torn': entry['torn'],
+            'errors': entry['errors'],
+            'last_frame': entry['last_frame']
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'available': available(),
+                    'cameras': {camera_id: self._entry_stats(entry) for camera_id, entry in self._cameras.items()}}
+
+    def cameras(self) -> List[str]:
+        with self._lock:
+            return list(self._cameras)
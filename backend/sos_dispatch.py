@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+SOS Dispatcher
+Dedicated priority queue and acknowledge-and-retry delivery for soldier SOS signals
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_BUDGET_MS = 100.0   # Target from SOS receipt to first emit
+DEFAULT_RETRY_INTERVAL = 0.25  # Seconds before the first resend to a client that has not acked
+MAX_RETRY_INTERVAL = 2.0
+DEFAULT_MAX_ATTEMPTS = 20
+RESOLVED_RETENTION = 600.0   # Seconds a resolved alert is kept so repeated resolves still find it
+LATENCY_HISTORY = 1000
+
+# Lower runs first; resends never wait behind a fresh SOS
+PRIORITY_SOS = 0
+PRIORITY_RETRY = 1
+PRIORITY_RESOLVE = 2
+
+
+def latency_summary(samples: Deque[float]) -> Dict:
+    """Percentiles in milliseconds over the recent samples"""
+    if not samples:
+        return {'count': 0}
+    values = np.fromiter(samples, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': len(values),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'max_ms': round(float(values.max()), 2),
+        'within_budget': round(float((values <= DELIVERY_BUDGET_MS).mean()), 4)
+    }
+
+
+class SOSDispatcher:
+    """Delivers SOS alerts to every connected client until each one acknowledges
+
+    SOS signals never touch the inference path: ``raise_sos`` only records the
+    alert and wakes a dedicated dispatcher thread, which emits through the
+    supplied ``emit(event, payload, sid)`` callable. Clients that have not
+    answered with an ack are resent the alert with exponential backoff; clients
+    connecting later receive every active SOS. A repeated SOS starts a new
+    delivery generation, and queued sends from earlier generations are dropped.
+    """
+
+    def __init__(self, emit: Callable[[str, Dict, str], None],
+                 retry_interval: float = DEFAULT_RETRY_INTERVAL,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.emit = emit
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        self.clients: set = set()
+        self.alerts: Dict[str, Dict] = {}
+        self._pending: Dict[str, Dict[str, int]] = {}   # sos id -> {sid: attempts}
+        self._heap: List = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self.dispatch_latency: Deque[float] = deque(maxlen=LATENCY_HISTORY)
+        self.ack_latency: Deque[float] = deque(maxlen=LATENCY_HISTORY)
+        self.counters = {'raised': 0, 'resolved': 0, 'emits': 0, 'retries': 0, 'acks': 0, 'undelivered': 0}
+        self._thread = threading.Thread(target=self._run, name='sos-dispatcher', daemon=True)
+        self._thread.start()
+
+    def _schedule(self, due: float, priority: int, action: str, sos_id: str, sid: Optional[str] = None):
+        generation = self.alerts[sos_id]['_generation']
+        heapq.heappush(self._heap, (due, priority, next(self._counter), action, sos_id, sid, generation))
+        self._cond.notify()
+
+    def _prune_resolved(self, now: float):
+        """Forget alerts resolved more than ``RESOLVED_RETENTION`` seconds ago"""
+        for sos_id in [i for i, a in self.alerts.items()
+                       if a['status'] == 'resolved' and now - a['resolved_at'] > RESOLVED_RETENTION]:
+            del self.alerts[sos_id]
+
+    def add_client(self, sid: str):
+        """Register a connected client and queue every active SOS for it; repeats are ignored"""
+        with self._cond:
+            if sid in self.clients:
+                return
+            self.clients.add(sid)
+            now = time.monotonic()
+            for sos_id, alert in self.alerts.items():
+                if alert['status'] == 'active':
+                    self._pending.setdefault(sos_id, {})[sid] = 0
+                    self._schedule(now, PRIORITY_SOS, 'send', sos_id, sid)
+
+    def remove_client(self, sid: str):
+        with self._cond:
+            self.clients.discard(sid)
+            for waiting in self._pending.values():
+                waiting.pop(sid, None)
+
+    def raise_sos(self, soldier_id: str, details: Optional[Dict] = None) -> Dict:
+        """Record an SOS and hand it to the dispatcher; returns the alert"""
+        received = time.monotonic()
+        with self._cond:
+            # A repeated SOS from the same soldier re-sends the existing alert
+            for alert in self.alerts.values():
+                if alert['soldier_id'] == soldier_id and alert['status'] == 'active':
+                    alert.update(details or {})
+                    alert['updated_at'] = time.time()
+                    alert['_generation'] += 1
+                    break
+            else:
+                alert = {
+                    **(details or {}),
+                    'id': f"SOS-{uuid.uuid4().hex[:10]}",
+                    'soldier_id': soldier_id,
+                    'status': 'active',
+                    'raised_at': time.time(),
+                    'updated_at': time.time(),
+                    '_generation': 0
+                }
+                self.alerts[alert['id']] = alert
+                self.counters['raised'] += 1
+                self._prune_resolved(time.time())
+            alert['_received'] = received
+            self._pending[alert['id']] = {sid: 0 for sid in self.clients}
+            self._schedule(received, PRIORITY_SOS, 'deliver', alert['id'])
+            logger.warning(f"🆘 SOS {alert['id']} from soldier {soldier_id}")
+            return self._public(alert)
+
+    def acknowledge(self, sos_id: str, sid: str) -> Optional[float]:
+        """Mark delivery to one client; returns the receipt-to-ack latency in ms"""
+        with self._cond:
+            alert = self.alerts.get(sos_id)
+            waiting = self._pending.get(sos_id)
+            if alert is None or waiting is None or waiting.pop(sid, None) is None:
+                return None
+            latency = (time.monotonic() - alert['_received']) * 1000
+            self.ack_latency.append(latency)
+            self.counters['acks'] += 1
+            alert.setdefault('acknowledged_by', []).append(sid)
+            return latency
+
+    def resolve(self, sos_id: str, resolved_by: Optional[str] = None) -> Optional[Dict]:
+        with self._cond:
+            alert = self.alerts.get(sos_id)
+            if alert is None:
+                return None
+            if alert['status'] == 'active':
+                alert['status'] = 'resolved'
+                alert['resolved_at'] = time.time()
+                alert['resolved_by'] = resolved_by
+                self._pending.pop(sos_id, None)
+                self.counters['resolved'] += 1
+                self._schedule(time.monotonic(), PRIORITY_RESOLVE, 'resolve', sos_id)
+            self._prune_resolved(time.time())
+            return self._public(alert)
+
+    def active(self) -> List[Dict]:
+        with self._cond:
+            return [self._public(a) for a in self.alerts.values() if a['status'] == 'active']
+
+    @staticmethod
+    def _public(alert: Dict) -> Dict:
+        return {k: v for k, v in alert.items() if not k.startswith('_')}
+
+    def _track_attempt(self, sos_id: str, sid: str):
+        """Count a send and schedule the resend that fires unless the client acks first"""
+        waiting = self._pending[sos_id]
+        attempts = waiting[sid] = waiting[sid] + 1
+        if attempts > 1:
+            self.counters['retries'] += 1
+        if attempts >= self.max_attempts:
+            waiting.pop(sid)
+            self.counters['undelivered'] += 1
+            logger.error(f"SOS {sos_id} not acknowledged by {sid} after {attempts} attempts")
+            return
+        backoff = min(MAX_RETRY_INTERVAL, self.retry_interval * 2 ** (attempts - 1))
+        self._schedule(time.monotonic() + backoff, PRIORITY_RETRY, 'send', sos_id, sid)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, _, action, sos_id, sid, generation = heapq.heappop(self._heap)
+                alert = self.alerts.get(sos_id)
+                if alert is None or (action != 'resolve' and generation != alert['_generation']):
+                    # Superseded by a repeated SOS, whose own deliver covers every client again
+                    continue
+                payload = self._public(alert)
+                if action == 'resolve':
+                    targets = list(self.clients)
+                elif alert['status'] != 'active':
+                    continue
+                else:
+                    waiting = self._pending.get(sos_id, {})
+                    targets = list(waiting) if action == 'deliver' else [sid] if sid in waiting else []
+                    for target in targets:
+                        self._track_attempt(sos_id, target)
+                received = alert['_received']
+
+            # Emit outside the lock so acks are never blocked by slow sockets
+            event = 'sos_resolved' if action == 'resolve' else 'sos_alert'
+            for target in targets:
+                try:
+                    self.emit(event, payload, target)
+                    self.counters['emits'] += 1
+                except Exception as e:
+                    logger.error(f"Error emitting {event} to {target}: {e}")
+            if action == 'deliver':
+                latency = (time.monotonic() - received) * 1000
+                self.dispatch_latency.append(latency)
+                if latency > DELIVERY_BUDGET_MS:
+                    logger.warning(f"SOS {sos_id} dispatch took {latency:.1f} ms")
+
+    def stats(self) -> Dict:
+        with self._cond:
+            pending = sum(len(waiting) for waiting in self._pending.values())
+            active = sum(1 for a in self.alerts.values() if a['status'] == 'active')
+            return {
+                'budget_ms': DELIVERY_BUDGET_MS,
+                'active': active,
+                'clients': len(self.clients),
+                'pending_acks': pending,
+                'counters': dict(self.counters),
+                'dispatch_latency': latency_summary(self.dispatch_latency),
+                'ack_latency': latency_summary(self.ack_latency)
+            }
@@ -3,12 +3,17 @@
 Startup script for YOLO Detection Backend
 """
 
+# Imported first: patches the standard library when serving with eventlet/gevent
+import serving
+
 import os
 import sys
 import subprocess
 import time
 import logging
 
+from model_registry import DEFAULT_MODEL, ModelRegistry
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,23 +44,17 @@ def install_dependencies():
 
 def check_yolo_model():
     """Check if YOLO model file exists"""
-    # Look for custom trained model first
-    custom_model_paths = [
-        "../yolo/runs/detect/detect3_resume2/weights/best.pt",
-        "yolo/runs/detect/detect3_resume2/weights/best.pt",
-        "../yolo/best.pt",
-        "yolo/best.pt"
-    ]
+    # Index custom trained weights in the model manifest
+    entries = ModelRegistry().scan()
     
-    for model_path in custom_model_paths:
-        if os.path.exists(model_path):
-            logger.info(f"Custom trained YOLO model found at {model_path}")
-            return True
+    for entry in entries:
+        logger.info(f"Custom trained YOLO model {entry['name']} v{entry['version']} found at {entry['path']}")
+    if entries:
+        return True
     
     # Check for default model
-    default_model_path = "yolov8n.pt"
-    if os.path.exists(default_model_path):
-        logger.info(f"Default YOLO model found at {default_model_path}")
+    if os.path.exists(DEFAULT_MODEL):
+        logger.info(f"Default YOLO model found at {DEFAULT_MODEL}")
         return True
     else:
         logger.warning(f"No YOLO model found. Will attempt to download default model.")
@@ -65,8 +64,9 @@ def start_server():
     """Start the Flask server"""
     logger.info("Starting YOLO Detection Backend Server...")
     try:
-        from yolo_detection import app
-        app.run(host='0.0.0.0', port=5000, debug=False)
+        from yolo_detection import app, socketio
+        from serving import run_server
+        run_server(app, socketio)
     except Exception as e:
         logger.error(f"Failed to start server: {e}")
         return False
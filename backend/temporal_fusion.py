@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Temporal Confidence Fusion
+Accumulates detection evidence across consecutive frames of each camera
+"""
+
+import logging
+import os
+from typing import Dict, List, Optional
+
+from delta_updates import bbox_iou
+from serving import native_lock
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: fusion holds back objects seen in a single frame, which changes what /detect reports
+FUSION_ENABLED = os.environ.get('RAKSHAK_TEMPORAL_FUSION', '0') not in ('0', 'false', 'no')
+
+DEFAULT_FUSION_CONFIG = {
+    'alpha': 0.5,             # Weight of the newest frame in the fused confidence
+    'candidate_scale': 0.5,   # The model runs at this fraction of the requested threshold
+    'confirm_scale': 0.8,     # Fused confidence needed to report an object, as a fraction of the threshold
+    'min_hits': 2,            # Frames an object must be seen in before it is reported
+    'max_missed': 2,          # Frames a reported object is carried through without a match
+    'miss_decay': 0.8,        # Fused confidence is multiplied by this for every missed frame
+    'match_iou': 0.3          # Minimum overlap to treat two boxes as the same object
+}
+
+
+class TemporalFusion:
+    """Per-camera exponential averaging of matched detections
+
+    The model runs at a lower candidate threshold and candidates are matched
+    to the previous frame's objects by IoU within the same type. Each object
+    keeps an exponential moving average of its confidence and is reported only
+    once it has been seen ``min_hits`` times with a fused confidence of at
+    least ``confirm_scale`` times the requested threshold. Persistent
+    low-confidence objects are therefore confirmed while single-frame spikes
+    never are. A reported object that is missed for up to ``max_missed``
+    frames keeps being reported with a decaying confidence instead of
+    flickering out, and is dropped once that falls below the candidate level.
+    Such carried detections are marked ``coasted`` so callers only display
+    them and do not treat them as new evidence.
+    """
+
+    def __init__(self, enabled: bool = FUSION_ENABLED, **config):
+        self.enabled = enabled
+        self.config = dict(DEFAULT_FUSION_CONFIG)
+        self._cameras: Dict[str, Dict[int, Dict]] = {}
+        self._next_id = 1
+        self._stats = {'frames': 0, 'candidates': 0, 'reported': 0, 'coasted': 0, 'suppressed': 0}
+        self._lock = native_lock()
+        if config:
+            self.configure(**config)
+
+    def configure(self, enabled: Optional[bool] = None, **settings) -> Dict:
+        """Enable/disable fusion or override settings; unknown keys raise ValueError"""
+        unknown = set(settings) - set(DEFAULT_FUSION_CONFIG)
+        if unknown:
+            raise ValueError(f"Unknown fusion settings: {sorted(unknown)}")
+        config = dict(self.config)
+        for key, value in settings.items():
+            config[key] = type(DEFAULT_FUSION_CONFIG[key])(value)
+        if not 0 < config['alpha'] <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        if not 0 < config['candidate_scale'] <= config['confirm_scale']:
+            raise ValueError("candidate_scale must be positive and at most confirm_scale")
+        if not 0 <= config['miss_decay'] <= 1:
+            raise ValueError("miss_decay must be in [0, 1]")
+        if config['min_hits'] < 1 or config['max_missed'] < 0:
+            raise ValueError("min_hits must be at least 1 and max_missed not negative")
+
+        with self._lock:
+            self.config = config
+            if enabled is not None:
+                self.enabled = bool(enabled)
+                if not self.enabled:
+                    self._cameras.clear()
+        logger.info(f"Temporal fusion {'enabled' if self.enabled else 'disabled'}: {config}")
+        return self.settings()
+
+    def settings(self) -> Dict:
+        return {'enabled': self.enabled, **self.config}
+
+    def active(self, camera_id: str, requested: bool = True) -> bool:
+        """Fusion needs a stable camera id; single images without one are left alone"""
+        return self.enabled and bool(requested) and camera_id not in (None, '', 'unknown')
+
+    def candidate_threshold(self, confidence_threshold: float) -> float:
+        """Threshold the model runs at when fusion is active"""
+        return confidence_threshold * self.config['candidate_scale']
+
+    def update(self, camera_id: str, candidates: List[Dict], confidence_threshold: float) -> List[Dict]:
+        """Fuse one frame's candidates into the camera's objects and return those to report
+
+        Reported detections carry the fused ``confidence``, the raw
+        ``frame_confidence`` (None while carried through a miss), ``hits`` and
+        ``coasted`` (True while carried through a miss).
+        """
+        config = self.config
+        alpha = config['alpha']
+        confirm_level = confidence_threshold * config['confirm_scale']
+        release_level = confidence_threshold * config['candidate_scale']
+
+        with self._lock:
+            tracks = self._cameras.setdefault(camera_id, {})
+            self._stats['frames'] += 1
+            self._stats['candidates'] += len(candidates)
+
+            # Greedy IoU matching within the same type, best overlaps first
+            pairs = []
+            for index, candidate in enumerate(candidates):
+                for track_id, track in tracks.items():
+                    if track['type'] == candidate['type']:
+                        iou = bbox_iou(track['bbox'], candidate['bbox'])
+                        if iou >= config['match_iou']:
+                            pairs.append((iou, index, track_id))
+            matched: Dict[int, int] = {}
+            used = set()
+            for _, index, track_id in sorted(pairs, key=lambda p: p[0], reverse=True):
+                if index not in matched and track_id not in used:
+                    matched[index] = track_id
+                    used.add(track_id)
+
+            for index, candidate in enumerate(candidates):
+                track_id = matched.get(index)
+                if track_id is None:
+                    track_id = self._next_id
+                    self._next_id += 1
+                    tracks[track_id] = {'type': candidate['type'], 'score': candidate['confidence'],
+                                        'hits': 1, 'missed': 0, 'confirmed': False}
+                    used.add(track_id)
+                else:
+                    track = tracks[track_id]
+                    track['score'] += alpha * (candidate['confidence'] - track['score'])
+                    track['hits'] += 1
+                    track['missed'] = 0
+                track = tracks[track_id]
+                track['bbox'] = candidate['bbox']
+                track['detection'] = candidate
+
+            reported = []
+            for track_id in list(tracks):
+                track = tracks[track_id]
+                seen = track_id in used
+                if not seen:
+                    track['missed'] += 1
+                    track['score'] *= config['miss_decay']
+                if not track['confirmed'] and track['hits'] >= config['min_hits'] and track['score'] >= confirm_level:
+                    track['confirmed'] = True
+                if track['score'] < release_level or track['missed'] > config['max_missed']:
+                    if not track['confirmed']:
+                        self._stats['suppressed'] += 1
+                    del tracks[track_id]
+                    continue
+                if not track['confirmed']:
+                    continue
+
+                detection = dict(track['detection'])
+                detection['frame_confidence'] = round(detection['confidence'], 4) if seen else None
+                detection['confidence'] = round(track['score'], 4)
+                detection['hits'] = track['hits']
+                detection['coasted'] = not seen
+                reported.append(detection)
+                self._stats['reported'] += 1
+                if not seen:
+                    self._stats['coasted'] += 1
+            return reported
+
+    def reset(self, camera_id: Optional[str] = None):
+        """Forget fused objects for one camera, or for all of them"""
+        with self._lock:
+            if camera_id is None:
+                self._cameras.clear()
+            else:
+                self._cameras.pop(camera_id, None)
+
+    def stats(self) -> Dict:
+        """Settings, counters and objects currently tracked per camera"""
+        with self._lock:
+            return {
+                **self.settings(),
+                **self._stats,
+                'cameras': {
+                    camera_id: {
+                        'tracked': len(tracks),
+                        'reported': sum(1 for t in tracks.values() if t['confirmed'])
+                    }
+                    for camera_id, tracks in self._cameras.items()
+                }
+            }
@@ -4,6 +4,9 @@ Unified Server for RAKSHAK AI Watch
 Serves both React frontend and Flask backend with YOLO detection on a single localhost
 """
 
+# Imported first: patches the standard library when serving with eventlet/gevent
+import serving
+
 import os
 import sys
 import subprocess
@@ -18,6 +21,7 @@ sys.path.insert(0, str(backend_dir))
 
 # Import the YOLO detection app
 from yolo_detection import app, socketio, detector
+from serving import run_server
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -156,7 +160,7 @@ def main():
     
     try:
         # Start the unified server with Socket.IO
-        socketio.run(app, host='0.0.0.0', port=5000, debug=False)
+        run_server(app, socketio)
     except KeyboardInterrupt:
         logger.info("\n🛑 Server stopped by user")
     except Exception as e:
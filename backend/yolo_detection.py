@@ -4,243 +4,366 @@ YOLO Object Detection Backend API
 Handles real-time object detection using the trained YOLOv8 model
 """
 
+# Imported first: patches the standard library when serving with eventlet/gevent
+import serving
+# Also before NumPy/OpenCV: sets the BLAS thread limits they read when loaded
+from resource_governor import MAX_REQUEST_MB, MB, LoadShed, ResourceGovernor, configure_threads
+
 import cv2
-import numpy as np
 import base64
 import json
-from ultralytics import YOLO
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
+import itertools
 import threading
 import time
 from typing import Dict, List, Tuple, Optional
 import logging
 import os
 
+from class_subsets import SUBSET_PRESETS, ClassSubsets
+from clip_recorder import ClipRecorder
+from delta_updates import DeltaEncoder
+from detector import YOLODetector, summarize_detections
+from event_store import EventStore
+from frame_buffers import frame_pool
+from geofence import GeoEngine
+from inference_scheduler import FrameDropped, InferenceScheduler
+from location_service import SoldierIndex, parse_bbox, soldier_payload
+from model_pool import ModelPool
+from model_registry import ModelRegistry
+from rate_control import RateController
+from rollups import ALL_CAMERAS, DetectionRollups
+from serving import run_blocking, run_server
+from shared_frames import SharedFrameError, SharedFrameReceiver
+from sos_dispatch import SOSDispatcher
+from temporal_fusion import TemporalFusion
+from payload_codec import (COMPACT_MIMETYPE, ClassDictionary, compact_available,
+                           encode_detections, pack)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__, static_folder='../dist', static_url_path='/')
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
-
-class YOLODetector:
-    def __init__(self, model_path: str = "../yolo/runs/detect/detect3_resume2/weights/best.pt"):
-        """Initialize YOLO detector with the trained model"""
-        self.model_path = model_path
-        self.model = None
-        self.load_model()
-        
-        # Detection classes we're interested in - updated for custom trained model
-        self.target_classes = {
-            'person': 0,
-            'car': 2, 'truck': 7, 'bus': 5, 'motorcycle': 3, 'bicycle': 1,
-            'airplane': 4, 'aeroplane': 4,  # Will be mapped to 'drone'
-            'knife': 43, 'scissors': 76, 'gun': 28, 'pistol': 28,
-            'weapon': 28, 'rifle': 28, 'firearm': 28
-        }
-        
-        # Class mapping for our application
-        self.class_mapping = {
-            'person': 'person',
-            'car': 'vehicle', 'truck': 'vehicle', 'bus': 'vehicle', 
-            'motorcycle': 'vehicle', 'bicycle': 'vehicle',
-            'airplane': 'drone', 'aeroplane': 'drone',  # Map airplane to drone
-            'knife': 'weapon', 'scissors': 'weapon', 'gun': 'weapon', 
-            'pistol': 'weapon', 'weapon': 'weapon', 'rifle': 'weapon', 'firearm': 'weapon'
-        }
-    
-    def load_model(self):
-        """Load the YOLO model"""
-        try:
-            # Try to load custom trained model first
-            if os.path.exists(self.model_path):
-                logger.info(f"Loading custom YOLO model from: {self.model_path}")
-                self.model = YOLO(self.model_path)
-                logger.info(f"✅ Custom trained YOLO model loaded successfully from {self.model_path}")
-                logger.info(f"Model classes: {list(self.model.names.values())}")
-            else:
-                # Fallback to default model
-                logger.warning(f"Custom model not found at {self.model_path}, using default yolov8n.pt")
-                self.model = YOLO("yolov8n.pt")
-                logger.info("✅ Default YOLO model loaded successfully")
-                logger.info(f"Model classes: {list(self.model.names.values())}")
-        except Exception as e:
-            logger.error(f"❌ Failed to load YOLO model: {e}")
-            # Try one more fallback
-            try:
-                logger.info("Attempting to load default yolov8n.pt model...")
-                self.model = YOLO("yolov8n.pt")
-                logger.info("✅ Default YOLO model loaded as fallback")
-                logger.info(f"Model classes: {list(self.model.names.values())}")
-            except Exception as fallback_error:
-                logger.error(f"❌ Fallback model loading also failed: {fallback_error}")
-                raise fallback_error
-    
-    def preprocess_image(self, image_data: str) -> np.ndarray:
-        """Convert base64 image data to OpenCV format"""
-        try:
-            # Remove data URL prefix if present
-            if ',' in image_data:
-                image_data = image_data.split(',')[1]
-            
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data)
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if image is None:
-                raise ValueError("Failed to decode image")
-                
-            return image
-        except Exception as e:
-            logger.error(f"Error preprocessing image: {e}")
-            raise e
-    
-    def detect_objects(self, image: np.ndarray, confidence_threshold: float = 0.5) -> List[Dict]:
-        """Perform object detection on the image"""
-        try:
-            # Run YOLO inference
-            results = self.model(image, conf=confidence_threshold, verbose=False)
-            
-            detections = []
-            
-            for result in results:
-                if result.boxes is not None:
-                    for box in result.boxes:
-                        # Get class ID and confidence
-                        cls_id = int(box.cls[0])
-                        confidence = float(box.conf[0])
-                        
-                        # Get class name
-                        class_name = self.model.names[cls_id]
-                        
-                        # Map to our application classes for coloring/threat logic
-                        mapped_class = self.class_mapping.get(class_name.lower(), 'unknown')
-
-                        # Always include detection so frontend can show original label
-                        # (e.g., 'cell phone') even if it's not in our mapped target set
-                        xyxy = box.xyxy[0].tolist()
-                        x1, y1, x2, y2 = map(int, xyxy)
-
-                        detection = {
-                            'id': f"{mapped_class}_{int(time.time() * 1000)}_{len(detections)}",
-                            'type': mapped_class,
-                            'confidence': confidence,
-                            'bbox': {
-                                'x': x1,
-                                'y': y1,
-                                'width': x2 - x1,
-                                'height': y2 - y1
-                            },
-                            'timestamp': time.time(),
-                            'original_class': class_name
-                        }
-
-                        detections.append(detection)
-            
-            return detections
-            
-        except Exception as e:
-            logger.error(f"Error during object detection: {e}")
-            return []
-    
-    def draw_detections(self, image: np.ndarray, detections: List[Dict]) -> np.ndarray:
-        """Draw bounding boxes and labels on the image"""
-        try:
-            # Color mapping for different object types
-            colors = {
-                'person': (0, 255, 0),      # Green
-                'vehicle': (255, 0, 0),     # Blue
-                'drone': (0, 165, 255),     # Orange
-                'weapon': (0, 0, 255),      # Red
-                'unknown': (128, 128, 128)  # Gray
-            }
-            
-            for detection in detections:
-                bbox = detection['bbox']
-                obj_type = detection['type']
-                confidence = detection['confidence']
-                
-                # Get color for this object type
-                color = colors.get(obj_type, colors['unknown'])
-                
-                # Draw bounding box
-                cv2.rectangle(
-                    image, 
-                    (bbox['x'], bbox['y']), 
-                    (bbox['x'] + bbox['width'], bbox['y'] + bbox['height']), 
-                    color, 
-                    2
-                )
-                
-                # Draw label with confidence
-                label = f"{obj_type} {confidence:.2f}"
-                label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                
-                # Draw label background
-                cv2.rectangle(
-                    image,
-                    (bbox['x'], bbox['y'] - label_size[1] - 10),
-                    (bbox['x'] + label_size[0], bbox['y']),
-                    color,
-                    -1
-                )
-                
-                # Draw label text
-                cv2.putText(
-                    image,
-                    label,
-                    (bbox['x'], bbox['y'] - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.6,
-                    (255, 255, 255),
-                    2
-                )
-            
-            return image
-            
-        except Exception as e:
-            logger.error(f"Error drawing detections: {e}")
-            return image
+socketio = SocketIO(app, cors_allowed_origins="*", **serving.socketio_options())
+app.config['MAX_CONTENT_LENGTH'] = int(MAX_REQUEST_MB * MB)
 
-# Initialize YOLO detector with custom model path
-import os
+# Size the PyTorch/OpenCV/BLAS thread pools before any model is loaded
+configure_threads()
+
+# Resolve the model through the registry (YOLO_MODEL may name a model, name:version or path)
+model_registry = ModelRegistry()
+model_registry.scan()
+model_entry = model_registry.resolve(os.environ.get('YOLO_MODEL'))
+logger.info(f"Using model {model_entry['name']} v{model_entry['version']} at: {model_entry['path']}")
+
+detector = YOLODetector(model_entry['path'])
+if detector.model is not None:
+    model_registry.record_class_names(model_entry, detector.model.names)
+
+# Additional models are loaded on demand for cameras routed to them
+model_pool = ModelPool(model_registry, YOLODetector, detector)
+
+# Optional cascade: a cheap screening model gates the main model of every camera
+if os.environ.get('YOLO_CASCADE_SCREEN_MODEL'):
+    try:
+        screen_entry = model_registry.resolve(os.environ['YOLO_CASCADE_SCREEN_MODEL'])
+        model_pool.configure_cascade(screen_entry['path'])
+    except Exception as e:
+        logger.error(f"❌ Failed to enable cascade inference: {e}")
+
+# Compact payloads share one append-only class dictionary across all models
+class_dictionary = ClassDictionary(list(detector.model.names.values()) if detector.model is not None else [])
+frame_sequence = itertools.count(1)
+
+# Socket.IO rooms by payload format; clients opt in to compact via 'set_payload_format'
+JSON_ROOM = 'format:json'
+COMPACT_ROOM = 'format:compact'
+compact_clients = set()
+# Dictionary version COMPACT_ROOM was last sent; frames may be encoded (growing the dictionary) before broadcast
+compact_room = {'dictionary_version': class_dictionary.version}
+
+# Stable object identities per camera; clients in DELTA_ROOM get incremental updates
+# instead of (not as well as) their JSON or compact frames
+delta_encoder = DeltaEncoder()
+DELTA_ROOM = 'mode:delta'
+delta_clients = set()
+
+# Append-only detection/alert history for incident review
+event_store = EventStore()
+
+# Pre-roll frame rings and threat clip recording
+clip_recorder = ClipRecorder(on_clip_ready=lambda clip: socketio.emit('clip_ready', clip))
+
+# Latest soldier positions; dashboards subscribe to the viewport they display
+soldier_index = SoldierIndex()
+viewport_subscriptions = {}
+
+# Camera placement and geofences for geo-tagging threats against soldier positions
+geo_engine = GeoEngine(soldier_index)
+
+# Weighted fair queuing of inference across cameras, plus load-driven
+# fps/resolution/quality advice returned to each camera
+inference_scheduler = InferenceScheduler()
 
-# Try to find the custom trained model
-custom_model_paths = [
-    "custom_model.pt",  # Copied by setup script
-    "../yolo/runs/detect/detect3_resume2/weights/best.pt",
-    "yolo/runs/detect/detect3_resume2/weights/best.pt",
-    "../yolo/best.pt",
-    "yolo/best.pt"
-]
-
-model_path = "yolov8n.pt"  # Default fallback
-for path in custom_model_paths:
-    if os.path.exists(path):
-        model_path = path
-        logger.info(f"Found custom model at: {path}")
-        break
-else:
-    logger.info("Using default YOLOv8 model")
-
-detector = YOLODetector(model_path)
+# In-flight frame and memory limits, shedding load (resolution, visualization,
+# low-priority cameras) as they are approached
+resource_governor = ResourceGovernor(profile_lookup=inference_scheduler.profile, reclaim=frame_pool.trim)
+rate_controller = RateController(profile_lookup=inference_scheduler.profile,
+                                 shed_level_lookup=lambda: resource_governor.level)
+
+# SOS signals get their own queue and ack/retry delivery, independent of inference
+sos_dispatcher = SOSDispatcher(lambda event, payload, sid: socketio.emit(event, payload, to=sid))
+
+# Evidence accumulated across frames lets the model run at a lower threshold
+temporal_fusion = TemporalFusion()
+
+# Per-camera class subsets passed into inference and NMS
+class_subsets = ClassSubsets()
+
+# Pre-aggregated dashboard counters, pushed periodically as 'detection_summary'
+detection_rollups = DetectionRollups()
+SUMMARY_INTERVAL = float(os.environ.get('RAKSHAK_SUMMARY_INTERVAL', '1.0'))
+summary_task_started = threading.Event()
+
+def summary_broadcast_loop():
+    """Push rolled-up counters to dashboards at a fixed cadence"""
+    while True:
+        socketio.sleep(SUMMARY_INTERVAL)
+        if detection_rollups.cameras():
+            socketio.emit('detection_summary', detection_rollups.summary())
+
+ADMIN_TOKEN = os.environ.get('RAKSHAK_ADMIN_TOKEN')
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1', 'localhost')
+
+# Set by the camera router on its copies of soldier updates made on the primary node
+REPLICA_HEADER = 'X-Rakshak-Replica'
+
+def admin_authorized() -> bool:
+    """Check the admin token header; without RAKSHAK_ADMIN_TOKEN only this host is trusted"""
+    if ADMIN_TOKEN:
+        return request.headers.get('X-Admin-Token') == ADMIN_TOKEN
+    return request.remote_addr in LOOPBACK_ADDRESSES
 
 # Socket.IO event handlers
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
     logger.info('Client connected to Socket.IO')
+    join_room(JSON_ROOM)
+    sos_dispatcher.add_client(request.sid)
+    if not summary_task_started.is_set():
+        summary_task_started.set()
+        socketio.start_background_task(summary_broadcast_loop)
     emit('status', {'message': 'Connected to YOLO Detection Server', 'model_loaded': detector.model is not None})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
+    compact_clients.discard(request.sid)
+    delta_clients.discard(request.sid)
+    viewport_subscriptions.pop(request.sid, None)
+    sos_dispatcher.remove_client(request.sid)
     logger.info('Client disconnected from Socket.IO')
 
+def join_update_rooms(compact: bool, delta: bool):
+    """Put the current client in exactly one detection_update room
+
+    Delta mode wins over the payload format, so a client that asked for both
+    gets one update per frame rather than a delta and a full frame.
+    """
+    wanted = DELTA_ROOM if delta else COMPACT_ROOM if compact else JSON_ROOM
+    for room in (JSON_ROOM, COMPACT_ROOM, DELTA_ROOM):
+        if room == wanted:
+            join_room(room)
+        else:
+            leave_room(room)
+
+@socketio.on('set_payload_format')
+def handle_set_payload_format(data):
+    """Switch this client between verbose JSON and compact MessagePack detection events"""
+    payload_format = (data or {}).get('format', 'json')
+    if payload_format == 'compact' and compact_available():
+        compact_clients.add(request.sid)
+        emit('class_dictionary', class_dictionary.to_payload())
+    else:
+        payload_format = 'json'
+        compact_clients.discard(request.sid)
+    join_update_rooms(request.sid in compact_clients, request.sid in delta_clients)
+    emit('payload_format', {'format': payload_format})
+
+@socketio.on('set_update_mode')
+def handle_set_update_mode(data):
+    """Switch this client between full and delta-encoded detection_update events"""
+    mode = (data or {}).get('mode', 'full')
+    if mode == 'delta':
+        delta_clients.add(request.sid)
+        join_update_rooms(request.sid in compact_clients, True)
+        # Bring the late joiner up to date before deltas start arriving
+        for keyframe in delta_encoder.keyframes():
+            emit('detection_update', keyframe)
+    else:
+        mode = 'full'
+        delta_clients.discard(request.sid)
+        join_update_rooms(request.sid in compact_clients, False)
+    emit('update_mode', {'mode': mode})
+
+@socketio.on('request_keyframe')
+def handle_request_keyframe(data):
+    """Resend the full object state for a camera after a client detects a seq gap"""
+    keyframe = delta_encoder.keyframe((data or {}).get('camera_id', 'unknown'))
+    if keyframe is not None:
+        emit('detection_update', keyframe)
+
+def emit_geo_events(events: List[Tuple[str, Dict]]):
+    """Push geofence and proximity alerts, keeping geofence breaches in the event history"""
+    for event, payload in events:
+        socketio.emit(event, payload)
+        if event == 'geofence_alert':
+            camera_id = payload['threat']['camera_id'] if 'threat' in payload else 'field'
+            event_store.record_alert(camera_id, 'geofence', payload, payload.get('name', 'Unknown'),
+                                     payload['timestamp'])
+
+def ingest_soldier_updates(updates: List[Dict], replica: bool = False) -> Dict:
+    """Apply bulk position updates and push them to dashboards whose viewport they fall in
+
+    A ``replica`` update is the camera router's copy of a change already made on
+    the primary node; it only re-checks this node's own threats against the new
+    positions, leaving unit geofence alerts and viewport pushes to the primary.
+    """
+    updated, errors = soldier_index.update_many(updates)
+    events = geo_engine.process_soldier_updates(updated)
+    if replica:
+        emit_geo_events([(event, payload) for event, payload in events if event == 'proximity_alert'])
+        return {'updated': len(updated), 'errors': errors}
+    emit_geo_events(events)
+    for sid, (south, west, north, east) in list(viewport_subscriptions.items()):
+        visible = [soldier_payload(r) for r in updated
+                   if south <= r['lat'] <= north
+                   and (west <= r['lng'] <= east if west <= east else (r['lng'] >= west or r['lng'] <= east))]
+        if visible:
+            socketio.emit('soldier_locations', {'soldiers': visible, 'partial': True, 'timestamp': time.time()}, to=sid)
+    return {'updated': len(updated), 'errors': errors}
+
+@socketio.on('location_update')
+def handle_location_update(data):
+    """Bulk position updates from field devices; the return value is the ack"""
+    updates = data.get('soldiers', [data]) if isinstance(data, dict) else list(data or [])
+    return ingest_soldier_updates(updates)
+
+def raise_sos_signal(data: Dict) -> Dict:
+    """Queue an SOS for delivery first, then update the soldier's map status"""
+    soldier_id = str(data['soldier_id'])
+    position = data.get('position') or ({'lat': data['lat'], 'lng': data['lng']} if 'lat' in data else None)
+    if position is None:
+        known = soldier_index.get(soldier_id)
+        position = {'lat': known['lat'], 'lng': known['lng']} if known else None
+
+    nearest = []
+    if position is not None:
+        nearest = [{'id': r['id'], 'name': r['name'], 'distanceMeters': r['distance_m']}
+                   for r in soldier_index.nearest(position['lat'], position['lng'], k=3,
+                                                  statuses=('active', 'standby'))
+                   if r['id'] != soldier_id]
+
+    alert = sos_dispatcher.raise_sos(soldier_id, {
+        'name': data.get('name', soldier_id),
+        'position': position,
+        'message': data.get('message', ''),
+        'source': data.get('source', 'field_device'),
+        'nearestUnits': nearest
+    })
+
+    if position is not None:
+        ingest_soldier_updates([{'id': soldier_id, 'position': position, 'status': 'sos'}])
+    event_store.record_alert('field', 'sos', alert, data.get('location', 'Unknown'))
+    return alert
+
+@socketio.on('sos')
+def handle_sos(data):
+    """SOS from a field device; the return value is the ack"""
+    try:
+        alert = raise_sos_signal(data or {})
+    except (KeyError, TypeError, ValueError) as e:
+        return {'success': False, 'error': f'Invalid SOS: {e}'}
+    return {'success': True, 'id': alert['id']}
+
+@socketio.on('sos_ack')
+def handle_sos_ack(data):
+    """Dashboard confirmation that an sos_alert was received"""
+    latency = sos_dispatcher.acknowledge((data or {}).get('id'), request.sid)
+    return {'acknowledged': latency is not None}
+
+@socketio.on('subscribe_viewport')
+def handle_subscribe_viewport(data):
+    """Only push soldier updates inside this client's map bounds"""
+    try:
+        bbox = (data or {}).get('bbox')
+        bbox = parse_bbox(bbox) if isinstance(bbox, str) else tuple(float(v) for v in bbox)
+        if len(bbox) != 4:
+            raise ValueError("bbox must be 'south,west,north,east'")
+    except (TypeError, ValueError) as e:
+        emit('error', {'message': f'Invalid viewport: {e}'})
+        return
+    viewport_subscriptions[request.sid] = bbox
+    soldiers = [soldier_payload(r) for r in soldier_index.query_bbox(*bbox)]
+    emit('soldier_locations', {'soldiers': soldiers, 'partial': False, 'timestamp': time.time()})
+
+def broadcast_detections(camera_id: str, detections: List[Dict], counts: Dict, threats: List[Dict],
+                         location: str, compact_frame: Optional[Dict] = None, delta: Optional[Dict] = None,
+                         clip: Optional[Dict] = None):
+    """Emit detection_update and threat_alert events in each subscribed payload format"""
+    timestamp = time.time()
+    if delta is not None:
+        socketio.emit('detection_update', {**delta, 'counts': counts, 'timestamp': timestamp}, to=DELTA_ROOM)
+
+    socketio.emit('detection_update', {
+        'camera_id': camera_id,
+        'detections': detections,
+        'counts': counts,
+        'threats': threats,
+        'timestamp': timestamp
+    }, to=JSON_ROOM)
+
+    if threats:
+        threat_alert = {
+            'camera_id': camera_id,
+            'threats': threats,
+            'location': location,
+            'timestamp': timestamp
+        }
+        if clip is not None:
+            threat_alert['clip'] = clip
+        socketio.emit('threat_alert', threat_alert, to=JSON_ROOM)
+        socketio.emit('threat_alert', threat_alert, to=DELTA_ROOM)
+
+    if not compact_clients - delta_clients:
+        return
+
+    if compact_frame is None:
+        compact_frame = encode_detections(camera_id, detections, counts, threats, timestamp,
+                                          class_dictionary, next(frame_sequence))
+    if compact_frame['dv'] > compact_room['dictionary_version']:
+        dictionary = class_dictionary.to_payload()
+        compact_room['dictionary_version'] = dictionary['dv']
+        socketio.emit('class_dictionary', dictionary, to=COMPACT_ROOM)
+    socketio.emit('detection_update', pack(compact_frame), to=COMPACT_ROOM)
+
+    if threats:
+        # Threats reference the detection_update frame by sequence number
+        socketio.emit('threat_alert', pack({
+            'v': compact_frame['v'],
+            'cam': camera_id,
+            'seq': compact_frame['seq'],
+            'threats': compact_frame['threats'],
+            'location': location,
+            'clip': clip['url'] if clip else None,
+            'ts': timestamp
+        }), to=COMPACT_ROOM)
+
 @socketio.on('start_detection')
 def handle_start_detection(data):
     """Handle start detection request"""
@@ -255,6 +378,13 @@ def handle_stop_detection(data):
     logger.info(f'Stopping detection for camera {camera_id}')
     emit('detection_status', {'camera_id': camera_id, 'status': 'stopped'})
 
+@app.before_request
+def reject_oversized_requests():
+    """Refuse bodies over RAKSHAK_MAX_REQUEST_MB before they are read"""
+    if request.content_length is not None and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        resource_governor.record('rejected_request', reason=f"{request.content_length / MB:.1f} MB body on {request.path}")
+        return jsonify({'error': f'Request body exceeds {MAX_REQUEST_MB:g} MB'}), 413
+
 @app.route('/')
 def serve_frontend():
     """Serve the React frontend"""
@@ -286,13 +416,166 @@ def health_check():
             '/health',
             '/detect',
             '/detect_with_visualization',
-            '/model_info'
+            '/model_info',
+            '/admin/models',
+            '/admin/models/activate',
+            '/admin/models/pool',
+            '/admin/routes',
+            '/admin/cascade',
+            '/payload/dictionary',
+            '/events/detections',
+            '/events/alerts',
+            '/events/counts',
+            '/stats/rollups',
+            '/stats/summary',
+            '/clips',
+            '/api/soldiers/locations',
+            '/api/soldiers/nearest',
+            '/api/threats/locations',
+            '/api/sos',
+            '/admin/rate_control',
+            '/admin/cameras',
+            '/stats/scheduler',
+            '/stats/buffers',
+            '/admin/geo/cameras',
+            '/admin/geofences',
+            '/admin/fusion',
+            '/admin/class_subsets',
+            '/local/attach',
+            '/local/detach',
+            '/stats/local_frames',
+            '/stats/resources',
+            '/stream/keyframes',
+            '/cluster/clients/<sid>'
         ]
     }
     
     logger.info(f"📊 Health check - Model loaded: {model_loaded}")
     return jsonify(response)
 
+def run_inference(camera_id: str, image, confidence_threshold: float, fusion: bool = True,
+                  imgsz: Optional[int] = None) -> List[Dict]:
+    """Schedule inference on the camera's model and fuse the result with earlier frames
+
+    With temporal fusion the model runs at a lower candidate threshold and
+    only objects confirmed across frames are returned. The camera's class
+    subset limits which classes the model evaluates, and ``imgsz`` (set
+    while shedding load) caps the inference size.
+    """
+    fused = temporal_fusion.active(camera_id, fusion)
+    model_threshold = temporal_fusion.candidate_threshold(confidence_threshold) if fused else confidence_threshold
+    detections, inference_seconds = run_model(camera_id, image, model_threshold, imgsz)
+    rate_controller.record_inference(inference_seconds)
+    return temporal_fusion.update(camera_id, detections, confidence_threshold) if fused else detections
+
+def run_model(camera_id: str, image, model_threshold: float, imgsz: Optional[int] = None) -> Tuple[List[Dict], float]:
+    """Schedule inference on the camera's model; returns raw detections and the seconds it took
+
+    Frames admitted together for the same model (from any camera) run as one
+    batch, and the seconds are this frame's share of it. Nothing is recorded
+    here, so callers can discard the result (a torn shared-memory frame)
+    without it reaching fusion tracks or rate control.
+    """
+    with rate_controller.track(camera_id):
+        # Cold model loads happen here, before the camera holds an inference slot
+        prepared = model_pool.prepare(camera_id)
+        with inference_scheduler.slot(camera_id), model_pool.acquire(camera_id, prepared) as camera_detector:
+            return inference_scheduler.batcher.detect(camera_detector, image, model_threshold,
+                                                      class_subsets.subset_for(camera_id), imgsz)
+
+def publish_detections(camera_id: str, image, detections: List[Dict], frame_timestamp: float,
+                       location: str = 'Unknown', compact: bool = False) -> Dict:
+    """Count, persist and broadcast one frame's detections
+
+    Shared by ``/detect`` and local cameras attached over shared memory.
+    Returns the counts, threats, rate control advice and, when ``compact``,
+    the encoded compact frame.
+    """
+    rate_advice = rate_controller.advise(camera_id)
+    
+    # Calculate counts and identify threats (person, drone, weapon)
+    counts, _ = summarize_detections(detections)
+    
+    # Objects temporal fusion carries through a missed frame are shown, but they
+    # are not evidence: only objects seen in this frame are stored, alert or record clips
+    observed = [d for d in detections if not d.get('coasted')]
+    observed_counts, threats = summarize_detections(observed)
+    
+    # Cameras with active threats get a bigger share of the model for a while
+    if threats:
+        inference_scheduler.boost(camera_id)
+    
+    # Assign stable track ids and work out what changed since the last frame
+    delta = delta_encoder.update(camera_id, detections)
+    
+    # Project threats onto the map and match them against geofences and nearby units
+    geo_events = geo_engine.process_detections(camera_id, observed, image.shape[1], image.shape[0],
+                                               frame_timestamp)
+    
+    # Weapons and drones start (or extend) an event clip with pre-roll
+    clip = None
+    if clip_recorder.should_trigger(observed):
+        reason = ', '.join(sorted({d['type'] for d in observed if d['type'] in clip_recorder.trigger_types}))
+        clip = clip_recorder.trigger(camera_id, reason, frame_timestamp)
+    
+    # Persist for incident review (queued; written off the request path)
+    detection_rollups.record(camera_id, observed_counts, frame_timestamp)
+    event_store.record_detections(camera_id, observed, frame_timestamp)
+    if threats:
+        event_store.record_alert(camera_id, 'threat', {'threats': threats, 'clip': clip}, location, frame_timestamp)
+    
+    compact_frame = None
+    if compact:
+        compact_frame = encode_detections(camera_id, detections, counts, threats, time.time(),
+                                          class_dictionary, next(frame_sequence))
+    
+    # Tell the camera to speed up or back off when the advice moves
+    if rate_controller.changed(rate_advice):
+        socketio.emit('rate_control', rate_advice)
+    
+    # Emit real-time detection data and threat alerts via Socket.IO
+    broadcast_detections(camera_id, detections, counts, threats, location, compact_frame, delta, clip)
+    emit_geo_events(geo_events)
+    
+    logger.info(f"Detection completed for camera {camera_id}: {counts}")
+    return {'counts': counts, 'threats': threats, 'rate_control': rate_advice, 'compact_frame': compact_frame}
+
+CLIP_JPEG_QUALITY = 80
+
+def process_shared_frame(camera_id: str, frame, options: Dict) -> bool:
+    """Detection pipeline for a frame read in place from a local capture process
+
+    Results are only used if the writer left the frame's slot alone while it
+    was in use; returns False for such torn frames. Fusion and rate control
+    are therefore updated only after that check.
+    """
+    confidence_threshold = options['confidence']
+    fused = temporal_fusion.active(camera_id, options['fusion'])
+    model_threshold = temporal_fusion.candidate_threshold(confidence_threshold) if fused else confidence_threshold
+    try:
+        with resource_governor.admit(camera_id) as admission:
+            detections, inference_seconds = run_model(camera_id, frame.image, model_threshold,
+                                                      admission['imgsz'])
+    except (FrameDropped, LoadShed):
+        return True
+    jpeg = None
+    if options['clips']:
+        # Clips still need encoded pre-roll frames; nothing else does
+        _, buffer = run_blocking(cv2.imencode, '.jpg', frame.image, [cv2.IMWRITE_JPEG_QUALITY, CLIP_JPEG_QUALITY])
+        jpeg = buffer.tobytes()
+    if not frame.intact():
+        return False
+    rate_controller.record_inference(inference_seconds)
+    if fused:
+        detections = temporal_fusion.update(camera_id, detections, confidence_threshold)
+    if jpeg is not None:
+        clip_recorder.add_frame(camera_id, jpeg, frame.timestamp)
+    publish_detections(camera_id, frame.image, detections, frame.timestamp, options['location'])
+    return True
+
+# Cameras on this host hand over raw frames through shared memory instead of HTTP
+shared_frames = SharedFrameReceiver(process_shared_frame, spawn=socketio.start_background_task, sleep=socketio.sleep)
+
 @app.route('/detect', methods=['POST'])
 def detect_objects():
     """Main object detection endpoint"""
@@ -307,54 +590,44 @@ def detect_objects():
         confidence_threshold = data.get('confidence', 0.5)
         camera_id = data.get('camera_id', 'unknown')
         
-        # Preprocess image
-        image = detector.preprocess_image(image_data)
-        
-        # Perform detection
-        detections = detector.detect_objects(image, confidence_threshold)
-        
-        # Calculate counts
-        counts = {
-            'persons': len([d for d in detections if d['type'] == 'person']),
-            'vehicles': len([d for d in detections if d['type'] == 'vehicle']),
-            'drones': len([d for d in detections if d['type'] == 'drone']),
-            'weapons': len([d for d in detections if d['type'] == 'weapon'])
-        }
-        
-        # Identify threats (person, drone, weapon)
-        threats = [d for d in detections if d['type'] in ['person', 'drone', 'weapon']]
+        # Frames are admitted before decoding, so shed frames never allocate an image
+        with resource_governor.admit(camera_id) as admission:
+            # Preprocess image, keeping the encoded bytes for the clip pre-roll ring
+            image_bytes = detector.decode_base64(image_data)
+            image = run_blocking(detector.preprocess_image, image_bytes)
+            frame_timestamp = time.time()
+            clip_recorder.add_frame(camera_id, image_bytes, frame_timestamp)
+            
+            # Perform detection with the model routed for this camera
+            detections = run_inference(camera_id, image, confidence_threshold, data.get('fusion', True),
+                                       admission['imgsz'])
+            compact = data.get('format') == 'compact' and compact_available()
+            result = publish_detections(camera_id, image, detections, frame_timestamp,
+                                        data.get('location', 'Unknown'), compact)
         
-        response = {
+        if compact:
+            # Opt-in columnar MessagePack response
+            response_body = dict(result['compact_frame'], rate_control=result['rate_control'])
+            if data.get('dictionary_version', -1) != class_dictionary.version:
+                response_body['classes'] = class_dictionary.names
+            return Response(pack(response_body), mimetype=COMPACT_MIMETYPE)
+        return jsonify({
             'success': True,
             'camera_id': camera_id,
             'detections': detections,
-            'counts': counts,
-            'threats': threats,
+            'counts': result['counts'],
+            'threats': result['threats'],
             'timestamp': time.time(),
-            'total_detections': len(detections)
-        }
-        
-        # Emit real-time detection data via Socket.IO
-        socketio.emit('detection_update', {
-            'camera_id': camera_id,
-            'detections': detections,
-            'counts': counts,
-            'threats': threats,
-            'timestamp': time.time()
+            'total_detections': len(detections),
+            'rate_control': result['rate_control']
         })
         
-        # Emit threat alerts if any
-        if threats:
-            socketio.emit('threat_alert', {
-                'camera_id': camera_id,
-                'threats': threats,
-                'location': data.get('location', 'Unknown'),
-                'timestamp': time.time()
-            })
-        
-        logger.info(f"Detection completed for camera {camera_id}: {counts}")
-        return jsonify(response)
-        
+    except FrameDropped as e:
+        return jsonify({'error': str(e), 'dropped': True,
+                        'rate_control': rate_controller.advise(camera_id)}), 429
+    except LoadShed as e:
+        return jsonify({'error': str(e), 'shed': True,
+                        'rate_control': rate_controller.advise(camera_id)}), 503
     except Exception as e:
         logger.error(f"Error in detect_objects endpoint: {e}")
         return jsonify({'error': str(e)}), 500
@@ -373,29 +646,32 @@ def detect_with_visualization():
         confidence_threshold = data.get('confidence', 0.5)
         camera_id = data.get('camera_id', 'unknown')
         
-        # Preprocess image
-        image = detector.preprocess_image(image_data)
-        
-        # Perform detection
-        detections = detector.detect_objects(image, confidence_threshold)
-        
-        # Draw detections on image
-        image_with_detections = detector.draw_detections(image.copy(), detections)
-        
-        # Encode image back to base64
-        _, buffer = cv2.imencode('.jpg', image_with_detections)
-        image_base64 = base64.b64encode(buffer).decode('utf-8')
-        
-        # Calculate counts
-        counts = {
-            'persons': len([d for d in detections if d['type'] == 'person']),
-            'vehicles': len([d for d in detections if d['type'] == 'vehicle']),
-            'drones': len([d for d in detections if d['type'] == 'drone']),
-            'weapons': len([d for d in detections if d['type'] == 'weapon'])
-        }
+        with resource_governor.admit(camera_id) as admission:
+            # Preprocess image
+            image = run_blocking(detector.preprocess_image, image_data)
+            
+            # Perform detection with the model routed for this camera
+            detections = run_inference(camera_id, image, confidence_threshold, data.get('fusion', True),
+                                       admission['imgsz'])
+            
+            image_with_detections = None
+            if admission['visualize']:
+                # Draw detections on a pooled copy of the image
+                canvas = frame_pool.copy(image)
+                try:
+                    detector.draw_detections(canvas, detections)
+                    
+                    # Encode image back to base64
+                    _, buffer = cv2.imencode('.jpg', canvas)
+                finally:
+                    frame_pool.release(canvas)
+                image_with_detections = f"data:image/jpeg;base64,{base64.b64encode(buffer).decode('utf-8')}"
+            else:
+                resource_governor.record('skipped_visualization', camera_id,
+                                         f"load level {admission['level']}")
         
-        # Identify threats
-        threats = [d for d in detections if d['type'] in ['person', 'drone', 'weapon']]
+        # Calculate counts and identify threats
+        counts, threats = summarize_detections(detections)
         
         response = {
             'success': True,
@@ -403,7 +679,8 @@ def detect_with_visualization():
             'detections': detections,
             'counts': counts,
             'threats': threats,
-            'image_with_detections': f"data:image/jpeg;base64,{image_base64}",
+            'image_with_detections': image_with_detections,
+            'visualization_skipped': image_with_detections is None,
             'timestamp': time.time(),
             'total_detections': len(detections)
         }
@@ -411,6 +688,10 @@ def detect_with_visualization():
         logger.info(f"Detection with visualization completed for camera {camera_id}: {counts}")
         return jsonify(response)
         
+    except FrameDropped as e:
+        return jsonify({'error': str(e), 'dropped': True}), 429
+    except LoadShed as e:
+        return jsonify({'error': str(e), 'shed': True}), 503
     except Exception as e:
         logger.error(f"Error in detect_with_visualization endpoint: {e}")
         return jsonify({'error': str(e)}), 500
@@ -427,6 +708,7 @@ def model_info():
             'model_names': detector.model.names,
             'target_classes': detector.target_classes,
             'class_mapping': detector.class_mapping,
+            'cascade': detector.get_cascade_stats(),
             'timestamp': time.time()
         })
         
@@ -434,7 +716,492 @@ def model_info():
         logger.error(f"Error getting model info: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/payload/dictionary', methods=['GET'])
+def payload_dictionary():
+    """Class dictionary used to decode compact detection payloads"""
+    return jsonify({**class_dictionary.to_payload(), 'compact_available': compact_available()})
+
+def float_arg(name: str) -> Optional[float]:
+    """Parse an optional float query parameter"""
+    value = request.args.get(name)
+    return float(value) if value not in (None, '') else None
+
+@app.route('/stream/keyframes', methods=['GET'])
+def stream_keyframes():
+    """Full object state per camera (or one ``camera_id``) for delta clients joining through the router"""
+    camera_id = request.args.get('camera_id')
+    if camera_id:
+        keyframe = delta_encoder.keyframe(camera_id)
+        keyframes = [keyframe] if keyframe is not None else []
+    else:
+        keyframes = delta_encoder.keyframes()
+    return jsonify({'keyframes': keyframes, 'timestamp': time.time()})
+
+@app.route('/events/detections', methods=['GET'])
+def query_detection_events():
+    """Stored detections filtered by camera, type, class and time range"""
+    try:
+        events = event_store.query_detections(
+            camera_id=request.args.get('camera_id'),
+            detection_type=request.args.get('type'),
+            class_name=request.args.get('class'),
+            start=float_arg('start'),
+            end=float_arg('end'),
+            limit=int(request.args.get('limit', 1000))
+        )
+        return jsonify({'events': events, 'count': len(events), 'timestamp': time.time()})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/events/alerts', methods=['GET'])
+def query_alert_events():
+    """Stored alerts filtered by camera, kind and time range"""
+    try:
+        alerts = event_store.query_alerts(
+            camera_id=request.args.get('camera_id'),
+            kind=request.args.get('kind'),
+            start=float_arg('start'),
+            end=float_arg('end'),
+            limit=int(request.args.get('limit', 1000))
+        )
+        return jsonify({'alerts': alerts, 'count': len(alerts), 'timestamp': time.time()})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/events/counts', methods=['GET'])
+def query_event_counts():
+    """Per-interval detection counts by type"""
+    try:
+        buckets = event_store.count_rollup(
+            interval=int(request.args.get('interval', 3600)),
+            camera_id=request.args.get('camera_id'),
+            detection_type=request.args.get('type'),
+            start=float_arg('start'),
+            end=float_arg('end')
+        )
+        return jsonify({'buckets': buckets, 'timestamp': time.time()})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/stats/rollups', methods=['GET'])
+def rollup_series():
+    """Rolling per-class counters for a camera at 1s, 1m or 1h resolution"""
+    try:
+        series = detection_rollups.series(
+            resolution=request.args.get('resolution', '1m'),
+            camera_id=request.args.get('camera_id', ALL_CAMERAS),
+            points=int(request.args.get('points', 60))
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if series is None:
+        return jsonify({'error': 'No data for camera'}), 404
+    return jsonify(series)
+
+@app.route('/stats/summary', methods=['GET'])
+def rollup_summary():
+    """Latest counts per camera and totals over a recent window"""
+    try:
+        window = int(request.args.get('window', 60))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(detection_rollups.summary(window_seconds=window))
+
+@app.route('/clips', methods=['GET'])
+def list_clips():
+    """Recorded threat clips, newest first"""
+    return jsonify({'clips': clip_recorder.list_clips(request.args.get('camera_id')), 'timestamp': time.time()})
+
+@app.route('/clips/<clip_id>', methods=['GET'])
+def get_clip(clip_id):
+    """Download a finished clip"""
+    path = clip_recorder.clip_path(clip_id)
+    if path is None:
+        return jsonify({'error': 'Clip not found or still recording'}), 404
+    return send_from_directory(os.path.abspath(clip_recorder.clip_dir), os.path.basename(path), as_attachment=True)
+
+@app.route('/api/soldiers/locations', methods=['GET', 'POST'])
+def soldier_locations():
+    """Soldiers inside an optional ``bbox=south,west,north,east``, or bulk position updates"""
+    if request.method == 'POST':
+        data = request.get_json()
+        if data is None:
+            return jsonify({'error': 'No location data provided'}), 400
+        updates = data.get('soldiers', [data]) if isinstance(data, dict) else data
+        replica = request.headers.get(REPLICA_HEADER) == '1' and admin_authorized()
+        return jsonify({**ingest_soldier_updates(updates, replica), 'timestamp': time.time()})
+
+    try:
+        statuses = request.args.get('status')
+        statuses = statuses.split(',') if statuses else None
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+        bbox = parse_bbox(request.args['bbox']) if request.args.get('bbox') else None
+        if bbox:
+            records = soldier_index.query_bbox(*bbox, statuses=statuses, limit=limit)
+        else:
+            records = soldier_index.all(statuses)[:limit]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    soldiers = [soldier_payload(r) for r in records]
+    return jsonify({'soldiers': soldiers, 'threats': geo_engine.active_threats(bbox),
+                    'count': len(soldiers), 'timestamp': time.time()})
+
+@app.route('/api/soldiers/nearest', methods=['GET'])
+def nearest_soldiers():
+    """The k nearest soldiers to ``lat``/``lng``, optionally filtered by status"""
+    try:
+        statuses = request.args.get('status')
+        results = soldier_index.nearest(
+            float(request.args['lat']), float(request.args['lng']),
+            k=int(request.args.get('k', 5)),
+            statuses=statuses.split(',') if statuses else None,
+            max_distance_m=float_arg('max_distance')
+        )
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+
+    soldiers = [{**soldier_payload(r), 'distanceMeters': r['distance_m']} for r in results]
+    return jsonify({'soldiers': soldiers, 'timestamp': time.time()})
+
+@app.route('/api/sos', methods=['GET', 'POST'])
+def sos_signals():
+    """Raise an SOS, or list active SOS signals with delivery metrics"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'error': 'No SOS data provided'}), 400
+        try:
+            alert = raise_sos_signal(data)
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid SOS: {e}'}), 400
+        return jsonify({'success': True, 'sos': alert, 'timestamp': time.time()}), 202
+
+    return jsonify({'active': sos_dispatcher.active(), 'metrics': sos_dispatcher.stats(), 'timestamp': time.time()})
+
+@app.route('/api/sos/<sos_id>/resolve', methods=['POST'])
+def resolve_sos(sos_id):
+    """Close an SOS and stop redelivery"""
+    data = request.get_json(silent=True) or {}
+    alert = sos_dispatcher.resolve(sos_id, data.get('resolved_by'))
+    if alert is None:
+        return jsonify({'error': 'SOS not found'}), 404
+    if alert['position'] is not None and alert['status'] == 'resolved':
+        ingest_soldier_updates([{'id': alert['soldier_id'], 'status': 'active'}])
+    return jsonify({'success': True, 'sos': alert, 'timestamp': time.time()})
+
+@app.route('/api/threats/locations', methods=['GET'])
+def threat_locations():
+    """Active geo-tagged threats with their geofences and nearest available units"""
+    try:
+        bbox = parse_bbox(request.args['bbox']) if request.args.get('bbox') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    threats = geo_engine.active_threats(bbox)
+    return jsonify({'threats': threats, 'count': len(threats), 'timestamp': time.time()})
+
+@app.route('/admin/rate_control', methods=['GET'])
+def rate_control_settings():
+    """Current load estimate behind the rate control advice"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify({**rate_controller.load(), 'timestamp': time.time()})
+
+@app.route('/admin/cameras', methods=['GET', 'PUT'])
+def camera_settings():
+    """Get or replace per-camera priority, weight and minimum fps"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'PUT':
+        data = request.get_json() or {}
+        try:
+            inference_scheduler.set_settings(data.get('cameras', {}))
+        except (AttributeError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid camera settings: {e}'}), 400
+
+    return jsonify({'cameras': inference_scheduler.settings, 'timestamp': time.time()})
+
+@app.route('/stats/scheduler', methods=['GET'])
+def scheduler_stats():
+    """Per-camera queue depth, drops, wait/service time and served fps"""
+    return jsonify({**inference_scheduler.stats(), 'timestamp': time.time()})
+
+@app.route('/stats/resources', methods=['GET'])
+def resource_stats():
+    """Thread limits, RSS, in-flight frames, load shedding level and every shedding decision"""
+    return jsonify({**resource_governor.stats(), 'timestamp': time.time()})
+
+@app.route('/stats/buffers', methods=['GET'])
+def buffer_stats():
+    """Frame buffer pool reuse and memory held per resolution"""
+    return jsonify({**frame_pool.stats(), 'timestamp': time.time()})
+
+@app.route('/admin/geo/cameras', methods=['GET', 'PUT'])
+def geo_cameras():
+    """Get or replace camera positions, headings and fields of view"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'PUT':
+        data = request.get_json() or {}
+        try:
+            geo_engine.set_cameras(data.get('cameras', {}))
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid camera config: {e}'}), 400
+
+    return jsonify({'cameras': geo_engine.cameras, 'timestamp': time.time()})
+
+@app.route('/admin/geofences', methods=['GET', 'PUT'])
+def geofences():
+    """Get or replace the geofence polygons"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'PUT':
+        data = request.get_json() or {}
+        try:
+            geo_engine.set_geofences(data.get('geofences', []))
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid geofence: {e}'}), 400
+
+    fences = [{k: v for k, v in f.items() if k != 'bbox'} for f in geo_engine.geofences]
+    return jsonify({'geofences': fences, 'timestamp': time.time()})
+
+@app.route('/admin/models', methods=['GET'])
+def list_models():
+    """List every model version known to the registry"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.args.get('rescan'):
+        # Hashes weights files, so it runs off the event loop
+        run_blocking(model_registry.scan)
+
+    return jsonify({
+        'active_path': detector.model_path,
+        'registry': model_registry.list_models(),
+        'timestamp': time.time()
+    })
+
+@app.route('/admin/models/activate', methods=['POST'])
+def activate_model():
+    """Hot-swap the active model without restarting the server"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.get_json() or {}
+    spec = data.get('model')
+    if not spec:
+        return jsonify({'error': 'No model specified'}), 400
+
+    try:
+        run_blocking(model_registry.scan)
+        entry = run_blocking(model_registry.resolve, spec, any_path=False)
+    except KeyError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        new_model = run_blocking(detector.swap_model, entry['path'])
+        model_pool.refresh()
+    except Exception as e:
+        logger.error(f"Error activating model {spec}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    model_registry.record_class_names(entry, new_model.names)
+    model_registry.set_active(entry)
+
+    socketio.emit('model_changed', {
+        'name': entry['name'],
+        'version': entry['version'],
+        'model_path': entry['path'],
+        'timestamp': time.time()
+    })
+
+    return jsonify({
+        'success': True,
+        'active': entry,
+        'timestamp': time.time()
+    })
+
+@app.route('/admin/models/pool', methods=['GET'])
+def model_pool_stats():
+    """Loaded models, memory use and per-model inference time"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify({**model_pool.stats(), 'timestamp': time.time()})
+
+@app.route('/admin/routes', methods=['GET', 'PUT'])
+def camera_routes():
+    """Get or replace the per-camera model routing rules"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'PUT':
+        data = request.get_json() or {}
+        try:
+            if not isinstance(data, dict):
+                raise ValueError("Expected {\"routes\": [...]}")
+            model_pool.set_routes(data.get('routes', []))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    return jsonify({'routes': model_pool.routes, 'timestamp': time.time()})
+
+@app.route('/admin/cascade', methods=['GET', 'PUT'])
+def cascade_settings():
+    """Get cascade stage statistics or reconfigure the cascade
+
+    PUT ``{"screen_model": "yolov8n", "screen_confidence": 0.3, ...}`` enables it,
+    ``{"screen_model": null}`` disables it.
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'PUT':
+        data = dict(request.get_json() or {})
+        spec = data.pop('screen_model', None)
+        try:
+            screen_path = run_blocking(model_registry.resolve, spec, any_path=False)['path'] if spec else None
+            run_blocking(model_pool.configure_cascade, screen_path, **data)
+        except (KeyError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.error(f"Error configuring cascade: {e}")
+            return jsonify({'error': str(e)}), 500
+
+    return jsonify({**model_pool.cascade_stats(), 'timestamp': time.time()})
+
+@app.route('/admin/fusion', methods=['GET', 'PUT'])
+def fusion_settings():
+    """Get temporal fusion statistics or change its settings
+
+    PUT ``{"enabled": true, "min_hits": 3, "alpha": 0.4, ...}``
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'PUT':
+        try:
+            temporal_fusion.configure(**(request.get_json() or {}))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+
+    return jsonify({**temporal_fusion.stats(), 'timestamp': time.time()})
+
+@app.route('/admin/class_subsets', methods=['GET', 'PUT'])
+def class_subset_settings():
+    """Get or replace the per-camera class subsets
+
+    PUT ``{"default": "targets", "rules": [{"camera": "armory-*", "classes": "weapon_watch"}]}``
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'PUT':
+        data = request.get_json() or {}
+        try:
+            class_subsets.set_rules(data.get('rules', []), data.get('default'))
+        except (AttributeError, TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid class subsets: {e}'}), 400
+
+    return jsonify({**class_subsets.settings(), 'presets': SUBSET_PRESETS, 'timestamp': time.time()})
+
+@app.route('/cluster/clients/<sid>', methods=['PUT', 'DELETE'])
+def cluster_client(sid):
+    """Register a dashboard connected to the camera router so this node can address it
+
+    The router sends ``{"format": "compact", "mode": "delta", "viewport": [south, west, north, east]}``
+    on connect and on every change, and DELETE on disconnect. Events this node
+    emits to the sid reach the dashboard through the shared message queue.
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'DELETE':
+        compact_clients.discard(sid)
+        delta_clients.discard(sid)
+        viewport_subscriptions.pop(sid, None)
+        sos_dispatcher.remove_client(sid)
+        return jsonify({'removed': True, 'sid': sid})
+
+    data = request.get_json() or {}
+    viewport = data.get('viewport')
+    try:
+        viewport = tuple(float(v) for v in viewport) if viewport else None
+        if viewport is not None and len(viewport) != 4:
+            raise ValueError("viewport must be [south, west, north, east]")
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid client: {e}'}), 400
+
+    if data.get('format') == 'compact' and compact_available():
+        compact_clients.add(sid)
+    else:
+        compact_clients.discard(sid)
+    if data.get('mode') == 'delta':
+        delta_clients.add(sid)
+    else:
+        delta_clients.discard(sid)
+    if viewport is not None:
+        viewport_subscriptions[sid] = viewport
+    else:
+        viewport_subscriptions.pop(sid, None)
+    sos_dispatcher.add_client(sid)
+    return jsonify({'registered': True, 'sid': sid})
+
+@app.route('/cluster/clients/<sid>/sos_ack', methods=['POST'])
+def cluster_sos_ack(sid):
+    """sos_ack received by the camera router from one of its dashboards"""
+    if not admin_authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    latency = sos_dispatcher.acknowledge((request.get_json() or {}).get('id'), sid)
+    return jsonify({'acknowledged': latency is not None})
+
+@app.route('/local/attach', methods=['POST'])
+def attach_local_camera():
+    """Start reading a capture process's shared-memory frame ring
+
+    Only accepted from this host. ``{"camera_id": "cam-1", "ring": "rk_...",
+    "confidence": 0.5, "fusion": true, "location": "Gate", "clips": true}``
+    """
+    if request.remote_addr not in LOOPBACK_ADDRESSES:
+        return jsonify({'error': 'Shared-memory cameras must run on the server host'}), 403
+
+    data = request.get_json() or {}
+    if not data.get('camera_id') or not data.get('ring'):
+        return jsonify({'error': 'camera_id and ring are required'}), 400
+    options = {
+        'confidence': float(data.get('confidence', 0.5)),
+        'fusion': bool(data.get('fusion', True)),
+        'location': data.get('location') or 'Unknown',
+        'clips': bool(data.get('clips', True))
+    }
+    try:
+        attached = shared_frames.attach(str(data['camera_id']), str(data['ring']), options)
+    except SharedFrameError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'attached': True, 'camera_id': data['camera_id'], **attached})
+
+@app.route('/local/detach', methods=['POST'])
+def detach_local_camera():
+    """Stop reading a camera's shared-memory ring"""
+    if request.remote_addr not in LOOPBACK_ADDRESSES:
+        return jsonify({'error': 'Shared-memory cameras must run on the server host'}), 403
+
+    camera_id = str((request.get_json() or {}).get('camera_id', ''))
+    return jsonify({'detached': shared_frames.detach(camera_id), 'camera_id': camera_id})
+
+@app.route('/stats/local_frames', methods=['GET'])
+def local_frame_stats():
+    """Frames read, skipped and torn per shared-memory camera"""
+    return jsonify({**shared_frames.stats(), 'timestamp': time.time()})
+
 if __name__ == '__main__':
     logger.info("Starting YOLO Detection API Server with Socket.IO...")
-    socketio.run(app, host='0.0.0.0', port=5000, debug=False)
-
+    run_server(app, socketio)
@@ -16,6 +16,9 @@ import {
   Target,
 } from "lucide-react";
 import { useAlerts } from "@/hooks/use-alerts";
+import { useSocketIO } from "@/hooks/use-socketio";
+
+const NO_COUNTS = { persons: 0, vehicles: 0, drones: 0, weapons: 0 };
 
 export function AlertSystem() {
   const {
@@ -24,11 +27,12 @@ export function AlertSystem() {
     resolveAlert,
     dismissAlert,
     getActiveAlertsCount,
-    getObjectCounts,
   } = useAlerts();
+  // Counts are aggregated on the backend and pushed as detection_summary
+  const { detectionSummary } = useSocketIO();
 
   const [filter, setFilter] = useState<string>("all");
-  const objectCounts = getObjectCounts();
+  const objectCounts = detectionSummary?.current ?? NO_COUNTS;
 
   const getSeverityColor = (severity: string) => {
     switch (severity) {
@@ -1,4 +1,4 @@
-import { useState, useEffect, useRef } from "react";
+import { useState, useEffect, useRef, useMemo } from "react";
 import {
   Card,
   CardContent,
@@ -22,20 +22,24 @@ import {
   ZoomIn,
   ZoomOut,
 } from "lucide-react";
-import { config, isMapEnabled } from "@/config/environment";
+import { isMapEnabled } from "@/config/environment";
+import {
+  useSoldierLocations,
+  type MapBounds,
+  type SoldierLocation,
+} from "@/hooks/use-soldier-locations";
 
 interface ArmyPersonnel {
   id: string;
   name: string;
-  rank: string;
-  status: "online" | "offline" | "sos" | "mission";
+  unit: string;
+  status: SoldierLocation["status"];
   location: {
     lat: number;
     lng: number;
   };
   lastUpdate: Date;
-  battery: number;
-  signal: number;
+  battery: number | null;
 }
 
 interface LiveLocationMapProps {
@@ -50,52 +54,25 @@ const AIIMS_BHUBANESWAR = {
   address: "Sijua, Patrapada, Bhubaneswar, Odisha 751019, India",
 };
 
-// Mock army personnel data around AIIMS Bhubaneswar - in real app, this would come from API
-const mockArmyPersonnel: ArmyPersonnel[] = [
-  {
-    id: "1",
-    name: "Sgt. John Smith",
-    rank: "Sergeant",
-    status: "online",
-    location: { lat: 20.2961, lng: 85.8245 },
-    lastUpdate: new Date(),
-    battery: 85,
-    signal: 4,
-  },
-  {
-    id: "2",
-    name: "Cpl. Mike Johnson",
-    rank: "Corporal",
-    status: "mission",
-    location: { lat: 20.2965, lng: 85.825 },
-    lastUpdate: new Date(),
-    battery: 92,
-    signal: 5,
-  },
-  {
-    id: "3",
-    name: "Pvt. Sarah Wilson",
-    rank: "Private",
-    status: "sos",
-    location: { lat: 20.2958, lng: 85.8255 },
-    lastUpdate: new Date(),
-    battery: 23,
-    signal: 2,
-  },
-  {
-    id: "4",
-    name: "Lt. David Brown",
-    rank: "Lieutenant",
-    status: "online",
-    location: { lat: 20.2963, lng: 85.824 },
-    lastUpdate: new Date(),
-    battery: 78,
-    signal: 4,
-  },
-];
+// Backend soldier positions in the shape the map and list render
+const toPersonnel = (soldier: SoldierLocation): ArmyPersonnel => ({
+  id: soldier.id,
+  name: soldier.name,
+  unit: soldier.unit,
+  status: soldier.status,
+  location: soldier.position,
+  lastUpdate: soldier.lastUpdate,
+  battery: soldier.batteryLevel ?? null,
+});
 
 // Client-side only map component with OpenStreetMap
-function MapComponent({ armyPersonnel }: { armyPersonnel: ArmyPersonnel[] }) {
+function MapComponent({
+  armyPersonnel,
+  onViewportChange,
+}: {
+  armyPersonnel: ArmyPersonnel[];
+  onViewportChange: (bounds: MapBounds) => void;
+}) {
   const [isClient, setIsClient] = useState(false);
   const [mapLoaded, setMapLoaded] = useState(false);
   const mapRef = useRef<HTMLDivElement>(null);
@@ -115,6 +92,8 @@ function MapComponent({ armyPersonnel }: { armyPersonnel: ArmyPersonnel[] }) {
         // Dynamically import Leaflet only on client side
         const L = (await import("leaflet")).default;
         await import("leaflet/dist/leaflet.css");
+        // Data can change while Leaflet loads; only the first run creates the map
+        if (mapInstanceRef.current) return;
 
         // Fix for default markers
         delete (L.Icon.Default.prototype as any)._getIconUrl;
@@ -143,6 +122,19 @@ function MapComponent({ armyPersonnel }: { armyPersonnel: ArmyPersonnel[] }) {
         mapInstanceRef.current = map;
         setMapLoaded(true);
 
+        // Only soldiers inside the visible area are fetched
+        const reportViewport = () => {
+          const bounds = map.getBounds();
+          onViewportChange({
+            south: bounds.getSouth(),
+            west: bounds.getWest(),
+            north: bounds.getNorth(),
+            east: bounds.getEast(),
+          });
+        };
+        map.on("moveend", reportViewport);
+        reportViewport();
+
         // Add AIIMS Bhubaneswar marker
         const aiimsIcon = L.divIcon({
           html: `
@@ -204,7 +196,7 @@ function MapComponent({ armyPersonnel }: { armyPersonnel: ArmyPersonnel[] }) {
     };
 
     loadMap();
-  }, [isClient, mapLoaded, armyPersonnel]);
+  }, [isClient, mapLoaded, armyPersonnel, onViewportChange]);
 
   // Update markers when data changes
   useEffect(() => {
@@ -222,9 +214,9 @@ function MapComponent({ armyPersonnel }: { armyPersonnel: ArmyPersonnel[] }) {
     // Add army personnel markers
     armyPersonnel.forEach((person) => {
       const colors = {
-        online: "#10b981",
+        active: "#10b981",
         sos: "#ef4444",
-        mission: "#3b82f6",
+        standby: "#3b82f6",
         offline: "#6b7280",
       };
 
@@ -232,9 +224,9 @@ function MapComponent({ armyPersonnel }: { armyPersonnel: ArmyPersonnel[] }) {
         switch (status) {
           case "sos":
             return "🚨";
-          case "mission":
+          case "standby":
             return "🎯";
-          case "online":
+          case "active":
             return "🛡️";
           case "offline":
             return "⚫";
@@ -266,13 +258,13 @@ function MapComponent({ armyPersonnel }: { armyPersonnel: ArmyPersonnel[] }) {
       }).addTo(mapInstanceRef.current).bindPopup(`
           <div class="p-2 min-w-[200px]">
             <div class="flex items-center justify-between mb-2">
-              <h3 class="font-bold text-sm">${person.rank} ${person.name}</h3>
+              <h3 class="font-bold text-sm">${person.name}</h3>
               <span class="text-xs px-2 py-1 rounded ${
-                person.status === "online"
+                person.status === "active"
                   ? "bg-green-100 text-green-800"
                   : person.status === "sos"
                   ? "bg-red-100 text-red-800"
-                  : person.status === "mission"
+                  : person.status === "standby"
                   ? "bg-blue-100 text-blue-800"
                   : "bg-gray-100 text-gray-800"
               }">${person.status.toUpperCase()}</span>
@@ -281,8 +273,10 @@ function MapComponent({ armyPersonnel }: { armyPersonnel: ArmyPersonnel[] }) {
               <div>Location: ${person.location.lat.toFixed(
                 4
               )}, ${person.location.lng.toFixed(4)}</div>
-              <div>Battery: ${person.battery}%</div>
-              <div>Signal: ${person.signal}/5</div>
+              <div>Unit: ${person.unit || "-"}</div>
+              <div>Battery: ${
+                person.battery === null ? "-" : `${Math.round(person.battery)}%`
+              }</div>
               <div>Updated: ${person.lastUpdate.toLocaleTimeString()}</div>
             </div>
           </div>
@@ -344,44 +338,12 @@ function MapComponent({ armyPersonnel }: { armyPersonnel: ArmyPersonnel[] }) {
 }
 
 export default function LiveLocationMap({ className }: LiveLocationMapProps) {
-  const [armyPersonnel, setArmyPersonnel] =
-    useState<ArmyPersonnel[]>(mockArmyPersonnel);
-  const [isRefreshing, setIsRefreshing] = useState(false);
-
-  // Simulate real-time location updates
-  useEffect(() => {
-    const interval = setInterval(() => {
-      setArmyPersonnel((prev) =>
-        prev.map((person) => ({
-          ...person,
-          location: {
-            lat: person.location.lat + (Math.random() - 0.5) * 0.0001,
-            lng: person.location.lng + (Math.random() - 0.5) * 0.0001,
-          },
-          lastUpdate: new Date(),
-          battery: Math.max(0, person.battery - Math.random() * 0.5),
-          signal: Math.max(
-            1,
-            Math.min(5, person.signal + (Math.random() - 0.5) * 0.5)
-          ),
-        }))
-      );
-    }, config.location.updateInterval); // Use configured update interval
-
-    return () => clearInterval(interval);
-  }, []);
+  const { soldiers, error, isLoading, refreshLocations } =
+    useSoldierLocations();
+  const armyPersonnel = useMemo(() => soldiers.map(toPersonnel), [soldiers]);
 
   const handleRefresh = () => {
-    setIsRefreshing(true);
-    setTimeout(() => {
-      setArmyPersonnel((prev) =>
-        prev.map((person) => ({
-          ...person,
-          lastUpdate: new Date(),
-        }))
-      );
-      setIsRefreshing(false);
-    }, 1000);
+    refreshLocations();
   };
 
   const getStatusCounts = () => {
@@ -413,10 +375,10 @@ export default function LiveLocationMap({ className }: LiveLocationMapProps) {
               variant="outline"
               size="sm"
               onClick={handleRefresh}
-              disabled={isRefreshing}
+              disabled={isLoading}
             >
               <RefreshCw
-                className={`w-4 h-4 mr-2 ${isRefreshing ? "animate-spin" : ""}`}
+                className={`w-4 h-4 mr-2 ${isLoading ? "animate-spin" : ""}`}
               />
               Refresh
             </Button>
@@ -424,14 +386,21 @@ export default function LiveLocationMap({ className }: LiveLocationMapProps) {
         </div>
       </CardHeader>
       <CardContent>
+        {error && (
+          <div className="flex items-center gap-2 p-2 mb-4 bg-red-900/20 rounded-lg text-sm text-red-400">
+            <AlertTriangle className="w-4 h-4" />
+            {error}
+          </div>
+        )}
+
         {/* Status Summary */}
         <div className="grid grid-cols-2 md:grid-cols-4 gap-3 mb-4">
           <div className="flex items-center gap-2 p-2 bg-green-900/20 rounded-lg">
             <div className="w-3 h-3 bg-green-500 rounded-full"></div>
             <div>
-              <p className="text-sm font-medium text-green-400">Online</p>
+              <p className="text-sm font-medium text-green-400">Active</p>
               <p className="text-lg font-bold text-white">
-                {statusCounts.online || 0}
+                {statusCounts.active || 0}
               </p>
             </div>
           </div>
@@ -447,9 +416,9 @@ export default function LiveLocationMap({ className }: LiveLocationMapProps) {
           <div className="flex items-center gap-2 p-2 bg-blue-900/20 rounded-lg">
             <div className="w-3 h-3 bg-blue-500 rounded-full"></div>
             <div>
-              <p className="text-sm font-medium text-blue-400">Mission</p>
+              <p className="text-sm font-medium text-blue-400">Standby</p>
               <p className="text-lg font-bold text-white">
-                {statusCounts.mission || 0}
+                {statusCounts.standby || 0}
               </p>
             </div>
           </div>
@@ -466,7 +435,10 @@ export default function LiveLocationMap({ className }: LiveLocationMapProps) {
 
         {/* OpenStreetMap */}
         <div className="h-96 rounded-lg overflow-hidden border border-gray-700">
-          <MapComponent armyPersonnel={armyPersonnel} />
+          <MapComponent
+            armyPersonnel={armyPersonnel}
+            onViewportChange={refreshLocations}
+          />
         </div>
 
         {/* Personnel List */}
@@ -484,18 +456,18 @@ export default function LiveLocationMap({ className }: LiveLocationMapProps) {
                 <div className="flex items-center gap-3">
                   <div
                     className={`w-3 h-3 rounded-full ${
-                      person.status === "online"
+                      person.status === "active"
                         ? "bg-green-500"
                         : person.status === "sos"
                         ? "bg-red-500 animate-pulse"
-                        : person.status === "mission"
+                        : person.status === "standby"
                         ? "bg-blue-500"
                         : "bg-gray-500"
                     }`}
                   ></div>
                   <div>
                     <p className="text-sm font-medium text-white">
-                      {person.rank} {person.name}
+                      {person.name}
                     </p>
                     <p className="text-xs text-gray-400">
                       {person.location.lat.toFixed(4)},{" "}
@@ -504,12 +476,16 @@ export default function LiveLocationMap({ className }: LiveLocationMapProps) {
                   </div>
                 </div>
                 <div className="flex items-center gap-2">
-                  <Badge variant="outline" className="text-xs">
-                    {person.battery}%
-                  </Badge>
-                  <Badge variant="outline" className="text-xs">
-                    {person.signal}/5
-                  </Badge>
+                  {person.unit && (
+                    <Badge variant="outline" className="text-xs">
+                      {person.unit}
+                    </Badge>
+                  )}
+                  {person.battery !== null && (
+                    <Badge variant="outline" className="text-xs">
+                      {Math.round(person.battery)}%
+                    </Badge>
+                  )}
                   <span className="text-xs text-gray-400">
                     {person.lastUpdate.toLocaleTimeString()}
                   </span>
@@ -21,12 +21,6 @@ export interface UseAlertsReturn {
   resolveAlert: (id: string) => void;
   dismissAlert: (id: string) => void;
   getActiveAlertsCount: () => number;
-  getObjectCounts: () => {
-    persons: number;
-    vehicles: number;
-    drones: number;
-    weapons: number;
-  };
 }
 
 export function useAlerts(): UseAlertsReturn {
@@ -124,18 +118,6 @@ export function useAlerts(): UseAlertsReturn {
     return alerts.filter((alert) => alert.status === "active").length;
   }, [alerts]);
 
-  const getObjectCounts = useCallback(() => {
-    const activeAlerts = alerts.filter((alert) => alert.status === "active");
-
-    return {
-      persons: activeAlerts.filter((alert) => alert.type === "intrusion")
-        .length,
-      vehicles: activeAlerts.filter((alert) => alert.type === "vehicle").length,
-      drones: activeAlerts.filter((alert) => alert.type === "drone").length,
-      weapons: activeAlerts.filter((alert) => alert.type === "weapon").length,
-    };
-  }, [alerts]);
-
   return {
     alerts,
     addAlert,
@@ -143,6 +125,5 @@ export function useAlerts(): UseAlertsReturn {
     resolveAlert,
     dismissAlert,
     getActiveAlertsCount,
-    getObjectCounts,
   };
 }
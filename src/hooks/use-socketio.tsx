@@ -31,11 +31,47 @@ export interface ThreatAlert {
   timestamp: number;
 }
 
+export interface DetectionCounts {
+  persons: number;
+  vehicles: number;
+  drones: number;
+  weapons: number;
+}
+
+export interface DetectionSummary {
+  window_seconds: number;
+  current: DetectionCounts;
+  window_totals: Partial<DetectionCounts>;
+  cameras: Record<
+    string,
+    {
+      latest: DetectionCounts;
+      last_frame: number;
+      window_max: DetectionCounts;
+      window_frames: number;
+    }
+  >;
+  timestamp: number;
+}
+
+export interface SOSAlert {
+  id: string;
+  soldier_id: string;
+  name: string;
+  position: { lat: number; lng: number } | null;
+  message: string;
+  status: "active" | "resolved";
+  raised_at: number;
+  nearestUnits: Array<{ id: string; name: string; distanceMeters: number }>;
+}
+
 export interface UseSocketIOReturn {
   socket: Socket | null;
   isConnected: boolean;
   detectionEvents: DetectionEvent[];
   threatAlerts: ThreatAlert[];
+  detectionSummary: DetectionSummary | null;
+  sosAlerts: SOSAlert[];
   startDetection: (cameraId: string) => void;
   stopDetection: (cameraId: string) => void;
 }
@@ -46,6 +82,9 @@ export function useSocketIO(): UseSocketIOReturn {
   const [isConnected, setIsConnected] = useState(false);
   const [detectionEvents, setDetectionEvents] = useState<DetectionEvent[]>([]);
   const [threatAlerts, setThreatAlerts] = useState<ThreatAlert[]>([]);
+  const [detectionSummary, setDetectionSummary] =
+    useState<DetectionSummary | null>(null);
+  const [sosAlerts, setSosAlerts] = useState<SOSAlert[]>([]);
   const socketRef = useRef<Socket | null>(null);
 
   useEffect(() => {
@@ -99,6 +138,21 @@ export function useSocketIO(): UseSocketIOReturn {
       });
     });
 
+    // Pre-aggregated counters computed by the backend
+    socket.on("detection_summary", (data: DetectionSummary) => {
+      setDetectionSummary(data);
+    });
+
+    // SOS alerts are resent until acknowledged, so ack every copy and de-duplicate
+    socket.on("sos_alert", (data: SOSAlert) => {
+      socket.emit("sos_ack", { id: data.id });
+      setSosAlerts((prev) => [data, ...prev.filter((a) => a.id !== data.id)]);
+    });
+
+    socket.on("sos_resolved", (data: SOSAlert) => {
+      setSosAlerts((prev) => prev.filter((a) => a.id !== data.id));
+    });
+
     // Detection status events
     socket.on("detection_status", (data) => {
       console.log("📹 Detection status:", data);
@@ -130,6 +184,8 @@ export function useSocketIO(): UseSocketIOReturn {
     isConnected,
     detectionEvents,
     threatAlerts,
+    detectionSummary,
+    sosAlerts,
     startDetection,
     stopDetection,
   };
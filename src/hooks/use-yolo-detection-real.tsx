@@ -26,6 +26,16 @@ export interface ObjectDetectionResult {
   image_with_detections?: string;
 }
 
+// Server-driven capture settings returned with every /detect response
+export interface RateControl {
+  fps: number;
+  interval_ms: number;
+  max_width: number;
+  jpeg_quality: number;
+  priority: string;
+  level: number;
+}
+
 export interface UseYoloDetectionReturn {
   detectionResult: ObjectDetectionResult | null;
   isDetecting: boolean;
@@ -36,6 +46,7 @@ export interface UseYoloDetectionReturn {
 }
 
 const API_BASE_URL = "http://localhost:5000";
+const DEFAULT_INTERVAL_MS = 300;
 
 export function useYoloDetectionReal(
   videoRef: React.RefObject<HTMLVideoElement>,
@@ -48,6 +59,7 @@ export function useYoloDetectionReal(
   const [isModelLoaded, setIsModelLoaded] = useState(false);
   const detectionIntervalRef = useRef<NodeJS.Timeout | null>(null);
   const canvasRef = useRef<HTMLCanvasElement | null>(null);
+  const rateControlRef = useRef<RateControl | null>(null);
 
   // Initialize canvas for image processing
   useEffect(() => {
@@ -104,15 +116,19 @@ export function useYoloDetectionReal(
 
       if (!ctx) return null;
 
-      // Set canvas size to match video
-      canvas.width = video.videoWidth || 640;
-      canvas.height = video.videoHeight || 480;
+      // Set canvas size to match video, downscaled when the server asks for it
+      const rate = rateControlRef.current;
+      const width = video.videoWidth || 640;
+      const height = video.videoHeight || 480;
+      const scale = rate ? Math.min(1, rate.max_width / width) : 1;
+      canvas.width = Math.round(width * scale);
+      canvas.height = Math.round(height * scale);
 
       // Draw video frame to canvas
       ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
 
       // Convert to base64
-      return canvas.toDataURL("image/jpeg", 0.8);
+      return canvas.toDataURL("image/jpeg", rate ? rate.jpeg_quality : 0.8);
     } catch (err) {
       console.error("Error capturing frame:", err);
       return null;
@@ -152,6 +168,27 @@ export function useYoloDetectionReal(
         }
       );
 
+      // Follow the server's pacing so load degrades quality instead of latency
+      const adoptRateControl = (rate: RateControl) => {
+        const previous = rateControlRef.current;
+        rateControlRef.current = rate;
+        const previousInterval = previous ? previous.interval_ms : DEFAULT_INTERVAL_MS;
+        if (detectionIntervalRef.current && rate.interval_ms !== previousInterval) {
+          clearInterval(detectionIntervalRef.current);
+          detectionIntervalRef.current = setInterval(detectObjects, rate.interval_ms);
+        }
+      };
+
+      // Frame superseded by a newer one in the server's queue, or shed by the
+      // server under load; not an error, just back off as advised
+      if (response.status === 429 || response.status === 503) {
+        const dropped = await response.json().catch(() => ({}));
+        if (response.status === 429 || dropped.shed) {
+          if (dropped.rate_control) adoptRateControl(dropped.rate_control);
+          return;
+        }
+      }
+
       if (!response.ok) {
         throw new Error(
           `HTTP error! status: ${response.status} - ${response.statusText}`
@@ -161,6 +198,8 @@ export function useYoloDetectionReal(
       const data = await response.json();
       console.log(`📊 Detection response (/detect) for ${cameraId}:`, data);
 
+      if (data.rate_control) adoptRateControl(data.rate_control);
+
       if (data.success) {
         const result: ObjectDetectionResult = {
           objects: data.detections || [],
@@ -209,8 +248,11 @@ export function useYoloDetectionReal(
     setIsDetecting(true);
     setError(null);
 
-    // Start detection every 500ms for real-time detection
-    detectionIntervalRef.current = setInterval(detectObjects, 300);
+    // Start at the last advised rate, or every 300ms until the server advises
+    detectionIntervalRef.current = setInterval(
+      detectObjects,
+      rateControlRef.current?.interval_ms ?? DEFAULT_INTERVAL_MS
+    );
   }, [isDetecting, isModelLoaded, detectObjects, cameraId]);
 
   const stopDetection = useCallback(() => {
@@ -1,11 +1,10 @@
 from flask import Flask, request, jsonify
 import cv2
-import torch
+import numpy as np
 
-app = Flask(__name__)
+from detect_motion_yolo import detect_objects as run_detection
 
-# Load the YOLO model
-model = torch.hub.load('ultralytics/yolov5', 'custom', path='yolo/yolov8n.pt')
+app = Flask(__name__)
 
 @app.route('/detect', methods=['POST'])
 def detect_objects():
@@ -18,20 +17,13 @@ def detect_objects():
 
     # Read the image from the file
     img = cv2.imdecode(np.frombuffer(file.read(), np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return jsonify({'error': 'Could not decode image'}), 400
 
-    # Perform object detection
-    results = model(img)
-
-    # Process results
-    detections = []
-    for *box, conf, cls in results.xyxy[0]:
-        detections.append({
-            'label': model.names[int(cls)],
-            'confidence': conf.item(),
-            'bbox': [box[0].item(), box[1].item(), box[2].item(), box[3].item()]
-        })
+    # Perform object detection with the shared detection core
+    detections = run_detection(img)
 
     return jsonify(detections)
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
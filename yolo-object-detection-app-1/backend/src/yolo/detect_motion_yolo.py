@@ -1,53 +1,60 @@
+import os
+import sys
+
 import cv2
-import torch
 
-class YoloMotionDetector:
-    def __init__(self, model_path, confidence_threshold=0.5):
-        self.model = torch.hub.load('ultralytics/yolov5', 'custom', path=model_path, force_reload=True)
-        self.confidence_threshold = confidence_threshold
+# Detection runs on the shared core in the repository's backend/ directory: local
+# weights are loaded once per process (no torch.hub download on start), frames are
+# letterboxed into pooled buffers and classes are mapped like the main API server
+YOLO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(YOLO_DIR, '..', '..', '..', '..', 'backend'))
+from detector import get_detector
+from frame_stream import capture_frames
 
-    def process_frame(self, frame):
-        results = self.model(frame)
-        detections = results.xyxy[0]  # Get detections
-        detected_objects = []
+MODEL_PATH = os.path.join(YOLO_DIR, 'yolov8n.pt')
 
-        for *box, conf, cls in detections:
-            if conf >= self.confidence_threshold:
-                label = self.model.names[int(cls)]
-                detected_objects.append({
-                    'label': label,
-                    'confidence': conf.item(),
-                    'bbox': [int(x) for x in box]
-                })
 
-        return detected_objects
+def to_labels(detections):
+    """Core detections in this app's format: model label, confidence and [x1, y1, x2, y2]"""
+    labels = []
+    for detection in detections:
+        bbox = detection['bbox']
+        labels.append({
+            'label': detection['original_class'],
+            'type': detection['type'],
+            'confidence': detection['confidence'],
+            'bbox': [bbox['x'], bbox['y'], bbox['x'] + bbox['width'], bbox['y'] + bbox['height']]
+        })
+    return labels
 
-    def start_detection(self, camera_index=0):
-        cap = cv2.VideoCapture(camera_index)
 
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+def detect_objects(frame, confidence_threshold=0.5, model_path=MODEL_PATH):
+    """Detect objects in one BGR frame"""
+    return to_labels(get_detector(model_path).detect_objects(frame, confidence_threshold))
 
-            detections = self.process_frame(frame)
 
-            for obj in detections:
-                x1, y1, x2, y2 = obj['bbox']
-                label = obj['label']
-                confidence = obj['confidence']
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
-                cv2.putText(frame, f'{label} {confidence:.2f}', (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+class YoloMotionDetector:
+    def __init__(self, model_path=MODEL_PATH, confidence_threshold=0.5):
+        self.detector = get_detector(model_path)
+        self.confidence_threshold = confidence_threshold
 
+    def process_frame(self, frame):
+        return to_labels(self.detector.detect_objects(frame, self.confidence_threshold))
+
+    def start_detection(self, camera_index=0):
+        # Frames are read on a background thread; only the newest one is inferred when detection falls behind
+        stream = self.detector.stream(capture_frames(camera_index), self.confidence_threshold,
+                                      batch_size=1, latest_only=True)
+        for _, frame, detections in stream:
+            self.detector.draw_detections(frame, detections)
             cv2.imshow('YOLO Object Detection', frame)
 
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
 
-        cap.release()
+        stream.close()
         cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    model_path = 'yolov8n.pt'  # Path to the YOLO model
-    detector = YoloMotionDetector(model_path)
-    detector.start_detection()
\ No newline at end of file
+    detector = YoloMotionDetector()
+    detector.start_detection()
@@ -12,13 +12,15 @@ def detect():
 
     camera_feed = request.files['camera_feed']
     # Convert the camera feed to a format suitable for processing
-    nparr = np.fromstring(camera_feed.read(), np.uint8)
+    nparr = np.frombuffer(camera_feed.read(), np.uint8)
     frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if frame is None:
+        return jsonify({'error': 'Could not decode camera feed'}), 400
 
     # Perform object detection
     detections = detect_objects(frame)
 
-    return jsonify(detections)
+    return jsonify({'detections': detections})
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000)
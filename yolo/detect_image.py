@@ -1,33 +1,25 @@
+import os
+import sys
+
 import cv2
-from ultralytics import YOLO
+
+# Use the shared detection core from backend/ (same class mapping and post-processing as the API server)
+YOLO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(YOLO_DIR, '..', 'backend'))
+from detector import get_detector
 
 # Load the trained YOLOv8 model (use the path to your best weights file)
-model = YOLO("runs/detect/detect3_resume2/weights/best.pt")
+detector = get_detector(os.path.join(YOLO_DIR, "runs/detect/detect3_resume2/weights/best.pt"))
 
 # Read an image
 image_path = "path_to_image.jpg"  # replace with the actual image path
 image = cv2.imread(image_path)
 
-# Perform inference on the image
-results = model(image)
-
-# Loop through results and remap 'aeroplane' to 'drone'
-for result in results:
-    for box in result.boxes:
-        cls = int(box.cls[0])
-        name = model.names[cls]
-
-        # Remap 'aeroplane' to 'drone'
-        if name.lower() in ["aeroplane", "airplane"]:
-            name = "drone"
-
-        conf = float(box.conf[0])
-        xyxy = box.xyxy[0].tolist()
-        x1, y1, x2, y2 = map(int, xyxy)
+# Perform inference on the image; 'aeroplane' and 'airplane' come back as type 'drone'
+detections = detector.detect_objects(image, confidence_threshold=0.25)
 
-        label = f"{name} {conf:.2f}"
-        cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.putText(image, label, (x1, max(15, y1-6)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+# Draw each detection with its type and confidence
+detector.draw_detections(image, detections)
 
 # Show the processed image
 cv2.imshow("Detection", image)
@@ -1,49 +1,31 @@
+import os
+import sys
+
 import cv2
-from ultralytics import YOLO
 
-# Load the trained YOLOv8 model
-model = YOLO("yolov8n.pt")
+# Use the shared detection core from backend/ (same class mapping and post-processing as the API server)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from detector import DEFAULT_WEIGHTS, get_detector
+from frame_stream import capture_frames
 
-# Open video feed (use webcam or video file)
-cap = cv2.VideoCapture(0)  # or use "video_path" for a video file
+# Load the YOLOv8 model (downloaded once into backend/ if it is missing)
+detector = get_detector(DEFAULT_WEIGHTS)
 
-if not cap.isOpened():
+# Open video feed (use webcam or video file)
+try:
+    frames = capture_frames(0)  # or use "video_path" for a video file
+    stream = detector.stream(frames, confidence_threshold=0.6, batch_size=1, latest_only=True)
+    # Frames are read on a background thread; only the newest one is inferred when detection falls behind
+    for _, frame, detections in stream:
+        detector.draw_detections(frame, detections)
+
+        # Display the live video with detections
+        cv2.imshow("YOLOv8 Detection", frame)
+
+        # Press 'q' to quit the live feed
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+except ValueError:
     print("Error: Could not open webcam.")
-    exit()
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    results = model(frame, conf=0.6)  # Run inference with confidence threshold
-
-    # Process the results
-    for r in results:
-        for box in r.boxes:
-            cls = int(box.cls[0])
-            name = model.names[cls]
-
-            # Remap 'aeroplane' to 'drone'
-            if name.lower() in ["aeroplane", "airplane"]:
-                name = "drone"
 
-            conf = float(box.conf[0])
-            xyxy = box.xyxy[0].tolist()
-            x1, y1, x2, y2 = map(int, xyxy)
-
-            label = f"{name} {conf:.2f}"
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(frame, label, (x1, max(15, y1-6)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-
-    # Display the live video with detections
-    cv2.imshow("YOLOv8 Detection", frame)
-
-    # Press 'q' to quit the live feed
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-cap.release()
 cv2.destroyAllWindows()
-
-